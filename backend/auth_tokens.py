@@ -0,0 +1,127 @@
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+# What an access token says about its user, available to endpoints without a users-table lookup
+TokenClaims = namedtuple("TokenClaims", ["email", "username", "tier", "expires_at"])
+
+_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class InvalidToken(Exception):
+    """Raised for tokens that are malformed, wrongly signed, expired or of the wrong type."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenSigner:
+    """
+    Issues and verifies HS256-signed JWTs: short-lived access tokens, sent with
+    every authenticated request, and long-lived refresh tokens, exchanged at
+    /token/refresh for a new pair.
+
+    Verification needs only the secret, not the database. Decoded access tokens
+    are also kept in an LRU of up to `cache_size` entries, so a client's repeated
+    requests skip the signature check and JSON parsing as well.
+    """
+
+    def __init__(self, secret: str, access_ttl=1800, refresh_ttl=14 * 86400, cache_size=10000):
+        self._secret = secret.encode("utf-8")
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return hmac.new(self._secret, signing_input, hashlib.sha256).digest()
+
+    def encode(self, payload: dict) -> str:
+        signing_input = (
+            _b64encode(json.dumps(_HEADER, separators=(",", ":")).encode())
+            + "."
+            + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        )
+        return signing_input + "." + _b64encode(self._sign(signing_input.encode("ascii")))
+
+    def decode(self, token: str, token_type: str) -> dict:
+        """Returns the payload of a valid, unexpired token of `token_type`; raises InvalidToken otherwise."""
+        try:
+            header_part, payload_part, signature_part = token.split(".")
+            signature = _b64decode(signature_part)
+            expected = self._sign(f"{header_part}.{payload_part}".encode("ascii"))
+            if not hmac.compare_digest(signature, expected):
+                raise InvalidToken("Invalid token signature")
+            if json.loads(_b64decode(header_part)).get("alg") != "HS256":
+                raise InvalidToken("Unsupported token algorithm")
+            payload = json.loads(_b64decode(payload_part))
+        except (ValueError, UnicodeError, AttributeError) as e:
+            raise InvalidToken("Malformed token") from e
+        if not isinstance(payload, dict) or not isinstance(payload.get("sub"), str):
+            raise InvalidToken("Malformed token")
+        if payload.get("type") != token_type:
+            raise InvalidToken(f"Expected a {token_type} token")
+        if not isinstance(payload.get("exp"), (int, float)) or payload["exp"] <= time.time():
+            raise InvalidToken("Token has expired")
+        return payload
+
+    def issue(self, email: str, username: str, tier: str = None) -> dict:
+        """Returns a new access and refresh token for a user, in the /token response format."""
+        now = int(time.time())
+        claims = {"sub": email, "username": username, "tier": tier, "iat": now}
+        access_token = self.encode({**claims, "type": "access", "exp": now + self.access_ttl})
+        refresh_token = self.encode({
+            **claims,
+            "type": "refresh",
+            "exp": now + self.refresh_ttl,
+            "jti": secrets.token_urlsafe(12),
+        })
+        return {
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "token_type": "bearer",
+            "expires_in": self.access_ttl,
+        }
+
+    def verify_access(self, token: str) -> TokenClaims:
+        with self._lock:
+            claims = self._cache.get(token)
+            if claims is None:
+                self.cache_misses += 1
+            elif claims.expires_at > time.time():
+                self._cache.move_to_end(token)
+                self.cache_hits += 1
+                return claims
+            else:
+                self._cache.pop(token, None)
+                raise InvalidToken("Token has expired")
+
+        payload = self.decode(token, "access")
+        claims = TokenClaims(
+            email=payload["sub"],
+            username=payload.get("username"),
+            tier=payload.get("tier"),
+            expires_at=payload["exp"],
+        )
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[token] = claims
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return claims
+
+    def verify_refresh(self, token: str) -> dict:
+        return self.decode(token, "refresh")
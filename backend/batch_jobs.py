@@ -0,0 +1,154 @@
+import io
+import json
+import os
+import socket
+import threading
+import uuid
+import zipfile
+from collections import namedtuple
+
+from . import crud
+
+# How a job's operation is run and recorded: `run(job, texts)` returns one result
+# (or exception) per text, `history_text(result)` is the text saved to history
+BatchOperation = namedtuple("BatchOperation", ["run", "history_type", "history_text"])
+
+
+def parse_jsonl_texts(data: bytes):
+    """Reads one text per line, either a JSON string or an object with a "text" field."""
+    texts = []
+    for line_number, line in enumerate(data.decode("utf-8").splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number} is not valid JSON: {e}")
+        text = record.get("text") if isinstance(record, dict) else record
+        if not isinstance(text, str):
+            raise ValueError(f"Line {line_number} has no text")
+        texts.append(text)
+    return texts
+
+
+def parse_zip_texts(data: bytes):
+    """Reads every .txt file (one document each) and .jsonl file in the archive, in name order."""
+    texts = []
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a valid ZIP archive: {e}")
+    with archive:
+        for name in sorted(archive.namelist()):
+            if name.endswith("/") or name.startswith("__MACOSX/"):
+                continue
+            if name.lower().endswith(".txt"):
+                texts.append(archive.read(name).decode("utf-8"))
+            elif name.lower().endswith(".jsonl"):
+                texts.extend(parse_jsonl_texts(archive.read(name)))
+    return texts
+
+
+def parse_upload_texts(filename: str, data: bytes):
+    """Extracts the texts of an uploaded .jsonl or .zip file."""
+    name = (filename or "").lower()
+    if name.endswith(".zip"):
+        return parse_zip_texts(data)
+    if name.endswith(".jsonl") or name.endswith(".ndjson"):
+        return parse_jsonl_texts(data)
+    raise ValueError("Upload a .jsonl or .zip file")
+
+
+class BatchJobWorker:
+    """
+    Works through queued batch jobs on a background thread. Jobs and their items
+    live in the database, so a job interrupted by a restart is picked up again
+    and continues with the items that are still pending.
+
+    Items are processed `chunk_size` at a time; each chunk's results, progress
+    counters and history entries are saved together in one commit.
+
+    Several workers (in one or more processes) can share a database: a worker
+    claims a job with a lease of `lease_seconds` and renews it before every
+    chunk, and a running job is only taken over once its lease has expired.
+    """
+
+    def __init__(self, session_factory, operations, chunk_size=8, poll_seconds=2.0, lease_seconds=300.0):
+        self.session_factory = session_factory
+        self.operations = operations
+        self.chunk_size = max(1, chunk_size)
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="batch-jobs", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Wakes the worker up after a new job was queued."""
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        """Stops after the current chunk; unfinished jobs resume on the next start."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                worked = self.run_next_job()
+            except Exception as e:
+                print(f"Batch job worker error: {e}")
+                worked = False
+            if not worked:
+                self._wakeup.wait(self.poll_seconds)
+                self._wakeup.clear()
+
+    def run_next_job(self):
+        """Processes the oldest unfinished job; returns False if there was none."""
+        db = self.session_factory()
+        try:
+            job = crud.claim_next_batch_job(db, self.worker_id, self.lease_seconds)
+            if job is None:
+                return False
+            print(f"Processing batch job {job.id} ({job.operation}, {job.total_items} items)")
+            operation = self.operations[job.operation]
+            while not self._stopping.is_set():
+                if not crud.renew_batch_lease(db, job, self.worker_id, self.lease_seconds):
+                    print(f"Batch job {job.id} was taken over by another worker")
+                    break
+                items = crud.get_pending_batch_items(db, job.id, limit=self.chunk_size)
+                if not items:
+                    crud.finish_batch_job(db, job)
+                    break
+                self._process_chunk(db, job, operation, items)
+            return True
+        finally:
+            db.close()
+
+    def _process_chunk(self, db, job, operation, items):
+        texts = [item.input_text for item in items]
+        try:
+            results = operation.run(job, texts)
+        except Exception as e:
+            results = [e] * len(items)
+
+        histories = []
+        if job.user_email:
+            for text, result in zip(texts, results):
+                if not isinstance(result, Exception):
+                    histories.append({
+                        "user_email": job.user_email,
+                        "operation_type": operation.history_type,
+                        "original_text": text,
+                        "result_text": operation.history_text(result),
+                    })
+        crud.save_batch_results(db, job, items, results, histories)
@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Groups work items that arrive within a short window and share the same key
+    into a single call to `process_batch(key, items)`, then hands each caller
+    its own result back through a Future.
+    """
+
+    def __init__(self, process_batch, window_seconds=0.02, max_batch_size=8, num_workers=1, name="batcher"):
+        self.process_batch = process_batch
+        self.window_seconds = max(0.0, window_seconds)
+        self.max_batch_size = max(1, max_batch_size)
+        self.num_workers = max(1, num_workers)
+        self.name = name
+
+        # key -> list of (item, future, arrival_time), oldest first
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._workers = []
+        self._closed = False
+
+    def submit(self, key, item) -> Future:
+        """Queues an item under `key` and returns a Future for its result."""
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"{self.name} has been shut down")
+            self._pending.setdefault(key, []).append((item, future, time.monotonic()))
+            self._start_workers()
+            self._cond.notify()
+        return future
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return sum(len(entries) for entries in self._pending.values())
+
+    def shutdown(self, wait=True):
+        """Flushes whatever is queued and stops the worker threads."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def _start_workers(self):
+        # Called with the lock held; threads are only started on first use.
+        while len(self._workers) < self.num_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.name}-{len(self._workers)}",
+                daemon=True,
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _take_batch(self):
+        """Blocks until a batch is ready: either full, or its window has elapsed."""
+        with self._cond:
+            while True:
+                if not self._pending:
+                    if self._closed:
+                        return None, None
+                    self._cond.wait()
+                    continue
+
+                now = time.monotonic()
+                ready_key, wait_for = None, None
+                for key, entries in self._pending.items():
+                    if len(entries) >= self.max_batch_size:
+                        ready_key = key
+                        break
+                    remaining = entries[0][2] + self.window_seconds - now
+                    if remaining <= 0 or self._closed:
+                        if ready_key is None:
+                            ready_key = key
+                    elif wait_for is None or remaining < wait_for:
+                        wait_for = remaining
+
+                if ready_key is None:
+                    self._cond.wait(timeout=wait_for)
+                    continue
+
+                entries = self._pending.pop(ready_key)
+                batch, rest = entries[:self.max_batch_size], entries[self.max_batch_size:]
+                if rest:
+                    self._pending[ready_key] = rest
+                return ready_key, batch
+
+    def _worker_loop(self):
+        while True:
+            key, batch = self._take_batch()
+            if batch is None:
+                return
+            batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(key, batch)
+
+    def _run_batch(self, key, batch):
+        items = [item for item, _, _ in batch]
+        try:
+            results = self.process_batch(key, items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # One bad input (e.g. an over-long text) should not fail its neighbours,
+            # so retry each item on its own before reporting errors.
+            for entry in batch:
+                self._run_batch(key, [entry])
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
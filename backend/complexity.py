@@ -0,0 +1,154 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import textstat
+from nltk.tokenize import sent_tokenize
+
+LEVELS = ("beginner", "intermediate", "advanced")
+# Sentences shorter than this skew Flesch-Kincaid and are left out of the distribution
+MIN_WORDS = 5
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+@lru_cache(maxsize=200_000)
+def syllables_in_word(word: str) -> int:
+    """Syllable count of a single lower-cased word, memoized across all requests."""
+    return textstat.syllable_count(word)
+
+
+def grade_to_level(grade: float) -> str:
+    if grade < 8:
+        return "beginner"
+    if grade <= 12:
+        return "intermediate"
+    return "advanced"
+
+
+class ComplexityAnalyzer:
+    """
+    Classifies each sentence by its Flesch-Kincaid grade. Grades are memoized
+    per sentence (keyed by a hash of its text), so repeated or overlapping text
+    such as the original document across summarize and paraphrase runs is only
+    scored once. The sentences missing from the memo are scored as one batch:
+    the syllables of each distinct word are looked up once, and the per-sentence
+    totals and grades are computed with NumPy in a single pass.
+    """
+
+    def __init__(self, max_cached_sentences: int = 200_000):
+        self.max_cached_sentences = max_cached_sentences
+        self._grades = OrderedDict()  # sentence digest -> grade, or None if too short
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(sentence: str) -> bytes:
+        return hashlib.blake2b(sentence.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _syllables(word: str) -> int:
+        try:
+            return syllables_in_word(word)
+        except Exception:
+            return -1
+
+    def _score(self, sentences):
+        """Grades sentences that are not cached yet; returns None for those that are too short."""
+        word_lists = [_PUNCTUATION.sub("", sentence).lower().split() for sentence in sentences]
+        words = [word for sentence_words in word_lists for word in sentence_words]
+        syllables_by_word = {word: self._syllables(word) for word in set(words)}
+
+        word_counts = np.array([len(sentence_words) for sentence_words in word_lists], dtype=float)
+        word_syllables = np.array([syllables_by_word[word] for word in words], dtype=float)
+        # The sentence each word belongs to, so per-sentence totals are one bincount each
+        sentence_ids = np.repeat(np.arange(len(sentences)), word_counts.astype(int))
+        syllables = np.bincount(sentence_ids, weights=word_syllables, minlength=len(sentences))
+        # Sentences with an unscorable word are skipped, like sentences that are too short
+        unscorable = np.bincount(sentence_ids, weights=word_syllables < 0, minlength=len(sentences)) > 0
+        word_counts[unscorable] = 0
+
+        # Each entry is one sentence, so words per sentence is just the word count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grades = np.round(0.39 * word_counts + 11.8 * (syllables / word_counts) - 15.59, 1)
+        return [
+            float(grade) if count >= MIN_WORDS else None
+            for grade, count in zip(grades.tolist(), word_counts.tolist())
+        ]
+
+    def sentence_grades(self, sentences):
+        """Returns the grade of every sentence (None for sentences that are too short)."""
+        digests = [self._digest(sentence) for sentence in sentences]
+        grades = [None] * len(sentences)
+        missing = {}
+        with self._lock:
+            for index, digest in enumerate(digests):
+                if digest in self._grades:
+                    self._grades.move_to_end(digest)
+                    grades[index] = self._grades[digest]
+                else:
+                    missing.setdefault(digest, []).append(index)
+
+        if missing:
+            first_indexes = [indexes[0] for indexes in missing.values()]
+            scored = self._score([sentences[i] for i in first_indexes])
+            with self._lock:
+                for (digest, indexes), grade in zip(missing.items(), scored):
+                    for index in indexes:
+                        grades[index] = grade
+                    self._grades[digest] = grade
+                while len(self._grades) > self.max_cached_sentences:
+                    self._grades.popitem(last=False)
+        return grades
+
+    def analyze(self, text: str, include_sentences: bool = True):
+        """
+        Returns the level distribution together with per-sentence grades and
+        summary statistics for the text.
+        """
+        return self.analyze_sentences(sent_tokenize(text), include_sentences)
+
+    def analyze_sentences(self, sentences, include_sentences: bool = True):
+        """Like analyze, for text that has already been split into sentences."""
+        grades = self.sentence_grades(sentences) if sentences else []
+        scored = [grade for grade in grades if grade is not None]
+
+        counts = {level: 0 for level in LEVELS}
+        for grade in scored:
+            counts[grade_to_level(grade)] += 1
+
+        if not sentences:
+            levels = {level: 0 for level in LEVELS}
+        elif not scored:
+            # If all sentences were too short, classify as beginner
+            levels = {"beginner": 100, "intermediate": 0, "advanced": 0}
+        else:
+            levels = {level: round((count / len(scored)) * 100) for level, count in counts.items()}
+
+        analysis = {
+            "levels": levels,
+            "level_counts": counts,
+            "sentence_count": len(sentences),
+            "scored_sentence_count": len(scored),
+            "mean_grade": round(float(np.mean(scored)), 2) if scored else None,
+            "median_grade": round(float(np.median(scored)), 2) if scored else None,
+        }
+        if include_sentences:
+            analysis["sentences"] = [
+                {"text": sentence, "grade": grade, "level": None if grade is None else grade_to_level(grade)}
+                for sentence, grade in zip(sentences, grades)
+            ]
+        return analysis
+
+    def cache_size(self) -> int:
+        return len(self._grades)
+
+
+complexity_analyzer = ComplexityAnalyzer()
+
+
+def analyze_text_complexity(text: str):
+    """Analyzes text complexity by classifying each sentence (percentage per level)."""
+    return complexity_analyzer.analyze(text, include_sentences=False)["levels"]
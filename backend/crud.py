@@ -1,22 +1,18 @@
+import datetime
+import json
 import secrets
-from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy import func, literal, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased, joinedload
 from . import models, schemas
-
-# Setup the password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+from .text_blobs import PREVIEW_CHARS, compress_text, text_hash
 
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+# Passwords are hashed by the caller, in the password hashing processes (see passwords.py)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str):
     db_user = models.User(
         email=user.email,
         username=user.username,
@@ -39,6 +35,10 @@ def update_user_profile(db: Session, email: str, profile_data: schemas.ProfileUp
         db.refresh(user)
     return user
 
+def update_password_hash(db: Session, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+
 def create_reset_token(db: Session, email: str):
     user = get_user_by_email(db, email=email)
     if user:
@@ -49,30 +49,311 @@ def create_reset_token(db: Session, email: str):
         return token
     return None
 
-def reset_password(db: Session, token: str, new_password: str):
-    user = db.query(models.User).filter(models.User.reset_token == token).first()
+def get_user_by_reset_token(db: Session, token: str):
+    return db.query(models.User).filter(models.User.reset_token == token).first()
+
+def reset_password(db: Session, token: str, hashed_password: str):
+    user = get_user_by_reset_token(db, token)
     if user:
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = hashed_password
         user.reset_token = None  # Invalidate the token after use
         db.commit()
         return user
     return None
 
+def store_text_blobs(db: Session, texts):
+    """
+    Stores each distinct text once in text_blobs, compressed, and returns the hash
+    of every text in order. Texts that are already stored are not written again.
+    """
+    hashes = [text_hash(text) for text in texts]
+    new_blobs = {}
+    for text, digest in zip(texts, hashes):
+        if digest not in new_blobs:
+            compression, data = compress_text(text)
+            new_blobs[digest] = {
+                "hash": digest, "compression": compression, "data": data, "size": len(text), "preview": text[:PREVIEW_CHARS],
+            }
+
+    existing = {
+        digest for (digest,) in db.query(models.TextBlob.hash).filter(models.TextBlob.hash.in_(list(new_blobs)))
+    }
+    rows = [row for digest, row in new_blobs.items() if digest not in existing]
+    if rows:
+        # Another writer may store the same text concurrently; either copy is fine
+        insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        db.execute(insert(models.TextBlob).on_conflict_do_nothing(), rows)
+    return hashes
+
 # NEW: Added the missing function to create a history entry in the database
 def create_history_entry(db: Session, history: schemas.HistoryCreate):
+    original_hash, result_hash = store_text_blobs(db, [history.original_text, history.result_text])
     db_history = models.History(
         user_email=history.user_email,
         operation_type=history.operation_type,
-        original_text=history.original_text,
-        result_text=history.result_text
+        original_blob_hash=original_hash,
+        result_blob_hash=result_hash
     )
     db.add(db_history)
     db.commit()
     db.refresh(db_history)
     return db_history
 
-def get_user_history(db: Session, email: str):
+def get_user_history(
+        db: Session,
+        email: str,
+        limit: int = None,
+        before=None,
+        operation_type: str = None,
+        since=None,
+        until=None,
+        preview_chars: int = None,
+    ):
+    """
+    Retrieves a user's history entries, newest first. `before` is the (timestamp, id)
+    keyset of the last entry of the previous page. With `preview_chars`, only the
+    first characters of the texts are loaded (plus their full lengths), from the
+    stored blob previews, instead of the full texts.
+    """
+    History = models.History
+    if preview_chars:
+        original, result = aliased(models.TextBlob), aliased(models.TextBlob)
+        preview_chars = min(preview_chars, PREVIEW_CHARS)
+        query = (
+            db.query(
+                History.id,
+                History.user_email,
+                History.operation_type,
+                History.timestamp,
+                # Entries not yet moved into text_blobs still have their texts inline
+                func.coalesce(
+                    func.substr(original.preview, 1, preview_chars),
+                    func.substr(History.inline_original_text, 1, preview_chars),
+                    "",
+                ).label("original_preview"),
+                func.coalesce(
+                    func.substr(result.preview, 1, preview_chars),
+                    func.substr(History.inline_result_text, 1, preview_chars),
+                    "",
+                ).label("result_preview"),
+                func.coalesce(original.size, func.length(History.inline_original_text), 0).label("original_length"),
+                func.coalesce(result.size, func.length(History.inline_result_text), 0).label("result_length"),
+            )
+            .outerjoin(original, History.original_blob_hash == original.hash)
+            .outerjoin(result, History.result_blob_hash == result.hash)
+        )
+    else:
+        query = db.query(History).options(joinedload(History.original_blob), joinedload(History.result_blob))
+
+    query = query.filter(History.user_email == email)
+    if operation_type:
+        query = query.filter(History.operation_type == operation_type)
+    if since:
+        query = query.filter(History.timestamp >= since)
+    if until:
+        query = query.filter(History.timestamp < until)
+    if before:
+        # Typed literals so the timestamp is bound in the column's storage format
+        timestamp, entry_id = before
+        query = query.filter(
+            tuple_(History.timestamp, History.id) < tuple_(literal(timestamp, History.timestamp.type), literal(entry_id))
+        )
+
+    query = query.order_by(History.timestamp.desc(), History.id.desc())
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def get_history_entry(db: Session, email: str, entry_id: int):
+    return (
+        db.query(models.History)
+        .options(joinedload(models.History.original_blob), joinedload(models.History.result_blob))
+        .filter(models.History.id == entry_id, models.History.user_email == email)
+        .first()
+    )
+
+def create_history_entries(db: Session, histories):
+    """
+    Adds many history entries in one executemany insert. Entries are dicts with
+    the HistoryCreate fields (and optionally a timestamp); the caller commits.
+    """
+    if not histories:
+        return
+    texts = [text for history in histories for text in (history["original_text"], history["result_text"])]
+    hashes = store_text_blobs(db, texts)
+    rows = []
+    for index, history in enumerate(histories):
+        row = {
+            "user_email": history["user_email"],
+            "operation_type": history["operation_type"],
+            "original_blob_hash": hashes[2 * index],
+            "result_blob_hash": hashes[2 * index + 1],
+        }
+        if history.get("timestamp") is not None:
+            row["timestamp"] = history["timestamp"]
+        rows.append(row)
+    db.bulk_insert_mappings(models.History, rows)
+
+def move_history_texts_to_blobs(db: Session, batch_size: int = 500):
+    """
+    Moves the inline texts of up to `batch_size` history entries into text_blobs.
+    Returns how many entries were migrated (0 once there are none left).
+    """
+    History = models.History
+    entries = (
+        db.query(History.id, History.inline_original_text, History.inline_result_text)
+        .filter(or_(History.inline_original_text.isnot(None), History.inline_result_text.isnot(None)))
+        .order_by(History.id)
+        .limit(batch_size)
+        .all()
+    )
+    if not entries:
+        return 0
+    texts = [text or "" for entry in entries for text in (entry.inline_original_text, entry.inline_result_text)]
+    hashes = store_text_blobs(db, texts)
+    db.bulk_update_mappings(History, [
+        {
+            "id": entry.id,
+            "original_blob_hash": hashes[2 * index],
+            "result_blob_hash": hashes[2 * index + 1],
+            "inline_original_text": None,
+            "inline_result_text": None,
+        }
+        for index, entry in enumerate(entries)
+    ])
+    db.commit()
+    return len(entries)
+
+def fill_blob_previews(db: Session, batch_size: int = 500):
+    """
+    Stores the preview of up to `batch_size` blobs written before previews were
+    kept. Returns how many were filled (0 once there are none left).
+    """
+    blobs = db.query(models.TextBlob).filter(models.TextBlob.preview.is_(None)).limit(batch_size).all()
+    for blob in blobs:
+        blob.preview = blob.text[:PREVIEW_CHARS]
+    db.commit()
+    return len(blobs)
+
+# --- Batch Jobs ---
+def create_batch_job(db: Session, operation: str, texts, model_name: str, length: str, creativity=None, user_email=None):
+    job = models.BatchJob(
+        operation=operation,
+        model_name=model_name,
+        length=length,
+        creativity=creativity,
+        user_email=user_email,
+        status="queued",
+        total_items=len(texts),
+    )
+    db.add(job)
+    db.flush()
+    db.bulk_insert_mappings(models.BatchItem, [
+        {"job_id": job.id, "position": position, "input_text": text, "status": "pending"}
+        for position, text in enumerate(texts)
+    ])
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_batch_job(db: Session, job_id: int):
+    return db.query(models.BatchJob).filter(models.BatchJob.id == job_id).first()
+
+def _claimable_batch_job(now):
+    """Queued jobs, and running jobs whose worker let its lease lapse."""
+    return or_(
+        models.BatchJob.status == "queued",
+        (models.BatchJob.status == "running")
+        & (or_(models.BatchJob.lease_expires_at.is_(None), models.BatchJob.lease_expires_at < now)),
+    )
+
+def claim_next_batch_job(db: Session, worker_id: str, lease_seconds: float, attempts: int = 5):
     """
-    Retrieves all history entries for a user based on their email.
+    Claims the oldest queued job (or a running one whose lease has expired) for
+    `worker_id` and returns it. The claim is a conditional UPDATE, so when two
+    workers race for the same job only one of them gets it; the other moves on
+    to the next job.
     """
-    return db.query(models.History).filter(models.History.user_email == email).order_by(models.History.timestamp.desc()).all()
+    for _ in range(attempts):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        job_id = (
+            db.query(models.BatchJob.id)
+            .filter(_claimable_batch_job(now))
+            .order_by(models.BatchJob.id)
+            .limit(1)
+            .scalar()
+        )
+        if job_id is None:
+            return None
+        claimed = (
+            db.query(models.BatchJob)
+            .filter(models.BatchJob.id == job_id, _claimable_batch_job(now))
+            .update({
+                models.BatchJob.status: "running",
+                models.BatchJob.claimed_by: worker_id,
+                models.BatchJob.lease_expires_at: now + datetime.timedelta(seconds=lease_seconds),
+                models.BatchJob.started_at: func.coalesce(models.BatchJob.started_at, now),
+            }, synchronize_session=False)
+        )
+        db.commit()
+        if claimed:
+            return get_batch_job(db, job_id)
+    return None
+
+def renew_batch_lease(db: Session, job: models.BatchJob, worker_id: str, lease_seconds: float):
+    """Extends the worker's claim on a job; returns False if another worker has taken it over."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    renewed = (
+        db.query(models.BatchJob)
+        .filter(
+            models.BatchJob.id == job.id,
+            models.BatchJob.status == "running",
+            models.BatchJob.claimed_by == worker_id,
+        )
+        .update({models.BatchJob.lease_expires_at: now + datetime.timedelta(seconds=lease_seconds)},
+                synchronize_session=False)
+    )
+    db.commit()
+    db.refresh(job)
+    return bool(renewed)
+
+def get_pending_batch_items(db: Session, job_id: int, limit: int):
+    return (
+        db.query(models.BatchItem)
+        .filter(models.BatchItem.job_id == job_id, models.BatchItem.status == "pending")
+        .order_by(models.BatchItem.position)
+        .limit(limit)
+        .all()
+    )
+
+def save_batch_results(db: Session, job: models.BatchJob, items, results, histories):
+    """Stores a chunk's results, progress and history entries in one commit."""
+    for item, result in zip(items, results):
+        if isinstance(result, Exception):
+            item.status = "failed"
+            item.error = str(result)
+            job.failed_items += 1
+        else:
+            item.status = "done"
+            item.result = json.dumps(result)
+            job.completed_items += 1
+    create_history_entries(db, histories)
+    db.commit()
+
+def finish_batch_job(db: Session, job: models.BatchJob):
+    job.status = "completed"
+    job.finished_at = func.now()
+    job.lease_expires_at = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_batch_items(db: Session, job_id: int, after_position: int = -1, limit: int = 50):
+    """Returns a page of a job's items in input order, starting after `after_position`."""
+    return (
+        db.query(models.BatchItem)
+        .filter(models.BatchItem.job_id == job_id, models.BatchItem.position > after_position)
+        .order_by(models.BatchItem.position)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import pymupdf
+except ImportError:  # PDF extraction falls back to pypdf, if that is installed
+    pymupdf = None
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+try:
+    import docx
+except ImportError:
+    docx = None
+
+try:
+    import pptx
+except ImportError:
+    pptx = None
+
+# Upload extension -> (format, the package it needs or None)
+DOCUMENT_FORMATS = {
+    ".pdf": ("pdf", "pymupdf"),
+    ".docx": ("docx", "python-docx"),
+    ".pptx": ("pptx", "python-pptx"),
+    ".txt": ("txt", None),
+    ".md": ("txt", None),
+}
+
+
+class UnsupportedDocument(Exception):
+    """The upload is not a format that can be extracted here."""
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def document_format(filename: str) -> str:
+    """The format of an upload from its file name, or raises UnsupportedDocument."""
+    extension = os.path.splitext((filename or "").lower())[1]
+    if extension not in DOCUMENT_FORMATS:
+        raise UnsupportedDocument(f"Upload a {', '.join(sorted(DOCUMENT_FORMATS))} file")
+    kind, package = DOCUMENT_FORMATS[extension]
+    available = {"pdf": pymupdf or pypdf, "docx": docx, "pptx": pptx, "txt": True}[kind]
+    if not available:
+        raise UnsupportedDocument(f"Extracting {extension} files needs pip install {package}")
+    return kind
+
+
+async def spool_upload(upload, max_bytes: int, chunk_size=1024 * 1024):
+    """
+    Copies an UploadFile to a named temporary file chunk by chunk, hashing it on
+    the way. Returns (path, sha256 hex digest); the caller deletes the file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="textmorph-upload-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Uploads are limited to {max_bytes // (1024 * 1024)} MB")
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest()
+
+
+# --- Extraction (run in the worker processes, except pdf_page_count) ---
+def pdf_page_count(path: str) -> int:
+    if pymupdf is not None:
+        with pymupdf.open(path) as doc:
+            return doc.page_count
+    return len(pypdf.PdfReader(path).pages)
+
+
+def extract_pdf_pages(path: str, start: int, stop: int):
+    """The text of pages [start, stop) of a PDF."""
+    if pymupdf is not None:
+        with pymupdf.open(path) as doc:
+            return [doc[i].get_text() for i in range(start, stop)]
+    reader = pypdf.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_docx_sections(path: str, paragraphs_per_section=50):
+    """A DOCX has no pages, so its paragraphs are returned in sections of `paragraphs_per_section`."""
+    paragraphs = [p.text for p in docx.Document(path).paragraphs]
+    return [
+        "\n".join(paragraphs[i:i + paragraphs_per_section])
+        for i in range(0, len(paragraphs), paragraphs_per_section)
+    ] or [""]
+
+
+def extract_pptx_slides(path: str):
+    """The text of each slide, one shape per line."""
+    slides = []
+    for slide in pptx.Presentation(path).slides:
+        lines = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text]
+        slides.append("\n".join(lines))
+    return slides
+
+
+def extract_txt(path: str):
+    with open(path, "rb") as f:
+        return [f.read().decode("utf-8", errors="replace")]
+
+
+def _noop():
+    return None
+
+
+class DocumentExtractor:
+    """
+    Extracts the text of uploaded documents in worker processes. A PDF is split
+    into runs of `pages_per_task` pages that are extracted in parallel; other
+    formats are extracted whole by one worker. Pages are yielded in order as soon
+    as they (and every page before them) are ready.
+
+    With `max_workers=0` extraction runs on the default threadpool instead.
+    """
+
+    def __init__(self, max_workers=2, pages_per_task=8):
+        self.max_workers = max(0, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+        self._executor = None
+
+    def _get_executor(self):
+        if self.max_workers == 0:
+            return None
+        if self._executor is None:
+            # Forking a process that has loaded torch and started threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _discard(self, executor):
+        # A worker died; start a fresh pool for the next upload
+        if self._executor is executor:
+            self._executor = None
+
+    async def iter_pages(self, path: str, kind: str):
+        """Yields the text of each page (PDF), section (DOCX), slide (PPTX) or the whole file (TXT)."""
+        if kind == "pdf":
+            page_count = await asyncio.to_thread(pdf_page_count, path)
+            calls = [
+                (extract_pdf_pages, path, start, min(start + self.pages_per_task, page_count))
+                for start in range(0, page_count, self.pages_per_task)
+            ]
+        else:
+            calls = [({"docx": extract_docx_sections, "pptx": extract_pptx_slides, "txt": extract_txt}[kind], path)]
+
+        # Every run is submitted at once, so later pages are extracted while earlier ones are sent
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        futures = []
+        try:
+            futures = [loop.run_in_executor(executor, fn, *args) for fn, *args in calls]
+            for future in futures:
+                for page in await future:
+                    yield page
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def start(self):
+        """Starts the worker processes now rather than on the first upload."""
+        executor = self._get_executor()
+        if executor is not None:
+            for future in [executor.submit(_noop) for _ in range(self.max_workers)]:
+                future.result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
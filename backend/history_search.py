@@ -0,0 +1,219 @@
+"""
+Full-text search over history entries, backed by an SQLite FTS5 index.
+
+The index is an external-content FTS5 table over the history table, so the
+texts are not stored twice; compressed texts are read through the blob_text()
+SQL function that database.py registers on every SQLite connection. Each entry is indexed under its owner as a single
+token (the hex-encoded email), which keeps per-user lookups to that user's rows,
+and 3- and 4-character prefixes are indexed so short prefix searches stay fast. Triggers keep it in sync with every insert, update
+and delete. Rows that existed before the index was created are added by the
+backfill command, which works in batches and can be interrupted and resumed:
+
+    python -m backend.history_search --backfill
+    python -m backend.history_search --rebuild   # reindex everything from scratch
+"""
+import argparse
+import re
+
+from sqlalchemy import text
+
+FTS_TABLE = "history_fts"
+CONTENT_VIEW = "history_fts_content"
+STATE_TABLE = "history_fts_state"
+
+# Column order of the FTS table, used by snippet() and bm25()
+OWNER_COLUMN, ORIGINAL_COLUMN, RESULT_COLUMN = 0, 1, 2
+
+
+def text_expression(row, column):
+    """SQL for a history text, read from its (compressed) blob unless it is still stored inline."""
+    return (
+        f"COALESCE({row}.{column}, "
+        f"(SELECT blob_text(compression, data) FROM text_blobs WHERE hash = {row}.{column.replace('_text', '_blob_hash')}))"
+    )
+
+
+# True for entries already in the index: added by the triggers or by the backfill so far.
+# Entries still waiting for the backfill must not be removed from the index (they are not
+# in it); the backfill picks up their current texts instead.
+INDEXED_CONDITION = (
+    f"old.id > (SELECT backfill_until FROM {STATE_TABLE}) OR old.id <= (SELECT backfilled_to FROM {STATE_TABLE})"
+)
+
+
+def index_values(row):
+    return f"{row}.id, hex({row}.user_email), {text_expression(row, 'original_text')}, {text_expression(row, 'result_text')}"
+
+
+# The view and triggers that feed the index; recreated when they predate text_blobs.
+# They reference the state table, which is created with the index.
+SYNC_STATEMENTS = [
+    f"""CREATE VIEW {CONTENT_VIEW} AS
+        SELECT h.id AS id, hex(h.user_email) AS owner,
+            {text_expression("h", "original_text")} AS original_text,
+            {text_expression("h", "result_text")} AS result_text
+        FROM history AS h""",
+    f"""CREATE TRIGGER history_fts_after_insert AFTER INSERT ON history BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, owner, original_text, result_text) VALUES ({index_values("new")});
+    END""",
+    f"""CREATE TRIGGER history_fts_after_delete AFTER DELETE ON history WHEN {INDEXED_CONDITION} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner, original_text, result_text) VALUES ('delete', {index_values("old")});
+    END""",
+    f"""CREATE TRIGGER history_fts_after_update AFTER UPDATE ON history WHEN {INDEXED_CONDITION} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, owner, original_text, result_text) VALUES ('delete', {index_values("old")});
+        INSERT INTO {FTS_TABLE}(rowid, owner, original_text, result_text) VALUES ({index_values("new")});
+    END""",
+]
+SYNC_OBJECTS = [
+    ("VIEW", CONTENT_VIEW),
+    ("TRIGGER", "history_fts_after_insert"),
+    ("TRIGGER", "history_fts_after_delete"),
+    ("TRIGGER", "history_fts_after_update"),
+]
+
+SETUP_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        owner, original_text, result_text,
+        content='{CONTENT_VIEW}', content_rowid='id', tokenize='unicode61 remove_diacritics 2',
+        prefix='3 4'
+    )""",
+    # Rows up to backfill_until predate the triggers; backfilled_to tracks how far the backfill got
+    f"CREATE TABLE {STATE_TABLE} (backfill_until INTEGER NOT NULL, backfilled_to INTEGER NOT NULL)",
+    f"INSERT INTO {STATE_TABLE} SELECT COALESCE(MAX(id), 0), 0 FROM history",
+] + SYNC_STATEMENTS
+
+
+def is_supported(engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def ensure_search_index(engine) -> bool:
+    """
+    Creates the FTS table and its triggers if they do not exist yet. Returns False
+    when the database does not support FTS5 search.
+    """
+    if not is_supported(engine):
+        return False
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first()
+        if exists:
+            view_sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'view' AND name = :name"), {"name": CONTENT_VIEW}
+            ).scalar()
+            if "blob_text" not in (view_sql or ""):
+                # Indexes created before texts moved to text_blobs; the indexed text is unchanged
+                for object_type, name in SYNC_OBJECTS:
+                    conn.execute(text(f"DROP {object_type} IF EXISTS {name}"))
+                for statement in SYNC_STATEMENTS:
+                    conn.execute(text(statement))
+            return True
+        for statement in SETUP_STATEMENTS:
+            conn.execute(text(statement))
+        backfill_until = conn.execute(text(f"SELECT backfill_until FROM {STATE_TABLE}")).scalar()
+    if backfill_until:
+        print(f"History search index created; run 'python -m backend.history_search --backfill' to index {backfill_until} existing entries.")
+    return True
+
+
+def backfill(engine, batch_size=10_000):
+    """Indexes the entries that predate the index, one committed batch at a time."""
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            backfill_until, backfilled_to = conn.execute(
+                text(f"SELECT backfill_until, backfilled_to FROM {STATE_TABLE}")
+            ).one()
+            if backfilled_to >= backfill_until:
+                return total
+            batch_end = min(backfilled_to + batch_size, backfill_until)
+            result = conn.execute(
+                text(
+                    f"INSERT INTO {FTS_TABLE}(rowid, owner, original_text, result_text) "
+                    f"SELECT id, owner, original_text, result_text FROM {CONTENT_VIEW} WHERE id > :start AND id <= :end"
+                ),
+                {"start": backfilled_to, "end": batch_end},
+            )
+            conn.execute(text(f"UPDATE {STATE_TABLE} SET backfilled_to = :end"), {"end": batch_end})
+        total += result.rowcount
+        print(f"Indexed history entries up to id {batch_end} of {backfill_until}")
+
+
+def rebuild(engine):
+    """Reindexes every entry from the history table."""
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+        conn.execute(text(f"UPDATE {STATE_TABLE} SET backfilled_to = backfill_until"))
+
+
+def build_match_query(query: str, email: str) -> str:
+    """
+    Turns user input into an FTS5 query: every word must match (a trailing * makes
+    it a prefix search), and only entries owned by `email` are considered.
+    FTS5 operators in the input are treated as plain words.
+    """
+    terms = []
+    for word in query.split():
+        is_prefix = word.endswith("*")
+        word = re.sub(r'["*]', "", word)
+        if word:
+            terms.append(f'"{word}"' + ("*" if is_prefix else ""))
+    if not terms:
+        return ""
+    owner = email.encode("utf-8").hex().upper()
+    return f'owner : "{owner}" AND ({" ".join(terms)})'
+
+
+def search_history(db, email: str, query: str, limit: int = 20, offset: int = 0, snippet_tokens: int = 16, prefix_chars: int = 200):
+    """
+    Returns the user's history entries matching `query`, best match first, with
+    highlighted snippets of the original and result texts. A snippet FTS5 cannot
+    build falls back to the first `prefix_chars` characters of the text, and is
+    None only for an entry without that text.
+    """
+    match = build_match_query(query, email)
+    if not match:
+        return []
+    # The owner token narrows the search inside the index to the user's entries
+    rows = db.execute(
+        text(
+            f"""SELECT h.id, h.operation_type, h.timestamp,
+                   COALESCE(snippet({FTS_TABLE}, {ORIGINAL_COLUMN}, '<b>', '</b>', '…', :tokens),
+                            substr({FTS_TABLE}.original_text, 1, :prefix_chars)) AS original_snippet,
+                   COALESCE(snippet({FTS_TABLE}, {RESULT_COLUMN}, '<b>', '</b>', '…', :tokens),
+                            substr({FTS_TABLE}.result_text, 1, :prefix_chars)) AS result_snippet,
+                   -bm25({FTS_TABLE}, 0.0, 1.0, 1.0) AS score
+            FROM {FTS_TABLE}
+            JOIN history AS h ON h.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH :match AND h.user_email = :email
+            ORDER BY score DESC
+            LIMIT :limit OFFSET :offset"""
+        ),
+        {
+            "match": match, "email": email, "tokens": snippet_tokens, "prefix_chars": prefix_chars,
+            "limit": limit, "offset": offset,
+        },
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Builds the history full-text search index.")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--backfill", action="store_true", help="index entries that predate the index")
+    group.add_argument("--rebuild", action="store_true", help="reindex every entry from scratch")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    from .database import engine
+    from . import models
+
+    models.Base.metadata.create_all(bind=engine)
+    if not ensure_search_index(engine):
+        raise SystemExit("History search needs an SQLite database with FTS5.")
+    if args.rebuild:
+        rebuild(engine)
+        print("Rebuilt the history search index.")
+    else:
+        print(f"Indexed {backfill(engine, args.batch_size)} history entries.")
@@ -0,0 +1,211 @@
+import datetime
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from . import crud
+
+
+class HistoryWriteBuffer:
+    """
+    Write-behind buffer for history entries. Requests hand their entry to `add`,
+    which only appends to an in-memory queue; a background thread inserts queued
+    entries in bulk (one executemany and one commit) once `batch_size` entries
+    are waiting or `flush_interval` seconds have passed.
+
+    When a batch fails, its entries are retried one at a time. Entries that fail
+    while others go through are bad rows and are moved to the `dead_letter_path`
+    JSONL file. If none go through, the database is taken to be unavailable:
+    the entries (and everything still queued) are appended to a JSONL spool file,
+    which is retried every `retry_interval` seconds and on the next start. An
+    entry that has failed `max_attempts` times is dead-lettered as well, so one
+    bad row cannot keep a spool from draining. A replayed spool is kept until all
+    of its entries are written, dead-lettered or spooled again, so a crash in
+    between replays them once more instead of losing them.
+    """
+
+    def __init__(
+            self,
+            session_factory,
+            batch_size=200,
+            flush_interval=0.2,
+            spool_path=None,
+            retry_interval=10.0,
+            dead_letter_path=None,
+            max_attempts=5,
+        ):
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.retry_interval = retry_interval
+        self.dead_letter_path = dead_letter_path
+        self.max_attempts = max(1, max_attempts)
+        self._spooled_at = 0.0
+        self._replayed = set()  # ids of replayed entries not yet written, dead-lettered or spooled again
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.flushed_entries = 0
+        self.dead_letter_entries = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def add(self, history):
+        """Queues a schemas.HistoryCreate; the entry is timestamped now, not when it is written."""
+        entry = history.model_dump()
+        entry["timestamp"] = datetime.datetime.now(datetime.timezone.utc)
+        self._queue.append(entry)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_count(self) -> int:
+        return len(self._queue)
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            if self.spool_path and time.monotonic() - self._spooled_at >= self.retry_interval:
+                self._replay_spool()
+
+    def _take_batch(self):
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _write(self, entries):
+        """Inserts entries in one transaction; returns the error, or None once they are committed."""
+        db = self.session_factory()
+        try:
+            crud.create_history_entries(db, entries)
+            db.commit()
+            self.flushed_entries += len(entries)
+            self._settle_replayed(entries)
+            return None
+        except Exception as e:
+            db.rollback()
+            return e
+        finally:
+            db.close()
+
+    def flush(self) -> bool:
+        """Writes everything queued so far; returns False if entries had to be spooled instead."""
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return True
+            error = self._write(batch)
+            if error is None:
+                continue
+            print(f"Could not write {len(batch)} history entries, retrying them one at a time: {error}")
+            failed = []
+            for entry in batch:
+                error = self._write([entry])
+                if error is not None:
+                    entry["attempts"] = entry.get("attempts", 0) + 1
+                    failed.append((entry, error))
+            if not failed:
+                continue
+            if len(failed) < len(batch):
+                self._dead_letter(failed)
+                continue
+            # Nothing could be written: the database is unavailable, not the entries
+            exhausted = [(entry, error) for entry, error in failed if entry["attempts"] >= self.max_attempts]
+            if exhausted:
+                self._dead_letter(exhausted)
+            retry = [entry for entry, _ in failed if entry["attempts"] < self.max_attempts]
+            print(f"Could not write any of {len(batch)} history entries, spooling them: {failed[0][1]}")
+            self._spool(retry + self._take_all())
+            return False
+
+    def _take_all(self):
+        entries = list(self._queue)
+        for _ in entries:
+            self._queue.popleft()
+        return entries
+
+    def _spool(self, entries):
+        if not self.spool_path:
+            print(f"No history spool file configured; {len(entries)} history entries were lost.")
+            return
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps({**entry, "timestamp": entry["timestamp"].isoformat()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._spooled_at = time.monotonic()
+        self._settle_replayed(entries)
+
+    def _dead_letter(self, failed):
+        """Sets aside (entry, error) pairs that keep failing, so they are not retried again."""
+        for entry, error in failed:
+            print(f"Moving a history entry for {entry['user_email']} to the dead-letter file after "
+                  f"{entry['attempts']} failed attempt(s): {error}")
+        self.dead_letter_entries += len(failed)
+        if not self.dead_letter_path:
+            print(f"No history dead-letter file configured; {len(failed)} history entries were lost.")
+            return
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            for entry, error in failed:
+                f.write(json.dumps({**entry, "timestamp": entry["timestamp"].isoformat(), "error": str(error)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._settle_replayed([entry for entry, _ in failed])
+
+    def _settle_replayed(self, entries):
+        """Deletes the replay file once every entry read from it is stored somewhere else."""
+        if not self._replayed:
+            return
+        self._replayed.difference_update(id(entry) for entry in entries)
+        if not self._replayed:
+            os.remove(self.spool_path + ".replay")
+
+    def _replay_spool(self):
+        """
+        Moves spooled entries back into the queue, to be written by the next flush.
+        The replay file is deleted by _settle_replayed, not here.
+        """
+        if self._replayed:
+            return  # the last replay is still being written
+        replay_path = self.spool_path + ".replay"
+        # A leftover replay file means an earlier replay did not finish; it is read first
+        if not os.path.exists(replay_path):
+            if not os.path.exists(self.spool_path):
+                return
+            os.replace(self.spool_path, replay_path)
+        entries = []
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry["timestamp"] = datetime.datetime.fromisoformat(entry["timestamp"])
+                    entries.append(entry)
+        print(f"Replaying {len(entries)} spooled history entries")
+        if not entries:
+            os.remove(replay_path)
+            return
+        self._replayed.update(id(entry) for entry in entries)
+        self._queue.extendleft(reversed(entries))
+
+    def recover(self):
+        """Queues entries left in the spool file by an earlier run."""
+        if self.spool_path:
+            self._replay_spool()
+
+    def close(self, timeout=None):
+        """Stops the background thread and writes (or spools) everything still queued."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
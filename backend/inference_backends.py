@@ -0,0 +1,64 @@
+"""
+Model loaders for the supported inference backends:
+
+- "pytorch": full-precision PyTorch, the default.
+- "int8": PyTorch with dynamic int8 quantization of every Linear layer.
+- "onnx": ONNX Runtime through optimum, with the encoder and decoder exported
+  separately and the decoder reusing its KV-cache between steps. Requires
+  `pip install "optimum[onnxruntime]"`.
+
+Every backend returns objects that work with `model.generate` and
+`transformers.pipeline`, so callers do not need to know which one is in use.
+"""
+import torch
+from transformers import AutoModelForSeq2SeqLM, AutoModelForSequenceClassification, AutoTokenizer
+
+BACKENDS = ("pytorch", "int8", "onnx")
+
+
+def parse_model_backends(spec: str):
+    """Parses 'model_a=onnx,model_b=int8' into {'model_a': 'onnx', 'model_b': 'int8'}."""
+    backends = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, _, backend = part.rpartition("=")
+        if name.strip() and backend.strip():
+            backends[name.strip()] = backend.strip().lower()
+    return backends
+
+
+def quantize_dynamic_int8(model):
+    """Swaps every Linear layer for a dynamically quantized int8 version (CPU only)."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(task: str, model_name: str):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTModelForSequenceClassification
+    except ImportError as e:
+        raise RuntimeError('The onnx backend needs optimum: pip install "optimum[onnxruntime]"') from e
+
+    if task == "seq2seq":
+        return ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+    return ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+
+
+def load_model(task: str, model_name: str, backend: str = "pytorch"):
+    """
+    Loads (model, tokenizer) for `task` ("seq2seq" or "classification") on the
+    given backend.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    if backend == "onnx":
+        return _load_onnx(task, model_name), tokenizer
+
+    model_class = AutoModelForSeq2SeqLM if task == "seq2seq" else AutoModelForSequenceClassification
+    model = model_class.from_pretrained(model_name)
+    model.eval()
+    if backend == "int8":
+        model = quantize_dynamic_int8(model)
+    return model, tokenizer
@@ -0,0 +1,92 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class InferencePoolFull(Exception):
+    """Raised when the inference queue is at capacity and new work is turned away."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("The inference queue is full, please retry later.")
+        self.retry_after = retry_after
+
+
+def parse_model_limits(spec: str):
+    """Parses 'model_a=2,model_b=4' into {'model_a': 2, 'model_b': 4}."""
+    limits = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, _, value = part.rpartition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
+
+
+class InferencePool:
+    """
+    A dedicated, size-limited executor for model work, kept apart from the
+    threadpool that serves cheap endpoints such as /token and /history.
+
+    Each model has its own concurrency limit, enforced on the event loop so a
+    request waiting for a busy model does not tie up a worker thread. Work
+    that is waiting or running counts towards `max_queue_depth`; beyond that
+    new requests are rejected with InferencePoolFull instead of piling up.
+    """
+
+    def __init__(self, max_workers=4, max_queue_depth=32, model_concurrency=2, model_limits=None, retry_after=5):
+        self.max_workers = max(1, max_workers)
+        self.max_queue_depth = max(1, max_queue_depth)
+        self.model_concurrency = max(1, model_concurrency)
+        self.model_limits = model_limits or {}
+        self.retry_after = retry_after
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._model_semaphores = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._in_flight
+
+    def _semaphore_for(self, model_name):
+        semaphore = self._model_semaphores.get(model_name)
+        if semaphore is None:
+            limit = self.model_limits.get(model_name, self.model_concurrency)
+            semaphore = self._model_semaphores.setdefault(model_name, asyncio.Semaphore(limit))
+        return semaphore
+
+    def admit(self):
+        """
+        Reserves a place in the queue, raising InferencePoolFull if there is none.
+        Use with `run_admitted` when the rejection must happen before a response starts.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_queue_depth:
+                raise InferencePoolFull(self.retry_after)
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, model_name, fn, *args, **kwargs):
+        """Runs `fn(*args, **kwargs)` on the pool once a slot for `model_name` is free."""
+        self.admit()
+        return await self.run_admitted(model_name, fn, *args, **kwargs)
+
+    async def run_admitted(self, model_name, fn, *args, **kwargs):
+        """Like `run`, for work that already holds a place from `admit`."""
+        try:
+            async with self._semaphore_for(model_name):
+                loop = asyncio.get_running_loop()
+                # Like run_in_threadpool, run with the caller's context (e.g. its request timings)
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(self._executor, lambda: context.run(fn, *args, **kwargs))
+        finally:
+            self._release()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,126 @@
+import threading
+
+from nltk.tokenize import sent_tokenize
+from tokenizers import Tokenizer
+
+# Used when neither the tokenizer nor the model config report a usable limit
+DEFAULT_MAX_INPUT_TOKENS = 1024
+# Leaves room for the special tokens the tokenizer adds around each chunk
+SPECIAL_TOKEN_MARGIN = 8
+# Each reduce level shrinks the text several times over, so this is never reached in practice
+MAX_REDUCE_LEVELS = 8
+
+
+def get_max_input_tokens(summarizer, override=None):
+    """Returns how many input tokens the summarization model can encode at once."""
+    if override:
+        return override
+    limit = getattr(summarizer.tokenizer, "model_max_length", None)
+    # Tokenizers without a configured limit report a huge sentinel value
+    if not limit or limit > 100_000:
+        limit = getattr(summarizer.model.config, "max_position_embeddings", None) or DEFAULT_MAX_INPUT_TOKENS
+    return limit
+
+
+_counting_lock = threading.Lock()
+
+
+def counting_tokenizer(tokenizer):
+    """
+    A private copy of a fast tokenizer's backend with truncation and padding off,
+    used to count and split tokens. Calling the shared tokenizer with other
+    truncation settings than inference uses changes its state, which fails with
+    "Already borrowed" while another thread is encoding. None for slow tokenizers.
+    """
+    backend = getattr(tokenizer, "_tokenizer", None)
+    if not isinstance(backend, Tokenizer):
+        return None
+    counter = getattr(tokenizer, "_counting_tokenizer", None)
+    if counter is None:
+        with _counting_lock:
+            counter = getattr(tokenizer, "_counting_tokenizer", None)
+            if counter is None:
+                counter = Tokenizer.from_str(backend.to_str())
+                counter.no_truncation()
+                counter.no_padding()
+                tokenizer._counting_tokenizer = counter
+    return counter
+
+
+def encode_ids(tokenizer, texts):
+    """Token ids (without special tokens) of each text, untruncated."""
+    counter = counting_tokenizer(tokenizer)
+    if counter is None:
+        return tokenizer(texts, add_special_tokens=False)["input_ids"]
+    return [encoding.ids for encoding in counter.encode_batch(texts, add_special_tokens=False)]
+
+
+def count_tokens(tokenizer, texts):
+    """Counts tokens for a list of texts in a single tokenizer call."""
+    return [len(ids) for ids in encode_ids(tokenizer, texts)]
+
+
+def split_into_chunks(text, tokenizer, max_tokens):
+    """
+    Splits text into chunks of at most `max_tokens` tokens on sentence boundaries.
+    Sentences that are longer than a whole chunk are cut into token windows.
+    """
+    sentences = sent_tokenize(text)
+    if not sentences:
+        return []
+
+    chunks, current, current_len = [], [], 0
+    for sentence, length in zip(sentences, count_tokens(tokenizer, sentences)):
+        if length > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            ids = encode_ids(tokenizer, [sentence])[0]
+            for start in range(0, len(ids), max_tokens):
+                chunks.append(tokenizer.decode(ids[start:start + max_tokens], skip_special_tokens=True))
+            continue
+
+        # +1 accounts for the joining space, which some tokenizers count separately
+        if current and current_len + length + 1 > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += length + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def reduce_to_fit(text, tokenizer, summarize_chunks, max_input_tokens, token_count=None):
+    """
+    Map-reduce step for texts longer than the model's input limit.
+
+    `summarize_chunks(list_of_texts)` must return one summary per text; it is
+    called with every chunk of a level at once so the caller can batch them.
+    Partial summaries are joined and summarized again until they fit into a
+    single model input. Texts that already fit are returned unchanged.
+    Pass `token_count` if the text's tokens have been counted already.
+    """
+    budget = max_input_tokens - SPECIAL_TOKEN_MARGIN
+    if token_count is None:
+        token_count = count_tokens(tokenizer, [text])[0]
+
+    for _ in range(MAX_REDUCE_LEVELS):
+        if token_count <= budget:
+            break
+        chunks = split_into_chunks(text, tokenizer, budget)
+        partial_summaries = summarize_chunks(chunks)
+        reduced = " ".join(summary.strip() for summary in partial_summaries if summary.strip())
+        reduced_count = count_tokens(tokenizer, [reduced])[0]
+        if not reduced or reduced_count >= token_count:
+            # No progress; let the final call truncate rather than loop
+            break
+        text, token_count = reduced, reduced_count
+
+    return text
+
+
+def summarize_long_text(text, tokenizer, summarize_chunks, max_input_tokens, token_count=None):
+    """Summarizes a text of any length: reduces it to fit the model, then summarizes it once more."""
+    return summarize_chunks([reduce_to_fit(text, tokenizer, summarize_chunks, max_input_tokens, token_count)])[0]
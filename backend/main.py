@@ -1,43 +1,432 @@
+import asyncio
+import base64
+import datetime
+import json
 import os
+import secrets
+import threading
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi import FastAPI, Depends, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from typing import Annotated, List
+from typing import Annotated, List, Literal, Optional
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+from transformers import pipeline
 import nltk
-import textstat 
-from nltk.tokenize import sent_tokenize
 
 from . import crud, models, schemas
+from .auth_tokens import InvalidToken, TokenClaims, TokenSigner
+from .batch_jobs import BatchJobWorker, BatchOperation, parse_upload_texts
+from .batching import MicroBatcher
+from .complexity import analyze_text_complexity, complexity_analyzer
 from .database import SessionLocal, engine
+from .document_extraction import DocumentExtractor, UnsupportedDocument, UploadTooLarge, document_format, spool_upload
+from .history_search import ensure_search_index, search_history
+from .history_writer import HistoryWriteBuffer
+from .inference_backends import load_model, parse_model_backends
+from .inference_pool import InferencePool, InferencePoolFull, parse_model_limits
+from .long_document import count_tokens, counting_tokenizer, get_max_input_tokens, reduce_to_fit, summarize_long_text
+from .metrics import MetricsRegistry, ServerTimingMiddleware, StageMetrics, current_timings, instrument_session_commits
+from .model_registry import ModelRegistry
+from .paraphrasing import generate_paraphrase_candidates
+from .passwords import PasswordHashPool, PasswordPolicy
+from .rate_limit import (
+    MemoryBuckets, RateLimited, RateLimiter, SQLiteBuckets, parse_model_weights, parse_rate_limit_tiers,
+)
+from .readability import analyze_readability
+from .result_cache import ResultCache, make_cache_key
+from .streaming import format_sse, generate_streaming_summary, relay_events
+from .text_analysis import (
+    build_analysis, build_sentiment_timeline, classify_sentences, split_paragraph_sentences, split_sentences,
+)
 
 # Load environment variables and create DB tables
 load_dotenv()
 models.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+models.add_missing_columns(engine)
+models.create_missing_indexes(engine)
+HISTORY_SEARCH_AVAILABLE = ensure_search_index(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load (and warm up) the configured models before serving traffic
+    if PRELOAD_MODELS:
+        await run_in_threadpool(model_registry.preload, PRELOAD_MODELS, MODEL_WARMUP)
+    if BATCH_WORKER_ENABLED:
+        batch_worker.start()
+    if HISTORY_WRITE_BEHIND:
+        history_writer.recover()
+        history_writer.start()
+    await run_in_threadpool(password_hasher.start)
+    await run_in_threadpool(document_extractor.start)
+    yield
+    # Let queued batches finish before the process exits; unfinished batch jobs resume on restart
+    await run_in_threadpool(batch_worker.stop)
+    summary_batcher.shutdown()
+    inference_pool.shutdown()
+    # Writes the remaining history entries, or spools them to disk if the database is unavailable
+    await run_in_threadpool(history_writer.close)
+    password_hasher.shutdown()
+    document_extractor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+
+# --- Metrics ---
+# Served at GET /metrics in the Prometheus text format; every response also carries
+# a Server-Timing header with the stages of that request.
+metrics = MetricsRegistry()
+stage_metrics = StageMetrics(metrics)
+request_seconds = metrics.histogram("textmorph_request_seconds", "HTTP request latency", ["method", "route", "status"])
+db_commit_seconds = metrics.histogram("textmorph_db_commit_seconds", "Duration of database commits, including their flush")
+instrument_session_commits(SessionLocal, db_commit_seconds)
+metrics.counter_callback("textmorph_model_cache_hits_total", "Model lookups served by an already loaded model", lambda: model_registry.hits)
+metrics.counter_callback("textmorph_model_cache_misses_total", "Model lookups that had to load the model", lambda: model_registry.misses)
+metrics.counter_callback("textmorph_result_cache_hits_total", "Result cache hits", lambda: result_cache.stats["hits"])
+metrics.counter_callback("textmorph_result_cache_misses_total", "Result cache misses", lambda: result_cache.stats["misses"])
+metrics.gauge_callback("textmorph_inference_queue_depth", "Inference requests waiting or running", lambda: inference_pool.queue_depth)
+metrics.gauge_callback("textmorph_summary_batch_pending", "Texts waiting for a batched summary", lambda: summary_batcher.pending_count())
+metrics.gauge_callback("textmorph_history_write_pending", "History entries waiting to be written", lambda: history_writer.pending_count())
+metrics.counter_callback("textmorph_token_cache_hits_total", "Access tokens verified from the claims cache", lambda: token_signer.cache_hits)
+metrics.counter_callback("textmorph_extract_cache_hits_total", "Uploads whose text was served from the extraction cache", lambda: extraction_cache.stats["hits"])
+metrics.counter_callback("textmorph_rate_limited_total", "Requests rejected by the rate limiter", lambda: rate_limiter.rejected)
+app.add_middleware(ServerTimingMiddleware, request_seconds=request_seconds)
 
 # Securely get secrets from environment variables
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 
+# Micro-batching settings for /summarize/ (window in milliseconds)
+SUMMARY_BATCH_WINDOW_MS = float(os.getenv("SUMMARY_BATCH_WINDOW_MS", "20"))
+SUMMARY_MAX_BATCH_SIZE = int(os.getenv("SUMMARY_MAX_BATCH_SIZE", "8"))
+SUMMARY_BATCH_WORKERS = int(os.getenv("SUMMARY_BATCH_WORKERS", "1"))
+# Overrides the encoder input limit used to decide when long-document mode kicks in (0 = use the model's own limit)
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", "0"))
+
+# Inference pool settings: worker threads, per-model concurrency and how much work may wait
+INFERENCE_MAX_WORKERS = int(os.getenv("INFERENCE_MAX_WORKERS", "8"))
+INFERENCE_MODEL_CONCURRENCY = int(os.getenv("INFERENCE_MODEL_CONCURRENCY", "4"))
+INFERENCE_MODEL_LIMITS = parse_model_limits(os.getenv("INFERENCE_MODEL_LIMITS", ""))
+INFERENCE_MAX_QUEUE_DEPTH = int(os.getenv("INFERENCE_MAX_QUEUE_DEPTH", "32"))
+INFERENCE_RETRY_AFTER_SECONDS = int(os.getenv("INFERENCE_RETRY_AFTER_SECONDS", "5"))
+
+# Model registry settings. PRELOAD_MODELS is a comma-separated list of kind:model_name
+# entries, where kind is summarization, paraphrase or sentiment.
+def parse_preload_models(spec: str):
+    models_to_load = []
+    for part in spec.split(","):
+        kind, _, name = part.strip().partition(":")
+        if kind == "sentiment" and not name:
+            name = SENTIMENT_MODEL_NAME
+        if kind and name:
+            models_to_load.append((kind, name))
+    return models_to_load
+
+SENTIMENT_MODEL_NAME = os.getenv("SENTIMENT_MODEL_NAME", "cardiffnlp/twitter-roberta-base-sentiment")
+# Longest input (in tokens) the sentiment model scores at once; longer texts are scored
+# sentence by sentence, SENTIMENT_BATCH_SIZE sentences per padded batch
+SENTIMENT_MAX_INPUT_TOKENS = int(os.getenv("SENTIMENT_MAX_INPUT_TOKENS", "512"))
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+# Every call to the sentiment pipeline uses these tokenizer settings, so that concurrent
+# calls never change the state of the shared tokenizer
+SENTIMENT_TOKENIZER_KWARGS = {"truncation": True, "max_length": SENTIMENT_MAX_INPUT_TOKENS}
+PRELOAD_MODELS = parse_preload_models(os.getenv("PRELOAD_MODELS", ""))
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+
+# Inference backend (pytorch, int8 or onnx) for every model, with per-model overrides
+# given as model_name=backend pairs
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch").lower()
+MODEL_BACKENDS = parse_model_backends(os.getenv("MODEL_BACKENDS", ""))
+
+# Result cache settings; the disk tier is only used when a path is given
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "1") == "1"
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+RESULT_CACHE_DB = os.getenv("RESULT_CACHE_DB", "")
+RESULT_CACHE_DISK_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_DISK_MAX_ENTRIES", "100000"))
+# Paraphrases are sampled, so reusing them is opt-in
+RESULT_CACHE_PARAPHRASE = os.getenv("RESULT_CACHE_PARAPHRASE", "0") == "1"
+
+# Upper bound on paragraph/sentence segments paraphrased in one generate call
+PARAPHRASE_MAX_BATCH_SEGMENTS = int(os.getenv("PARAPHRASE_MAX_BATCH_SEGMENTS", "16"))
+
+# Batch job settings: the background worker, how many items it processes (and commits) at a time,
+# how often it checks for new jobs, how long its claim on a job lasts without renewal,
+# and the largest accepted job
+BATCH_WORKER_ENABLED = os.getenv("BATCH_WORKER_ENABLED", "1") == "1"
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", str(SUMMARY_MAX_BATCH_SIZE)))
+BATCH_POLL_SECONDS = float(os.getenv("BATCH_POLL_SECONDS", "2"))
+BATCH_LEASE_SECONDS = float(os.getenv("BATCH_LEASE_SECONDS", "300"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "10000"))
+
+# History listing: characters of each text included in previews, and the largest page size
+HISTORY_PREVIEW_CHARS = int(os.getenv("HISTORY_PREVIEW_CHARS", "200"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+# Write-behind history: entries from the text tools are queued and inserted in bulk
+# every HISTORY_FLUSH_INTERVAL_MS or once HISTORY_FLUSH_BATCH_SIZE are waiting; entries
+# that keep failing are set aside in HISTORY_DEAD_LETTER_PATH
+HISTORY_WRITE_BEHIND = os.getenv("HISTORY_WRITE_BEHIND", "1") == "1"
+HISTORY_FLUSH_INTERVAL_MS = float(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "200"))
+HISTORY_FLUSH_BATCH_SIZE = int(os.getenv("HISTORY_FLUSH_BATCH_SIZE", "200"))
+HISTORY_SPOOL_PATH = os.getenv("HISTORY_SPOOL_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history_spool.jsonl"))
+HISTORY_DEAD_LETTER_PATH = os.getenv(
+    "HISTORY_DEAD_LETTER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "history_dead_letter.jsonl")
+)
+HISTORY_MAX_WRITE_ATTEMPTS = int(os.getenv("HISTORY_MAX_WRITE_ATTEMPTS", "5"))
+
+# Password hashing settings. Hashes run in PASSWORD_HASH_WORKERS processes (0 hashes on
+# the request threadpool); at most PASSWORD_HASH_CONCURRENCY logins hash at once.
+PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "bcrypt").lower()
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_KIB = int(os.getenv("ARGON2_MEMORY_KIB", "65536"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "4"))
+
+# Access tokens are signed with JWT_SECRET_KEY. Without one a random key is used,
+# so tokens stop working when the server restarts and are not shared between processes.
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "")
+ACCESS_TOKEN_EXPIRE_MINUTES = float(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = float(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+# Rate limits for the model endpoints, per tier as burst capacity:refill per minute,
+# both in (estimated) input tokens. Callers without an access token are "anonymous"
+# and limited per IP address. RATE_LIMIT_DB shares the limits between processes.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_TIERS = parse_rate_limit_tiers(
+    os.getenv("RATE_LIMIT_TIERS", "anonymous=6000:3000,free=20000:10000,pro=100000:50000")
+)
+RATE_LIMIT_DEFAULT_TIER = os.getenv("RATE_LIMIT_DEFAULT_TIER", "free")
+RATE_LIMIT_MODEL_WEIGHTS = parse_model_weights(os.getenv("RATE_LIMIT_MODEL_WEIGHTS", ""))
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB", "")
+
+# Document extraction for /extract: PDF pages are extracted EXTRACT_PAGES_PER_TASK at a
+# time across EXTRACT_WORKERS processes (0 extracts on the request threadpool), and
+# results are cached by the file's content hash
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_PAGES_PER_TASK = int(os.getenv("EXTRACT_PAGES_PER_TASK", "8"))
+EXTRACT_MAX_UPLOAD_MB = float(os.getenv("EXTRACT_MAX_UPLOAD_MB", "50"))
+EXTRACT_CACHE_MAX_MB = float(os.getenv("EXTRACT_CACHE_MAX_MB", "64"))
+EXTRACT_CACHE_DB = os.getenv("EXTRACT_CACHE_DB", "")
+
+# Unified /analyze/ pipeline: the sentences of all texts in a request are classified together
+# (SENTIMENT_BATCH_SIZE at a time), and a request may carry at most ANALYZE_MAX_TEXTS texts
+ANALYZE_MAX_TEXTS = int(os.getenv("ANALYZE_MAX_TEXTS", "100"))
+
 # --- NLTK Download ---
 # Ensures all necessary resources for analysis are present
 try:
     nltk.data.find('sentiment/vader_lexicon.zip')
     nltk.data.find('tokenizers/punkt')
+    nltk.data.find('corpora/cmudict')
 except LookupError:
-    print("Downloading NLTK resources (VADER lexicon and Punkt tokenizer)...")
+    print("Downloading NLTK resources (VADER lexicon, Punkt tokenizer and CMU dictionary)...")
     nltk.download('vader_lexicon')
     nltk.download('punkt')
+    # Used by textstat for syllable counts in the complexity analysis
+    nltk.download('cmudict')
+
+
+# --- Model Registry ---
+def backend_for(model_name):
+    return MODEL_BACKENDS.get(model_name, INFERENCE_BACKEND)
+
+# Token counting uses a private copy of each tokenizer, made here before the model is shared
+def load_summarizer(model_name):
+    model, tokenizer = load_model("seq2seq", model_name, backend_for(model_name))
+    counting_tokenizer(tokenizer)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+def load_paraphrase_model(model_name):
+    model, tokenizer = load_model("seq2seq", model_name, backend_for(model_name))
+    counting_tokenizer(tokenizer)
+    return model, tokenizer
+
+def load_sentiment_classifier(model_name):
+    model, tokenizer = load_model("classification", model_name, backend_for(model_name))
+    counting_tokenizer(tokenizer)
+    # Sets the truncation state every later call expects
+    tokenizer("", **SENTIMENT_TOKENIZER_KWARGS)
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+def warmup_summarizer(summarizer):
+    summarizer("TextMorph is warming up the summarization model before serving requests.", max_length=20, min_length=5, do_sample=False)
+
+def warmup_paraphraser(loaded):
+    model, tokenizer = loaded
+    inputs = tokenizer.encode("paraphrase: TextMorph is warming up the paraphrasing model.", return_tensors="pt")
+    model.generate(inputs, max_length=20)
+
+def warmup_sentiment(classifier):
+    classifier("TextMorph is warming up the sentiment model.", **SENTIMENT_TOKENIZER_KWARGS)
+
+model_registry = ModelRegistry(
+    loaders={
+        "summarization": load_summarizer,
+        "paraphrase": load_paraphrase_model,
+        "sentiment": load_sentiment_classifier,
+    },
+    warmups={
+        "summarization": warmup_summarizer,
+        "paraphrase": warmup_paraphraser,
+        "sentiment": warmup_sentiment,
+    },
+    memory_budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+)
+
+# --- Inference Pool ---
+inference_pool = InferencePool(
+    max_workers=INFERENCE_MAX_WORKERS,
+    max_queue_depth=INFERENCE_MAX_QUEUE_DEPTH,
+    model_concurrency=INFERENCE_MODEL_CONCURRENCY,
+    model_limits=INFERENCE_MODEL_LIMITS,
+    retry_after=INFERENCE_RETRY_AFTER_SECONDS,
+)
+
+@app.exception_handler(InferencePoolFull)
+async def inference_pool_full_handler(request: Request, exc: InferencePoolFull):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+# --- Rate Limiting ---
+rate_limiter = RateLimiter(
+    tiers=RATE_LIMIT_TIERS,
+    model_weights=RATE_LIMIT_MODEL_WEIGHTS,
+    default_tier=RATE_LIMIT_DEFAULT_TIER,
+    store=SQLiteBuckets(RATE_LIMIT_DB) if RATE_LIMIT_DB else MemoryBuckets(),
+)
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def rate_limit_identity(http_request: Request):
+    """
+    Returns (bucket key, tier): the user for requests with an access token,
+    otherwise the client address. An invalid or expired token is rejected with
+    401 rather than charged to the anonymous tier, so clients know to refresh it.
+    """
+    scheme, _, token = http_request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = token_signer.verify_access(token)
+        except InvalidToken as e:
+            raise credentials_error(str(e))
+        return f"user:{claims.email}", claims.tier
+    client_host = http_request.client.host if http_request.client else "unknown"
+    return f"ip:{client_host}", "anonymous"
+
+async def check_rate_limit(http_request: Request, model_name, text, multiplier=1, full_cost=False):
+    """Charges a model request to its caller's token bucket before any work is queued; raises RateLimited."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    key, tier = rate_limit_identity(http_request)
+    if rate_limiter.blocking:
+        await run_in_threadpool(rate_limiter.check, key, tier, model_name, text, multiplier, full_cost)
+    else:
+        rate_limiter.check(key, tier, model_name, text, multiplier, full_cost)
+
+# --- Result Cache ---
+result_cache = ResultCache(
+    max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024),
+    disk_path=RESULT_CACHE_DB or None,
+    disk_max_entries=RESULT_CACHE_DISK_MAX_ENTRIES,
+)
+
+def timed_queue(fn):
+    """Wraps `fn` so the time it waits for an inference slot is recorded as the "queue" stage."""
+    queued_at = time.perf_counter()
+
+    def run(*args):
+        stage_metrics.observe("queue", time.perf_counter() - queued_at)
+        return fn(*args)
+    return run
+
+async def run_cached(cache_key, model_name, fn, request):
+    """Serves a result from the result cache, running the model on the inference pool only on a miss."""
+    if not RESULT_CACHE_ENABLED or cache_key is None:
+        return await inference_pool.run(model_name, timed_queue(fn), request)
+
+    with stage_metrics.stage("cache"):
+        result = await run_in_threadpool(result_cache.get, cache_key)
+    if result is None:
+        result = await inference_pool.run(model_name, timed_queue(fn), request)
+        await run_in_threadpool(result_cache.set, cache_key, result)
+    return result
+
+# --- Batched Summarization ---
+def run_summary_batch(key, texts):
+    """Summarizes a batch of texts that share a model and length settings in one padded generate call."""
+    model_name, max_len, min_len = key
+    summarizer = model_registry.get("summarization", model_name)
+    results = summarizer(
+        texts,
+        max_length=max_len,
+        min_length=min_len,
+        do_sample=False,
+        truncation=True,
+        batch_size=len(texts),
+    )
+    return [result['summary_text'] for result in results]
+
+def summarize_in_batches(key, texts):
+    """Submits all texts to the batcher at once so they can share generate calls."""
+    futures = [summary_batcher.submit(key, text) for text in texts]
+    return [future.result() for future in futures]
+
+summary_batcher = MicroBatcher(
+    run_summary_batch,
+    window_seconds=SUMMARY_BATCH_WINDOW_MS / 1000,
+    max_batch_size=SUMMARY_MAX_BATCH_SIZE,
+    num_workers=SUMMARY_BATCH_WORKERS,
+    name="summary-batcher",
+)
 
+def summary_lengths(length):
+    """Maps the requested summary length to (max_length, min_length) in tokens."""
+    length_map = {"short": 50, "medium": 150, "long": 300}
+    max_len = length_map.get(length, 150)
+    return max_len, int(max_len * 0.3)
+
+# --- History Writes ---
+history_writer = HistoryWriteBuffer(
+    SessionLocal,
+    batch_size=HISTORY_FLUSH_BATCH_SIZE,
+    flush_interval=HISTORY_FLUSH_INTERVAL_MS / 1000,
+    spool_path=HISTORY_SPOOL_PATH,
+    dead_letter_path=HISTORY_DEAD_LETTER_PATH,
+    max_attempts=HISTORY_MAX_WRITE_ATTEMPTS,
+)
+
+def save_history_in_new_session(history: schemas.HistoryCreate):
+    """Saves one history entry right away, with its own session."""
+    db = SessionLocal()
+    try:
+        crud.create_history_entry(db=db, history=history)
+    finally:
+        db.close()
 
-# --- Model Caching ---
-summarization_pipelines = {}
-paraphrasing_pipelines = {}
-sentiment_pipeline = None
+async def save_history(history: schemas.HistoryCreate):
+    """Queues a history entry on the write-behind buffer, or saves it right away when that is turned off."""
+    with stage_metrics.stage("history"):
+        if HISTORY_WRITE_BEHIND:
+            history_writer.add(history)
+        else:
+            await run_in_threadpool(save_history_in_new_session, history)
 
 # --- Helper Functions ---
 def send_password_reset_email(recipient_email: str, reset_link: str):
@@ -61,102 +450,109 @@ def get_db():
     finally:
         db.close()
 
-def analyze_text_complexity(text: str):
-    """
-    Analyzes text complexity by classifying each sentence based on the
-    Flesch-Kincaid Grade Level.
-    """
-    sentences = sent_tokenize(text)
-    if not sentences:
-        return {"beginner": 0, "intermediate": 0, "advanced": 0}
-
-    beginner_count, intermediate_count, advanced_count = 0, 0, 0
-
-    for sentence in sentences:
-        # Skip very short sentences that can skew results
-        if len(sentence.split()) < 5:
-            continue
-        try:
-            grade_level = textstat.flesch_kincaid_grade(sentence)
-            if grade_level < 8:
-                beginner_count += 1
-            elif 8 <= grade_level <= 12:
-                intermediate_count += 1
-            else:
-                advanced_count += 1
-        except Exception:
-            continue
+# --- Password Hashing ---
+password_hasher = PasswordHashPool(
+    PasswordPolicy(
+        scheme=PASSWORD_SCHEME,
+        bcrypt_rounds=BCRYPT_ROUNDS,
+        argon2_time_cost=ARGON2_TIME_COST,
+        argon2_memory_kib=ARGON2_MEMORY_KIB,
+        argon2_parallelism=ARGON2_PARALLELISM,
+    ),
+    max_workers=PASSWORD_HASH_WORKERS,
+    max_concurrency=PASSWORD_HASH_CONCURRENCY,
+)
 
-    total_valid = beginner_count + intermediate_count + advanced_count
-    if total_valid == 0:
-        # If all sentences were too short, classify as beginner
-        return {"beginner": 100, "intermediate": 0, "advanced": 0}
+# --- Access Tokens ---
+if not JWT_SECRET_KEY:
+    print("JWT_SECRET_KEY is not set; using a random key, so tokens are lost when the server restarts.")
+token_signer = TokenSigner(
+    secret=JWT_SECRET_KEY or secrets.token_urlsafe(32),
+    access_ttl=int(ACCESS_TOKEN_EXPIRE_MINUTES * 60),
+    refresh_ttl=int(REFRESH_TOKEN_EXPIRE_DAYS * 86400),
+    cache_size=TOKEN_CACHE_SIZE,
+)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
-    return {
-        "beginner": round((beginner_count / total_valid) * 100),
-        "intermediate": round((intermediate_count / total_valid) * 100),
-        "advanced": round((advanced_count / total_valid) * 100),
-    }
+def credentials_error(detail="Could not validate credentials"):
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-def analyze_text_complexity(text: str):
-    """Analyzes text complexity by classifying each sentence."""
-    sentences = sent_tokenize(text)
-    if not sentences:
-        return {"beginner": 0, "intermediate": 0, "advanced": 0}
-    
-    counts = {"beginner": 0, "intermediate": 0, "advanced": 0}
-    for sentence in sentences:
-        if len(sentence.split()) < 5: continue
-        try:
-            grade = textstat.flesch_kincaid_grade(sentence)
-            if grade < 8: counts["beginner"] += 1
-            elif 8 <= grade <= 12: counts["intermediate"] += 1
-            else: counts["advanced"] += 1
-        except Exception:
-            continue
-    
-    total = sum(counts.values())
-    if total == 0: return {"beginner": 100, "intermediate": 0, "advanced": 0}
-    
-    return {level: round((count / total) * 100) for level, count in counts.items()}
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenClaims:
+    """Verifies the bearer token from the signature alone; no database lookup."""
+    try:
+        return token_signer.verify_access(token)
+    except InvalidToken as e:
+        raise credentials_error(str(e))
 
-def get_db():
-    db = SessionLocal()
+async def get_optional_user(token: Optional[str] = Depends(optional_oauth2_scheme)) -> Optional[TokenClaims]:
+    """For endpoints open to everyone: the token's user, or None without a token. A bad token is still a 401."""
+    if token is None:
+        return None
     try:
-        yield db
-    finally:
-        db.close()
+        return token_signer.verify_access(token)
+    except InvalidToken as e:
+        raise credentials_error(str(e))
+
+async def authorize_email(email: str, current_user: TokenClaims = Depends(get_current_user)) -> TokenClaims:
+    """For endpoints with an {email} path parameter: only that user may use them."""
+    if current_user.email != email:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to access another user's data")
+    return current_user
 
 # --- User & Profile Endpoints ---
 @app.post("/users/", response_model=schemas.User)
-def create_user_endpoint(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def create_user_endpoint(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db=db, user=user)
+    hashed_password = await password_hasher.hash(user.password)
+    return await run_in_threadpool(crud.create_user, db=db, user=user, hashed_password=hashed_password)
 
-@app.post("/token")
-def login_for_access_token(
+@app.post("/token", response_model=schemas.Token)
+async def login_for_access_token(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
         db: Session = Depends(get_db)
     ):
-        user = crud.get_user_by_email(db, email=form_data.username)
-        if not user or not crud.verify_password(form_data.password, user.hashed_password):
+        user = await run_in_threadpool(crud.get_user_by_email, db, email=form_data.username)
+        valid, new_hash = False, None
+        if user:
+            valid, new_hash = await password_hasher.verify(form_data.password, user.hashed_password)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return {"access_token": user.username, "token_type": "bearer"}
-    
-@app.get("/profile/{email}", response_model=schemas.User)
+        # The scheme or cost changed since this password was hashed; store the upgraded hash
+        if new_hash:
+            await run_in_threadpool(crud.update_password_hash, db, user, new_hash)
+        return token_signer.issue(user.email, user.username, user.tier)
+
+@app.post("/token/refresh", response_model=schemas.Token)
+def refresh_access_token(refresh: schemas.TokenRefresh, db: Session = Depends(get_db)):
+    try:
+        claims = token_signer.verify_refresh(refresh.refresh_token)
+    except InvalidToken as e:
+        raise credentials_error(str(e))
+    # Refreshing is rare, so this is where deleted accounts are turned away
+    user = crud.get_user_by_email(db, email=claims["sub"])
+    if user is None:
+        raise credentials_error("User no longer exists")
+    return token_signer.issue(user.email, user.username, user.tier)
+
+@app.get("/profile/{email}", response_model=schemas.User, dependencies=[Depends(authorize_email)])
 def get_user_profile(email: str, db: Session = Depends(get_db)):
     db_user = crud.get_user_by_email(db, email=email)
     if db_user is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
-@app.put("/profile/{email}", response_model=schemas.User)
+@app.put("/profile/{email}", response_model=schemas.User, dependencies=[Depends(authorize_email)])
 def update_user_profile(email: str, profile: schemas.ProfileUpdate, db: Session = Depends(get_db)):
     db_user = crud.update_user_profile(db, email=email, profile_data=profile)
     if db_user is None:
@@ -176,8 +572,14 @@ def recover_password(email: str, db: Session = Depends(get_db)):
     return {"message": "Password recovery email has been sent."}
 
 @app.post("/reset-password/", response_model=schemas.User)
-def reset_password_endpoint(password_reset: schemas.PasswordReset, db: Session = Depends(get_db)):
-    user = crud.reset_password(db, token=password_reset.token, new_password=password_reset.new_password)
+async def reset_password_endpoint(password_reset: schemas.PasswordReset, db: Session = Depends(get_db)):
+    user = None
+    # Only spend a hash on requests with a valid token
+    if await run_in_threadpool(crud.get_user_by_reset_token, db, password_reset.token):
+        hashed_password = await password_hasher.hash(password_reset.new_password)
+        user = await run_in_threadpool(
+            crud.reset_password, db, token=password_reset.token, hashed_password=hashed_password
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -185,44 +587,108 @@ def reset_password_endpoint(password_reset: schemas.PasswordReset, db: Session =
         )
     return user
 
+# --- Streaming Helpers ---
+def start_streaming_job(model_name, fn, request):
+    """
+    Admits `fn(request, on_text, stop_event)` onto the inference pool and starts it
+    immediately, so a full queue is reported as 503 before any bytes are sent.
+    Returns the task, the queue its generated text arrives on, and the stop event.
+    """
+    inference_pool.admit()
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    stop_event = threading.Event()
+
+    def on_text(*payload):
+        loop.call_soon_threadsafe(events.put_nowait, payload)
+
+    task = asyncio.ensure_future(inference_pool.run_admitted(model_name, timed_queue(fn), request, on_text, stop_event))
+    return task, events, stop_event
+
+async def stream_job_events(job, token_event, on_result, cached=None):
+    """
+    Relays a streaming job as Server-Sent Events: a "token" event for each piece of
+    generated text, then a "result" event with the same payload the non-streaming
+    endpoint returns (including the complexity analysis), or an "error" event.
+    """
+    if cached is not None:
+        await on_result(cached)
+        yield format_sse("result", with_timings(cached))
+        return
+
+    task, events, stop_event = job
+    try:
+        async for payload in relay_events(task, events):
+            yield format_sse("token", token_event(*payload))
+        try:
+            result = task.result()
+        except HTTPException as e:
+            yield format_sse("error", {"detail": e.detail})
+            return
+        await on_result(result)
+        yield format_sse("result", with_timings(result))
+    finally:
+        # Stops generation early if the client went away mid-stream
+        stop_event.set()
+
+def with_timings(result):
+    """
+    Adds the request's stage timings (in ms) to a streamed result. The headers of a
+    stream are sent before generation starts, so Server-Timing cannot carry them.
+    """
+    timings = current_timings()
+    return {**result, "timings": timings.totals()} if timings else result
+
+def sse_response(event_stream):
+    return StreamingResponse(
+        event_stream,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # --- Advanced Text Tool Endpoints ---
-@app.post("/summarize/")
-def summarize_text(summary_request: schemas.SummaryRequest, db: Session = Depends(get_db)):
+# The generate_* functions do the model work and run on the inference pool;
+# the async endpoints await them and queue history on the write-behind buffer.
+def generate_summary(summary_request: schemas.SummaryRequest, on_text=None, stop_event=None):
     model_name = summary_request.model_name
     text = summary_request.text
     length = summary_request.length
-    user_email = summary_request.user_email
-
-    if model_name not in summarization_pipelines:
-        print(f"Loading summarization model: {model_name}...")
-        try:
-            summarization_pipelines[model_name] = pipeline("summarization", model=model_name)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to load model: {e}")
-    
-    summarizer = summarization_pipelines[model_name]
-    
-    length_map = {"short": 50, "medium": 150, "long": 300}
-    max_len = length_map.get(length, 150)
-    min_len = int(max_len * 0.3)
 
     try:
-        summary_result = summarizer(text, max_length=max_len, min_length=min_len, do_sample=False)
-        summary_text = summary_result[0]['summary_text']
+        with stage_metrics.stage("model_load"):
+            summarizer = model_registry.get("summarization", model_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load model: {e}")
 
-        # Save to history if user is logged in
-        if user_email:
-            history_entry = schemas.HistoryCreate(
-                user_email=user_email,
-                operation_type="Summarize",
-                original_text=text,
-                result_text=summary_text
-            )
-            crud.create_history_entry(db=db, history=history_entry)
+    max_len, min_len = summary_lengths(length)
+
+    try:
+        # Texts longer than the encoder limit are chunked and summarized map-reduce style;
+        # either way, requests for the same model and length share batched generate calls
+        key = (model_name, max_len, min_len)
+        max_input_tokens = get_max_input_tokens(summarizer, SUMMARY_MAX_INPUT_TOKENS)
+        summarize_chunks = lambda texts: summarize_in_batches(key, texts)
+        with stage_metrics.stage("tokenize"):
+            input_tokens = count_tokens(summarizer.tokenizer, [text])[0]
+        stage_metrics.count_tokens("input", input_tokens)
+        with stage_metrics.stage("generate"):
+            if on_text is None:
+                summary_text = summarize_long_text(
+                    text, summarizer.tokenizer, summarize_chunks, max_input_tokens, input_tokens
+                )
+            else:
+                # Only the final pass is streamed; the map stage of long documents is batched as usual
+                reduced_text = reduce_to_fit(text, summarizer.tokenizer, summarize_chunks, max_input_tokens, input_tokens)
+                summary_text = generate_streaming_summary(
+                    summarizer.model, summarizer.tokenizer, reduced_text,
+                    max_len, min_len, max_input_tokens, on_text, stop_event,
+                )
+        stage_metrics.count_tokens("output", count_tokens(summarizer.tokenizer, [summary_text])[0])
 
         # Perform complexity analysis
-        original_analysis = analyze_text_complexity(text)
-        summary_analysis = analyze_text_complexity(summary_text)
+        with stage_metrics.stage("complexity"):
+            original_analysis = analyze_text_complexity(text)
+            summary_analysis = analyze_text_complexity(summary_text)
         
         # Return the complete data structure
         return {
@@ -233,77 +699,79 @@ def summarize_text(summary_request: schemas.SummaryRequest, db: Session = Depend
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate summary: {e}")
 
-@app.post("/paraphrase/")
-def paraphrase_text(paraphrase_request: schemas.ParaphraseRequest, db: Session = Depends(get_db)):
+@app.post("/summarize/")
+async def summarize_text(
+        summary_request: schemas.SummaryRequest,
+        http_request: Request,
+        current_user: Optional[TokenClaims] = Depends(get_optional_user)
+    ):
+    await check_rate_limit(http_request, summary_request.model_name, summary_request.text)
+    # Summaries use greedy decoding, so identical requests always produce identical output
+    cache_key = make_cache_key("summarize", summary_request.model_name, summary_request.length, summary_request.text)
+    result = await run_cached(cache_key, summary_request.model_name, generate_summary, summary_request)
+
+    # Save to history if user is logged in
+    if current_user:
+        history_entry = schemas.HistoryCreate(
+            user_email=current_user.email,
+            operation_type="Summarize",
+            original_text=summary_request.text,
+            result_text=result["summary"]
+        )
+        await save_history(history_entry)
+
+    return result
+
+def generate_paraphrases(paraphrase_request: schemas.ParaphraseRequest, on_text=None, stop_event=None):
     """
-    Paraphrases the given text and saves the result to history if a user email is provided.
-    Also analyzes the text complexity of the original and paraphrased versions.
+    Paraphrases the given text and analyzes the text complexity of the
+    original and paraphrased versions.
     """
     model_name = paraphrase_request.model_name
     text = paraphrase_request.text
     creativity = paraphrase_request.creativity
     length = paraphrase_request.length
-    user_email = paraphrase_request.user_email
 
     print("Backend received this request:", paraphrase_request)
 
-    if model_name not in paraphrasing_pipelines:
-        print(f"Loading paraphrasing model: {model_name}...")
-        try:
-            tokenizer = AutoTokenizer.from_pretrained(model_name)
-            model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
-            paraphrasing_pipelines[model_name] = (model, tokenizer)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to load model: {e}")
-    
-    model, tokenizer = paraphrasing_pipelines[model_name]
-    
-    original_word_count = len(text.split())
-    if length == "short":
-        min_len, max_len = int(original_word_count * 0.4), int(original_word_count * 0.7)
-    elif length == "long":
-        min_len, max_len = int(original_word_count * 1.1), int(original_word_count * 1.5)
-    else:
-        min_len, max_len = int(original_word_count * 0.8), int(original_word_count * 1.2)
-    
-    if min_len < 10: min_len = 10
-    if max_len <= min_len: max_len = min_len + 20
+    try:
+        with stage_metrics.stage("model_load"):
+            model, tokenizer = model_registry.get("paraphrase", model_name)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load model: {e}")
 
     temperature = 0.5 + creativity
     top_p = 0.85 + (creativity / 10)
 
     try:
-        inputs = tokenizer.encode("paraphrase: " + text, return_tensors="pt", max_length=512, truncation=True)
-        summary_ids = model.generate(
-          inputs,
-          min_length=min_len,
-          max_length=max_len,
-          num_return_sequences=3,
-          do_sample=True,
-          temperature=temperature,
-          top_p=top_p
-        )
-        paraphrased_texts = [tokenizer.decode(g, skip_special_tokens=True, clean_up_tokenization_spaces=True) for g in summary_ids]
-
-        if user_email:
-            print(f"Attempting to save history for user: {user_email}")
-            combined_results = "\n\n---\n\n".join(paraphrased_texts)
-            history_entry = schemas.HistoryCreate(
-                user_email=user_email,
-                operation_type="Paraphrase",
-                original_text=text,
-                result_text=combined_results
+        # Each paragraph (or sentence group of a long paragraph) is paraphrased in one
+        # batched generate call, so long inputs are covered completely
+        with stage_metrics.stage("tokenize"):
+            stage_metrics.count_tokens("input", count_tokens(tokenizer, [text])[0])
+        with stage_metrics.stage("generate"):
+            paraphrased_texts = generate_paraphrase_candidates(
+                model,
+                tokenizer,
+                text,
+                length,
+                temperature,
+                top_p,
+                num_candidates=3,
+                max_batch_segments=PARAPHRASE_MAX_BATCH_SEGMENTS,
+                on_text=on_text,
+                stop_event=stop_event,
             )
-            crud.create_history_entry(db=db, history=history_entry)
+        stage_metrics.count_tokens("output", sum(count_tokens(tokenizer, paraphrased_texts)))
 
-        original_analysis = analyze_text_complexity(text)
-        paraphrased_results = []
-        for p_text in paraphrased_texts:
-            complexity_analysis = analyze_text_complexity(p_text)
-            paraphrased_results.append({
-                "text": p_text,
-                "complexity": complexity_analysis
-            })
+        with stage_metrics.stage("complexity"):
+            original_analysis = analyze_text_complexity(text)
+            paraphrased_results = []
+            for p_text in paraphrased_texts:
+                complexity_analysis = analyze_text_complexity(p_text)
+                paraphrased_results.append({
+                    "text": p_text,
+                    "complexity": complexity_analysis
+                })
 
         return {
             "original_text_analysis": original_analysis,
@@ -314,34 +782,659 @@ def paraphrase_text(paraphrase_request: schemas.ParaphraseRequest, db: Session =
         print(f"An error occurred during paraphrase generation: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate paraphrase: {e}")
 
-@app.post("/sentiment/")
-def analyze_sentiment(sentiment_request: schemas.SentimentRequest):
-    global sentiment_pipeline
+@app.post("/paraphrase/")
+async def paraphrase_text(
+        paraphrase_request: schemas.ParaphraseRequest,
+        http_request: Request,
+        current_user: Optional[TokenClaims] = Depends(get_optional_user)
+    ):
+    """
+    Paraphrases the given text and saves the result to the history of the logged-in user.
+    """
+    # Three candidates are generated, so a paraphrase costs three times its input
+    await check_rate_limit(http_request, paraphrase_request.model_name, paraphrase_request.text, multiplier=3)
+    cache_key = None
+    if RESULT_CACHE_PARAPHRASE:
+        cache_key = make_cache_key(
+            "paraphrase",
+            paraphrase_request.model_name,
+            paraphrase_request.length,
+            paraphrase_request.text,
+            creativity=paraphrase_request.creativity,
+        )
+    result = await run_cached(cache_key, paraphrase_request.model_name, generate_paraphrases, paraphrase_request)
+
+    if current_user:
+        print(f"Attempting to save history for user: {current_user.email}")
+        combined_results = "\n\n---\n\n".join(res["text"] for res in result["paraphrased_results"])
+        history_entry = schemas.HistoryCreate(
+            user_email=current_user.email,
+            operation_type="Paraphrase",
+            original_text=paraphrase_request.text,
+            result_text=combined_results
+        )
+        await save_history(history_entry)
+
+    return result
+
+@app.post("/summarize/stream")
+async def summarize_text_stream(
+        summary_request: schemas.SummaryRequest,
+        http_request: Request,
+        current_user: Optional[TokenClaims] = Depends(get_optional_user)
+    ):
+    """Streams the summary as it is generated, followed by the full result with complexity analysis."""
+    await check_rate_limit(http_request, summary_request.model_name, summary_request.text)
+    # Streamed summaries are decoded with a single beam, so they are cached under their own
+    # key; a cached /summarize/ result for the same text is served in their place
+    cache_key = make_cache_key("summarize", summary_request.model_name, summary_request.length, summary_request.text)
+    stream_cache_key = make_cache_key("summarize-greedy", summary_request.model_name, summary_request.length, summary_request.text)
+    cached = None
+    if RESULT_CACHE_ENABLED:
+        with stage_metrics.stage("cache"):
+            cached = await run_in_threadpool(result_cache.get, cache_key)
+            if cached is None:
+                cached = await run_in_threadpool(result_cache.get, stream_cache_key)
+    job = None if cached is not None else start_streaming_job(summary_request.model_name, generate_summary, summary_request)
+
+    async def on_result(result):
+        if cached is None and RESULT_CACHE_ENABLED:
+            await run_in_threadpool(result_cache.set, stream_cache_key, result)
+        if current_user:
+            history_entry = schemas.HistoryCreate(
+                user_email=current_user.email,
+                operation_type="Summarize",
+                original_text=summary_request.text,
+                result_text=result["summary"]
+            )
+            await save_history(history_entry)
+
+    return sse_response(stream_job_events(job, lambda text: {"text": text}, on_result, cached))
+
+@app.post("/paraphrase/stream")
+async def paraphrase_text_stream(
+        paraphrase_request: schemas.ParaphraseRequest,
+        http_request: Request,
+        current_user: Optional[TokenClaims] = Depends(get_optional_user)
+    ):
+    """
+    Streams all three paraphrase candidates as they are generated. Token events carry
+    the candidate and segment they belong to; the final result event has the full texts.
+    """
+    await check_rate_limit(http_request, paraphrase_request.model_name, paraphrase_request.text, multiplier=3)
+    cache_key = None
+    if RESULT_CACHE_PARAPHRASE:
+        cache_key = make_cache_key(
+            "paraphrase",
+            paraphrase_request.model_name,
+            paraphrase_request.length,
+            paraphrase_request.text,
+            creativity=paraphrase_request.creativity,
+        )
+    cached = await run_in_threadpool(result_cache.get, cache_key) if RESULT_CACHE_ENABLED and cache_key else None
+    job = None if cached is not None else start_streaming_job(paraphrase_request.model_name, generate_paraphrases, paraphrase_request)
+
+    async def on_result(result):
+        if cache_key and cached is None and RESULT_CACHE_ENABLED:
+            await run_in_threadpool(result_cache.set, cache_key, result)
+        if current_user:
+            combined_results = "\n\n---\n\n".join(res["text"] for res in result["paraphrased_results"])
+            history_entry = schemas.HistoryCreate(
+                user_email=current_user.email,
+                operation_type="Paraphrase",
+                original_text=paraphrase_request.text,
+                result_text=combined_results
+            )
+            await save_history(history_entry)
+
+    def token_event(candidate, segment, text):
+        return {"candidate": candidate, "segment": segment, "text": text}
+
+    return sse_response(stream_job_events(job, token_event, on_result, cached))
+
+def generate_sentiment(sentiment_request: schemas.SentimentRequest):
     text = sentiment_request.text
     
-    if sentiment_pipeline is None:
-        print("Loading sentiment analysis model...")
-        try:
-            sentiment_pipeline = pipeline("sentiment-analysis", model="cardiffnlp/twitter-roberta-base-sentiment")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to load sentiment model: {e}")
+    try:
+        with stage_metrics.stage("model_load"):
+            sentiment_pipeline = model_registry.get("sentiment", SENTIMENT_MODEL_NAME)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load sentiment model: {e}")
     
     try:
-        results = sentiment_pipeline(text)
-        return results[0]
+        with stage_metrics.stage("tokenize"):
+            input_tokens = count_tokens(sentiment_pipeline.tokenizer, [text])[0]
+            stage_metrics.count_tokens("input", input_tokens)
+        mode = sentiment_request.mode
+        if mode == "auto":
+            special_tokens = sentiment_pipeline.tokenizer.num_special_tokens_to_add()
+            mode = "sentences" if input_tokens + special_tokens > SENTIMENT_MAX_INPUT_TOKENS else "text"
+
+        if mode == "text":
+            with stage_metrics.stage("generate"):
+                results = sentiment_pipeline(text, **SENTIMENT_TOKENIZER_KWARGS)
+            return {**results[0], "mode": "text"}
+
+        # Long texts: every sentence is scored, in length-sorted padded batches, and the
+        # predictions are combined per paragraph and for the whole text
+        with stage_metrics.stage("tokenize"):
+            paragraphs, sentence_lists = split_paragraph_sentences(text)
+        sentences = [sentence for paragraph_sentences in sentence_lists for sentence in paragraph_sentences]
+        with stage_metrics.stage("generate"):
+            predictions = classify_sentences(sentiment_pipeline, sentences, SENTIMENT_BATCH_SIZE, SENTIMENT_MAX_INPUT_TOKENS)
+        return build_sentiment_timeline(paragraphs, sentence_lists, predictions, sentiment_request.include_sentences)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze sentiment: {e}")
 
+@app.post("/sentiment/")
+async def analyze_sentiment(sentiment_request: schemas.SentimentRequest, http_request: Request):
+    await check_rate_limit(http_request, SENTIMENT_MODEL_NAME, sentiment_request.text)
+    detail = sentiment_request.mode if sentiment_request.include_sentences else f"{sentiment_request.mode}-summary"
+    # The timeline is split on blank lines, so only single-pass results ignore the layout of the text
+    cache_key = make_cache_key(
+        "sentiment", SENTIMENT_MODEL_NAME, detail, sentiment_request.text, normalize=sentiment_request.mode == "text",
+    )
+    return await run_cached(cache_key, SENTIMENT_MODEL_NAME, generate_sentiment, sentiment_request)
+
+def generate_text_analysis(analyze_request: schemas.AnalyzeRequest):
+    """
+    Sentence-tokenizes each text once and derives everything from those sentences:
+    sentiment of all the sentences of all the texts in padded batches, VADER
+    scores, the complexity distribution and word counts.
+    """
+    texts = analyze_request.texts
+
+    try:
+        with stage_metrics.stage("model_load"):
+            sentiment_pipeline = model_registry.get("sentiment", SENTIMENT_MODEL_NAME)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load sentiment model: {e}")
+
+    try:
+        with stage_metrics.stage("tokenize"):
+            sentence_lists = split_sentences(texts)
+        sentences = [sentence for text_sentences in sentence_lists for sentence in text_sentences]
+        with stage_metrics.stage("generate"):
+            predictions = classify_sentences(sentiment_pipeline, sentences, SENTIMENT_BATCH_SIZE, SENTIMENT_MAX_INPUT_TOKENS)
+
+        results, offset = [], 0
+        with stage_metrics.stage("complexity"):
+            for text, text_sentences in zip(texts, sentence_lists):
+                text_predictions = predictions[offset:offset + len(text_sentences)]
+                offset += len(text_sentences)
+                results.append(build_analysis(text, text_sentences, text_predictions, analyze_request.include_sentences))
+        return results
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to analyze text: {e}")
+
+@app.post("/analyze/")
+async def analyze_texts(analyze_request: schemas.AnalyzeRequest, http_request: Request):
+    """
+    Sentiment (VADER and the sentiment model), complexity and word counts for one
+    text or many, in one call. Results are cached per text, and only the texts
+    that are not cached go through the model, together.
+    """
+    texts = analyze_request.texts if analyze_request.texts is not None else [analyze_request.text or ""]
+    if len(texts) > ANALYZE_MAX_TEXTS:
+        raise HTTPException(status_code=400, detail=f"A request may contain at most {ANALYZE_MAX_TEXTS} texts")
+    await check_rate_limit(http_request, SENTIMENT_MODEL_NAME, "\n".join(texts))
+
+    detail = "sentences" if analyze_request.include_sentences else None
+    # Character counts depend on the exact text, so it is not normalized for the key
+    cache_keys = [make_cache_key("analyze", SENTIMENT_MODEL_NAME, detail, text, normalize=False) for text in texts]
+    results = [None] * len(texts)
+    if RESULT_CACHE_ENABLED:
+        with stage_metrics.stage("cache"):
+            results = await run_in_threadpool(lambda: [result_cache.get(key) for key in cache_keys])
+
+    # Duplicate texts in one request are analyzed once
+    missing = {}
+    for index, result in enumerate(results):
+        if result is None:
+            missing.setdefault(cache_keys[index], []).append(index)
+    if missing:
+        pending = schemas.AnalyzeRequest(
+            texts=[texts[indexes[0]] for indexes in missing.values()],
+            include_sentences=analyze_request.include_sentences,
+        )
+        analyzed = await inference_pool.run(SENTIMENT_MODEL_NAME, timed_queue(generate_text_analysis), pending)
+        for (key, indexes), result in zip(missing.items(), analyzed):
+            for index in indexes:
+                results[index] = result
+        if RESULT_CACHE_ENABLED:
+            await run_in_threadpool(lambda: [result_cache.set(key, results[indexes[0]]) for key, indexes in missing.items()])
+
+    if analyze_request.texts is None:
+        return results[0]
+    return {"results": results}
+
+@app.post("/readability/")
+def analyze_text_readability(readability_request: schemas.ReadabilityRequest):
+    """
+    Flesch-Kincaid grade, Gunning Fog, SMOG and Flesch reading ease for the whole
+    document, each page and each paragraph, computed in one pass over the text.
+    """
+    pages = readability_request.pages
+    if pages is None:
+        pages = (readability_request.text or "").split("\f")
+    return analyze_readability(pages, include_paragraphs=readability_request.include_paragraphs)
+
+@app.post("/complexity/")
+def analyze_complexity(complexity_request: schemas.ComplexityRequest):
+    """Returns the level distribution plus per-sentence Flesch-Kincaid grades for a text."""
+    return complexity_analyzer.analyze(complexity_request.text)
+
+# --- Document Extraction ---
+document_extractor = DocumentExtractor(max_workers=EXTRACT_WORKERS, pages_per_task=EXTRACT_PAGES_PER_TASK)
+extraction_cache = ResultCache(max_bytes=int(EXTRACT_CACHE_MAX_MB * 1024 * 1024), disk_path=EXTRACT_CACHE_DB or None)
+
+async def open_upload(file: UploadFile):
+    """
+    Spools an upload to a temporary file. Returns its format, the file's path and
+    its cache key, plus the cached pages if this file has been extracted before
+    (in which case the temporary file is already gone).
+    """
+    try:
+        kind = document_format(file.filename)
+        with stage_metrics.stage("upload"):
+            path, digest = await spool_upload(file, int(EXTRACT_MAX_UPLOAD_MB * 1024 * 1024))
+    except UnsupportedDocument as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e))
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+
+    cache_key = f"extract:{kind}:{digest}"
+    with stage_metrics.stage("cache"):
+        cached = await run_in_threadpool(extraction_cache.get, cache_key)
+    if cached is not None:
+        os.unlink(path)
+    return kind, path, cache_key, digest, cached
+
+async def extract_pages(kind, path, cache_key, cached=None):
+    """
+    Yields the pages of a spooled upload as they are extracted, caches them, and
+    deletes the file; or yields the `cached` pages.
+    """
+    if cached is not None:
+        for page in cached:
+            yield page
+        return
+
+    pages = []
+    try:
+        async for page in document_extractor.iter_pages(path, kind):
+            pages.append(page)
+            yield page
+    finally:
+        os.unlink(path)
+    await run_in_threadpool(extraction_cache.set, cache_key, pages)
+
+def extraction_error(file: UploadFile, kind):
+    # The exception would mention the temporary file's path, so it is only logged
+    return HTTPException(status_code=400, detail=f"Could not read {file.filename}; is it a valid {kind} file?")
+
+@app.post("/extract")
+async def extract_document(file: UploadFile = File(...)):
+    """
+    Extracts the text of a .pdf, .docx, .pptx or .txt upload: one entry in "pages"
+    per PDF page, DOCX section or PPTX slide, and all of them joined in "text".
+    """
+    kind, path, cache_key, digest, pages = await open_upload(file)
+    cached = pages is not None
+    if not cached:
+        try:
+            with stage_metrics.stage("extract"):
+                pages = [page async for page in extract_pages(kind, path, cache_key)]
+        except Exception as e:
+            print(f"Extracting {file.filename} failed: {e}")
+            raise extraction_error(file, kind)
+    return {
+        "filename": file.filename,
+        "format": kind,
+        "content_hash": digest,
+        "cached": cached,
+        "pages": pages,
+        "text": "\n\n".join(pages),
+    }
+
+@app.post("/extract/stream")
+async def extract_document_stream(file: UploadFile = File(...)):
+    """
+    Streams the text of an upload as Server-Sent Events: a "page" event for each
+    page as soon as it is extracted, then a "result" event with the file's format,
+    content hash and page count, or an "error" event.
+    """
+    # The upload is spooled before the response starts, since it is closed once the handler returns
+    kind, path, cache_key, digest, cached = await open_upload(file)
+
+    async def event_stream():
+        count = 0
+        try:
+            async for page in extract_pages(kind, path, cache_key, cached):
+                yield format_sse("page", {"index": count, "text": page})
+                count += 1
+        except Exception as e:
+            print(f"Extracting {file.filename} failed: {e}")
+            yield format_sse("error", {"detail": extraction_error(file, kind).detail})
+            return
+        yield format_sse("result", {
+            "filename": file.filename,
+            "format": kind,
+            "content_hash": digest,
+            "cached": cached is not None,
+            "page_count": count,
+        })
+
+    return sse_response(event_stream())
+
+# --- Batch Jobs ---
+# Jobs are stored in the database and processed by a background worker, a chunk at a time.
+def run_batch_summaries(job, texts):
+    """
+    Summarizes one chunk of a batch job. Long documents are reduced first, then every
+    final pass is submitted to the summary batcher at once so they share generate calls.
+    Returns a result (or the exception) per text.
+    """
+    summarizer = model_registry.get("summarization", job.model_name)
+    max_len, min_len = summary_lengths(job.length)
+    key = (job.model_name, max_len, min_len)
+    max_input_tokens = get_max_input_tokens(summarizer, SUMMARY_MAX_INPUT_TOKENS)
+    summarize_chunks = lambda chunk_texts: summarize_in_batches(key, chunk_texts)
+
+    results = [None] * len(texts)
+    cache_keys, futures = {}, {}
+    for index, text in enumerate(texts):
+        cache_keys[index] = make_cache_key("summarize", job.model_name, job.length, text)
+        cached = result_cache.get(cache_keys[index]) if RESULT_CACHE_ENABLED else None
+        if cached is not None:
+            results[index] = cached
+            continue
+        try:
+            reduced_text = reduce_to_fit(text, summarizer.tokenizer, summarize_chunks, max_input_tokens)
+            futures[index] = summary_batcher.submit(key, reduced_text)
+        except Exception as e:
+            results[index] = e
+
+    for index, future in futures.items():
+        try:
+            summary_text = future.result()
+        except Exception as e:
+            results[index] = e
+            continue
+        results[index] = {
+            "summary": summary_text,
+            "original_text_analysis": analyze_text_complexity(texts[index]),
+            "summary_text_analysis": analyze_text_complexity(summary_text),
+        }
+        if RESULT_CACHE_ENABLED:
+            result_cache.set(cache_keys[index], results[index])
+    return results
+
+def run_batch_paraphrases(job, texts):
+    """Paraphrases one chunk of a batch job; each text's segments share one generate call."""
+    results = []
+    for text in texts:
+        paraphrase_request = schemas.ParaphraseRequest(
+            text=text, model_name=job.model_name, creativity=job.creativity, length=job.length
+        )
+        try:
+            results.append(generate_paraphrases(paraphrase_request))
+        except HTTPException as e:
+            results.append(Exception(e.detail))
+    return results
+
+batch_worker = BatchJobWorker(
+    SessionLocal,
+    operations={
+        "summarize": BatchOperation(run_batch_summaries, "Summarize", lambda result: result["summary"]),
+        "paraphrase": BatchOperation(
+            run_batch_paraphrases,
+            "Paraphrase",
+            lambda result: "\n\n---\n\n".join(res["text"] for res in result["paraphrased_results"]),
+        ),
+    },
+    chunk_size=BATCH_CHUNK_SIZE,
+    poll_seconds=BATCH_POLL_SECONDS,
+    lease_seconds=BATCH_LEASE_SECONDS,
+)
+
+def batch_job_status(job: models.BatchJob):
+    processed = job.completed_items + job.failed_items
+    return schemas.BatchJob(
+        id=job.id,
+        operation=job.operation,
+        model_name=job.model_name,
+        status=job.status,
+        total_items=job.total_items,
+        completed_items=job.completed_items,
+        failed_items=job.failed_items,
+        progress=round(processed / job.total_items, 4) if job.total_items else 1.0,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+def enqueue_batch_job(db: Session, operation: str, texts, model_name, length, user_email: str, creativity=None):
+    if not texts:
+        raise HTTPException(status_code=400, detail="The batch contains no texts")
+    if len(texts) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} texts")
+    job = crud.create_batch_job(
+        db, operation, texts, model_name=model_name, length=length, creativity=creativity, user_email=user_email
+    )
+    batch_worker.notify()
+    return batch_job_status(job)
+
+def get_owned_batch_job(db: Session, job_id: int, current_user: TokenClaims):
+    """The job, if it belongs to the current user; other users' jobs are reported as missing."""
+    job = crud.get_batch_job(db, job_id)
+    if job is None or job.user_email != current_user.email:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job
+
+async def read_upload_texts(file: UploadFile):
+    data = await file.read()
+    try:
+        return parse_upload_texts(file.filename, data)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read {file.filename}: {e}")
+
+async def check_batch_rate_limit(http_request: Request, model_name, texts, multiplier=1):
+    """Charges a batch job its whole estimated cost up front, like that many single requests."""
+    await check_rate_limit(http_request, model_name, "\n".join(texts), multiplier, full_cost=True)
+
+@app.post("/batch/summarize", response_model=schemas.BatchJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_summary_batch(
+        batch_request: schemas.BatchSummaryRequest,
+        http_request: Request,
+        db: Session = Depends(get_db),
+        current_user: TokenClaims = Depends(get_current_user)
+    ):
+    """Queues a list of texts for summarization; poll /batch/{job_id} for progress."""
+    await check_batch_rate_limit(http_request, batch_request.model_name, batch_request.texts)
+    return await run_in_threadpool(
+        enqueue_batch_job, db, "summarize", batch_request.texts, batch_request.model_name, batch_request.length,
+        current_user.email,
+    )
+
+@app.post("/batch/summarize/upload", response_model=schemas.BatchJob, status_code=status.HTTP_202_ACCEPTED)
+async def upload_summary_batch(
+        http_request: Request,
+        file: UploadFile = File(...),
+        model_name: str = Form(...),
+        length: str = Form("medium"),
+        db: Session = Depends(get_db),
+        current_user: TokenClaims = Depends(get_current_user)
+    ):
+    """Queues the texts of a JSONL file or a ZIP of .txt/.jsonl files for summarization."""
+    texts = await read_upload_texts(file)
+    await check_batch_rate_limit(http_request, model_name, texts)
+    return await run_in_threadpool(
+        enqueue_batch_job, db, "summarize", texts, model_name, length, current_user.email
+    )
+
+@app.post("/batch/paraphrase", response_model=schemas.BatchJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_paraphrase_batch(
+        batch_request: schemas.BatchParaphraseRequest,
+        http_request: Request,
+        db: Session = Depends(get_db),
+        current_user: TokenClaims = Depends(get_current_user)
+    ):
+    """Queues a list of texts for paraphrasing; poll /batch/{job_id} for progress."""
+    await check_batch_rate_limit(http_request, batch_request.model_name, batch_request.texts, multiplier=3)
+    return await run_in_threadpool(
+        enqueue_batch_job, db, "paraphrase", batch_request.texts, batch_request.model_name, batch_request.length,
+        current_user.email, creativity=batch_request.creativity,
+    )
+
+@app.post("/batch/paraphrase/upload", response_model=schemas.BatchJob, status_code=status.HTTP_202_ACCEPTED)
+async def upload_paraphrase_batch(
+        http_request: Request,
+        file: UploadFile = File(...),
+        model_name: str = Form(...),
+        creativity: float = Form(0.5),
+        length: str = Form("medium"),
+        db: Session = Depends(get_db),
+        current_user: TokenClaims = Depends(get_current_user)
+    ):
+    """Queues the texts of a JSONL file or a ZIP of .txt/.jsonl files for paraphrasing."""
+    texts = await read_upload_texts(file)
+    await check_batch_rate_limit(http_request, model_name, texts, multiplier=3)
+    return await run_in_threadpool(
+        enqueue_batch_job, db, "paraphrase", texts, model_name, length, current_user.email, creativity=creativity
+    )
+
+@app.get("/batch/{job_id}", response_model=schemas.BatchJob)
+def read_batch_job(job_id: int, db: Session = Depends(get_db), current_user: TokenClaims = Depends(get_current_user)):
+    return batch_job_status(get_owned_batch_job(db, job_id, current_user))
+
+@app.get("/batch/{job_id}/results", response_model=schemas.BatchResultsPage)
+def read_batch_results(
+        job_id: int,
+        cursor: int = -1,
+        limit: int = 50,
+        db: Session = Depends(get_db),
+        current_user: TokenClaims = Depends(get_current_user)
+    ):
+    """
+    Pages through a job's results in input order. Pass the returned `next_cursor`
+    to get the next page; it is null once the last item has been returned.
+    """
+    job = get_owned_batch_job(db, job_id, current_user)
+    limit = max(1, min(limit, 500))
+    items = crud.get_batch_items(db, job_id, after_position=cursor, limit=limit)
+    next_cursor = items[-1].position if len(items) == limit and items[-1].position < job.total_items - 1 else None
+    return schemas.BatchResultsPage(
+        job_id=job_id,
+        items=[
+            schemas.BatchItemResult(
+                position=item.position,
+                status=item.status,
+                result=json.loads(item.result) if item.result else None,
+                error=item.error,
+            )
+            for item in items
+        ],
+        next_cursor=next_cursor,
+    )
+
 # --- History Endpoints ---
 @app.post("/history/", response_model=schemas.History)
-def save_history_entry(history: schemas.HistoryCreate, db: Session = Depends(get_db)):
+def save_history_entry(
+        history: schemas.HistoryCreate,
+        current_user: TokenClaims = Depends(get_current_user),
+        db: Session = Depends(get_db)
+    ):
+    if history.user_email != current_user.email:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to access another user's data")
     db_history = crud.create_history_entry(db=db, history=history)
     if db_history is None:
         raise HTTPException(status_code=404, detail="User not found")
     return db_history
 
-@app.get("/history/{email}", response_model=List[schemas.History])
-def read_user_history(email: str, db: Session = Depends(get_db)):
-    history = crud.get_user_history(db, email=email)
-    return history
+def as_utc(value):
+    """Timestamps are stored in UTC, so timezone-aware filter values are converted first."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc)
+    return value
+
+def encode_history_cursor(entry):
+    raw = f"{entry.timestamp.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_history_cursor(cursor: str):
+    try:
+        timestamp, _, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().rpartition("|")
+        return datetime.datetime.fromisoformat(timestamp), int(entry_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+
+@app.get("/history/{email}", response_model=schemas.HistoryPage, dependencies=[Depends(authorize_email)])
+def read_user_history(
+        email: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        operation_type: Optional[str] = None,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+        view: Literal["preview", "full"] = "preview",
+        db: Session = Depends(get_db)
+    ):
+    """
+    Returns one page of a user's history, newest first. By default entries carry
+    only short previews of their texts; fetch /history/{email}/{entry_id} for the
+    full text, or pass view=full. Pass the returned `next_cursor` to get the next page.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    entries = crud.get_user_history(
+        db,
+        email=email,
+        limit=limit + 1,
+        before=decode_history_cursor(cursor) if cursor else None,
+        operation_type=operation_type,
+        since=as_utc(since),
+        until=as_utc(until),
+        preview_chars=HISTORY_PREVIEW_CHARS if view == "preview" else None,
+    )
+    # One extra entry is fetched to tell whether another page follows
+    next_cursor = encode_history_cursor(entries[limit - 1]) if len(entries) > limit else None
+    entry_schema = schemas.HistoryPreview if view == "preview" else schemas.History
+    return schemas.HistoryPage(
+        items=[entry_schema.model_validate(entry) for entry in entries[:limit]],
+        next_cursor=next_cursor,
+    )
+
+@app.get("/history/{email}/search", response_model=List[schemas.HistorySearchResult], dependencies=[Depends(authorize_email)])
+def search_user_history(email: str, q: str, limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
+    """
+    Full-text search over a user's history, best match first. Every word must
+    appear in the original or result text; end a word with * to match prefixes.
+    """
+    if not HISTORY_SEARCH_AVAILABLE:
+        raise HTTPException(status_code=501, detail="History search needs an SQLite database with FTS5")
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    return search_history(db, email=email, query=q, limit=limit, offset=max(0, offset), prefix_chars=HISTORY_PREVIEW_CHARS)
+
+@app.get("/history/{email}/{entry_id}", response_model=schemas.History, dependencies=[Depends(authorize_email)])
+def read_history_entry(email: str, entry_id: int, db: Session = Depends(get_db)):
+    entry = crud.get_history_entry(db, email=email, entry_id=entry_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="History entry not found")
+    return entry
+
+# --- Cache Endpoints ---
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Request, stage, token, cache, queue and database metrics in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def read_cache_stats():
+    """Reports hit/miss counters and current size of the result cache."""
+    return {"enabled": RESULT_CACHE_ENABLED, **result_cache.get_stats()}
 
+# --- Model Endpoints ---
+@app.get("/models")
+def read_loaded_models():
+    """Lists the models currently in memory with their size, load time and usage."""
+    return model_registry.report()
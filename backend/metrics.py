@@ -0,0 +1,272 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+# Seconds; covers everything from a cache hit to a long paraphrase
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_current_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                yield self.name + "_bucket", _format_labels(self.labelnames, key, [("le", _format_value(bound))]), cumulative
+            yield self.name + "_bucket", _format_labels(self.labelnames, key, [("le", "+Inf")]), values[-1]
+            yield self.name + "_sum", _format_labels(self.labelnames, key), values[-2]
+            yield self.name + "_count", _format_labels(self.labelnames, key), values[-1]
+
+
+class CallbackMetric:
+    """A gauge or counter whose value is read from `fn` when metrics are collected."""
+
+    def __init__(self, name, documentation, fn, type_name="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.type_name = type_name
+
+    def samples(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return
+        if value is not None:
+            yield self.name, "", value
+
+
+class MetricsRegistry:
+    """A minimal set of metrics rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name, documentation, fn):
+        return self.register(CallbackMetric(name, documentation, fn, "gauge"))
+
+    def counter_callback(self, name, documentation, fn):
+        return self.register(CallbackMetric(name, documentation, fn, "counter"))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# --- Per-request stage timings ---
+class RequestTimings:
+    """The stages of one request and how long each took, reported in its Server-Timing header."""
+
+    def __init__(self, scope):
+        self._scope = scope
+        self.stages = []  # (stage, seconds), in the order they finished
+        # Stages finish on the event loop and on pool threads alike
+        self._lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route in the scope, so this is the path
+        # template (/history/{email}) rather than the path itself
+        route = self._scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages.append((stage, seconds))
+
+    def totals(self):
+        """Milliseconds per stage; a stage that ran more than once is summed."""
+        with self._lock:
+            stages = list(self.stages)
+        totals = {}
+        for stage, seconds in stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds * 1000
+        return {stage: round(ms, 1) for stage, ms in totals.items()}
+
+    def server_timing(self, total_seconds=None) -> str:
+        parts = [f"{stage};dur={ms}" for stage, ms in self.totals().items()]
+        if total_seconds is not None:
+            parts.append(f"total;dur={round(total_seconds * 1000, 1)}")
+        return ", ".join(parts)
+
+
+def current_timings():
+    return _current_timings.get()
+
+
+class StageMetrics:
+    """
+    Records how long each stage of a request takes, both in a histogram labelled
+    with the route and stage and in the request's own timings. Work running on
+    other threads is attributed to the request as long as the context is copied
+    (run_in_threadpool and the inference pool do this).
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.stage_seconds = registry.histogram(
+            "textmorph_stage_seconds", "Time spent in each stage of a request", ["route", "stage"]
+        )
+        self.tokens = registry.counter(
+            "textmorph_tokens_total", "Model input and output tokens", ["route", "direction"]
+        )
+
+    def observe(self, stage, seconds):
+        timings = current_timings()
+        self.stage_seconds.observe(seconds, route=timings.route if timings else "background", stage=stage)
+        if timings is not None:
+            timings.add(stage, seconds)
+
+    @contextmanager
+    def stage(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def count_tokens(self, direction, count):
+        timings = current_timings()
+        self.tokens.inc(count, route=timings.route if timings else "background", direction=direction)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that gives each HTTP request a RequestTimings, adds a
+    Server-Timing header with its stages and total time, and records the request
+    latency. Streaming responses send their headers first, so their header only
+    has the stages that finished before streaming began.
+    """
+
+    def __init__(self, app, request_seconds: Histogram):
+        self.app = app
+        self.request_seconds = request_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope)
+        token = _current_timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header = timings.server_timing(time.perf_counter() - started)
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_timings.reset(token)
+            self.request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=timings.route,
+                status=status_code,
+            )
+
+
+def instrument_session_commits(session_factory, histogram: Histogram):
+    """Records the duration of every commit (including its flush) made through `session_factory`'s sessions."""
+    @event.listens_for(session_factory, "before_commit")
+    def before_commit(session):
+        session.info["commit_started"] = time.perf_counter()
+
+    @event.listens_for(session_factory, "after_commit")
+    def after_commit(session):
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            histogram.observe(time.perf_counter() - started)
+
+    @event.listens_for(session_factory, "after_rollback")
+    def after_rollback(session):
+        session.info.pop("commit_started", None)
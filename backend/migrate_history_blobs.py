@@ -0,0 +1,67 @@
+"""
+Moves the texts of existing history entries into the compressed, deduplicated
+text_blobs table. New entries are stored there already; entries that have not
+been migrated yet keep working, so this can run while the app is serving and be
+stopped and restarted at any time.
+
+    python -m backend.migrate_history_blobs
+    python -m backend.migrate_history_blobs --vacuum   # also give the freed space back (SQLite)
+"""
+import argparse
+import os
+
+from sqlalchemy import text
+
+from . import crud, models
+from .database import SQLALCHEMY_DATABASE_URL, SessionLocal, engine
+from .history_search import ensure_search_index
+
+
+def database_size(url):
+    path = url[len("sqlite:///"):] if url.startswith("sqlite:///") else None
+    return os.path.getsize(path) if path and os.path.exists(path) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moves history texts into compressed, deduplicated blobs.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--vacuum", action="store_true", help="compact the SQLite file afterwards")
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    models.add_missing_columns(engine)
+    # The search triggers must read blobs before texts are moved out of the history rows
+    ensure_search_index(engine)
+
+    size_before = database_size(SQLALCHEMY_DATABASE_URL)
+    migrated = 0
+    db = SessionLocal()
+    try:
+        while True:
+            count = crud.move_history_texts_to_blobs(db, args.batch_size)
+            if not count:
+                break
+            migrated += count
+            print(f"Migrated {migrated} history entries")
+        filled = 0
+        while True:
+            count = crud.fill_blob_previews(db, args.batch_size)
+            if not count:
+                break
+            filled += count
+            print(f"Stored previews of {filled} history texts")
+    finally:
+        db.close()
+
+    if args.vacuum and engine.dialect.name == "sqlite":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+
+    print(f"Done: {migrated} history entries migrated.")
+    size_after = database_size(SQLALCHEMY_DATABASE_URL)
+    if size_before and size_after:
+        print(f"Database size: {size_before / 2**20:.1f} MB -> {size_after / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+
+
+def _tensor_bytes(value, seen) -> int:
+    if isinstance(value, (tuple, list)):
+        return sum(_tensor_bytes(item, seen) for item in value)
+    if not (hasattr(value, "numel") and hasattr(value, "data_ptr")):
+        return 0
+    # Tied weights (e.g. shared embeddings) appear under several keys
+    pointer = value.data_ptr()
+    if pointer in seen:
+        return 0
+    seen.add(pointer)
+    return value.numel() * value.element_size()
+
+
+def estimate_model_bytes(obj) -> int:
+    """
+    Estimates the resident size of a loaded model from its state dict, which
+    also covers the packed weights of quantized layers. Accepts a torch module,
+    a pipeline (anything with a `.model`) or a tuple/list containing either.
+    Returns 0 for models that do not expose their weights, such as ONNX sessions.
+    """
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_model_bytes(item) for item in obj)
+    module = obj if hasattr(obj, "state_dict") else getattr(obj, "model", None)
+    if module is None or not hasattr(module, "state_dict"):
+        return 0
+    seen = set()
+    return sum(_tensor_bytes(value, seen) for value in module.state_dict().values())
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process, or 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class LoadedModel:
+    def __init__(self, kind, name, value, load_seconds, rss_growth=0):
+        self.kind = kind
+        self.name = name
+        self.value = value
+        self.load_seconds = load_seconds
+        self.warmup_seconds = None
+        # Fall back to how much the process grew during the load when the
+        # weights cannot be inspected directly
+        self.memory_bytes = estimate_model_bytes(value) or max(rss_growth, 0)
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.uses = 0
+
+    def describe(self):
+        return {
+            "kind": self.kind,
+            "model_name": self.name,
+            "memory_mb": round(self.memory_bytes / (1024 * 1024), 1),
+            "load_seconds": round(self.load_seconds, 2),
+            "warmup_seconds": None if self.warmup_seconds is None else round(self.warmup_seconds, 2),
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "uses": self.uses,
+        }
+
+
+class ModelRegistry:
+    """
+    Loads models on demand or at startup, keeps track of what each one costs
+    and evicts the least recently used model once the memory budget is
+    exceeded. Models are identified by (kind, name); each kind has its own
+    loader and optional warmup function.
+
+    Only one thread ever loads a given model: concurrent requests for a model
+    that is still loading wait for that load instead of starting their own.
+    """
+
+    def __init__(self, loaders, warmups=None, memory_budget_bytes=0):
+        self.loaders = loaders
+        self.warmups = warmups or {}
+        self.memory_budget_bytes = memory_budget_bytes
+        self._models = {}  # (kind, name) -> LoadedModel, in least recently used order
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, name):
+        """Returns the loaded model, loading it first if needed."""
+        key = (kind, name)
+        entry = self._touch(key)
+        if entry is not None:
+            return entry.value
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            # Another request may have finished loading while we waited
+            entry = self._touch(key)
+            if entry is not None:
+                return entry.value
+
+            with self._lock:
+                self.misses += 1
+            print(f"Loading {kind} model: {name}...")
+            started, rss_before = time.perf_counter(), current_rss_bytes()
+            value = self.loaders[kind](name)
+            entry = LoadedModel(kind, name, value, time.perf_counter() - started, current_rss_bytes() - rss_before)
+            entry.uses = 1
+            with self._lock:
+                self._models[key] = entry
+                self._evict_over_budget(keep=key)
+            return value
+
+    def warmup(self, kind, name):
+        """Loads a model and runs one small generate pass so the first real request is fast."""
+        self.get(kind, name)
+        warmup_fn = self.warmups.get(kind)
+        if warmup_fn is None:
+            return
+        entry = self._models.get((kind, name))
+        if entry is None:
+            return
+        started = time.perf_counter()
+        warmup_fn(entry.value)
+        entry.warmup_seconds = time.perf_counter() - started
+
+    def preload(self, specs, warmup=True):
+        """Loads (kind, name) pairs in order, logging rather than raising on failure."""
+        for kind, name in specs:
+            try:
+                if warmup:
+                    self.warmup(kind, name)
+                else:
+                    self.get(kind, name)
+            except Exception as e:
+                print(f"Failed to preload {kind} model {name}: {e}")
+
+    def is_loaded(self, kind, name) -> bool:
+        return (kind, name) in self._models
+
+    def evict(self, kind, name) -> bool:
+        with self._lock:
+            return self._models.pop((kind, name), None) is not None
+
+    def report(self):
+        with self._lock:
+            entries = [entry.describe() for entry in self._models.values()]
+        total = sum(entry["memory_mb"] for entry in entries)
+        return {
+            "models": entries,
+            "total_memory_mb": round(total, 1),
+            "memory_budget_mb": round(self.memory_budget_bytes / (1024 * 1024), 1) if self.memory_budget_bytes else None,
+        }
+
+    def _touch(self, key):
+        """Marks a loaded model as just used and counts the hit; returns None if it is not loaded."""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                # Re-inserting keeps the dict ordered from least to most recently used
+                self._models[key] = self._models.pop(key)
+                entry.last_used = time.time()
+                entry.uses += 1
+                self.hits += 1
+            return entry
+
+    def _evict_over_budget(self, keep):
+        # Called with the lock held. In-flight requests keep their own reference,
+        # so an evicted model is only freed once they are done with it.
+        if not self.memory_budget_bytes:
+            return
+        total = sum(entry.memory_bytes for entry in self._models.values())
+        for key in list(self._models):
+            if total <= self.memory_budget_bytes:
+                break
+            if key == keep:
+                continue
+            evicted = self._models.pop(key)
+            total -= evicted.memory_bytes
+            print(f"Evicted {evicted.kind} model {evicted.name} to stay within the memory budget")
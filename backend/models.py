@@ -1,5 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, func, Text, Float, Index, LargeBinary, inspect, text
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.orm import relationship
 from .database import Base
+from .text_blobs import decompress_text
+
+# SQLite stores server-default timestamps as "YYYY-MM-DD HH:MM:SS"; binding datetimes in the
+# same format keeps comparisons (e.g. history cursors) exact instead of off by the microseconds
+SQLITE_TIMESTAMP = sqlite.DATETIME(
+    storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+)
 
 class User(Base):
     __tablename__ = "users"
@@ -10,6 +19,8 @@ class User(Base):
     full_name = Column(String)
     hashed_password = Column(String, nullable=False)
     reset_token = Column(String, nullable=True)
+    # Rate limit tier (see RATE_LIMIT_TIERS); NULL means RATE_LIMIT_DEFAULT_TIER
+    tier = Column(String, nullable=True)
     
     # Optional profile fields
     age = Column(Integer, nullable=True)
@@ -18,13 +29,99 @@ class User(Base):
     summary_length = Column(String, nullable=True)
     summary_style = Column(String, nullable=True)
 
+class TextBlob(Base):
+    """A history text stored once per distinct content, usually compressed."""
+    __tablename__ = "text_blobs"
+
+    hash = Column(String(64), primary_key=True)  # SHA-256 of the UTF-8 text
+    compression = Column(String, nullable=False)  # zlib, zstd or none
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # length of the text in characters
+    # The first PREVIEW_CHARS characters; NULL for blobs stored before previews were kept
+    preview = Column(Text, nullable=True)
+
+    @property
+    def text(self):
+        return decompress_text(self.compression, self.data)
+
 class History(Base):
     __tablename__ = "history"
+    # Serves the per-user history listing, newest first, straight from the index
+    __table_args__ = (Index("ix_history_user_email_timestamp", "user_email", "timestamp"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_email = Column(String, ForeignKey("users.email"))
     operation_type = Column(String, index=True)
-    original_text = Column(Text)
-    result_text = Column(Text)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Texts live in text_blobs; the inline columns only hold entries not yet migrated
+    inline_original_text = Column("original_text", Text, nullable=True)
+    inline_result_text = Column("result_text", Text, nullable=True)
+    original_blob_hash = Column(String(64), ForeignKey("text_blobs.hash"), nullable=True)
+    result_blob_hash = Column(String(64), ForeignKey("text_blobs.hash"), nullable=True)
+    timestamp = Column(DateTime(timezone=True).with_variant(SQLITE_TIMESTAMP, "sqlite"), server_default=func.now())
+
+    # Loaded only when a full text is read; listings select previews and sizes instead
+    original_blob = relationship(TextBlob, foreign_keys=[original_blob_hash])
+    result_blob = relationship(TextBlob, foreign_keys=[result_blob_hash])
+
+    @property
+    def original_text(self):
+        return self.original_blob.text if self.original_blob is not None else self.inline_original_text
+
+    @property
+    def result_text(self):
+        return self.result_blob.text if self.result_blob is not None else self.inline_result_text
+
+
+class BatchJob(Base):
+    __tablename__ = "batch_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    operation = Column(String, nullable=False)  # "summarize" or "paraphrase"
+    model_name = Column(String, nullable=False)
+    length = Column(String, nullable=False)
+    creativity = Column(Float, nullable=True)
+    user_email = Column(String, nullable=True)
+    # queued -> running -> completed
+    status = Column(String, index=True, nullable=False, default="queued")
+    # The worker running the job, and when its claim lapses unless renewed
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    total_items = Column(Integer, nullable=False, default=0)
+    completed_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+class BatchItem(Base):
+    __tablename__ = "batch_items"
+    __table_args__ = (Index("ix_batch_items_job_status_position", "job_id", "status", "position"),)
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("batch_jobs.id"), nullable=False)
+    position = Column(Integer, nullable=False)
+    input_text = Column(Text, nullable=False)
+    # pending -> done or failed; result holds the JSON response of the matching endpoint
+    status = Column(String, nullable=False, default="pending")
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+
+def add_missing_columns(bind):
+    """create_all does not alter existing tables, so nullable columns added to a model later are added here."""
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(dialect=bind.dialect)
+                with bind.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
 
+def create_missing_indexes(bind):
+    """create_all skips tables that already exist, so indexes added to them later are created here."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
@@ -0,0 +1,125 @@
+import re
+
+from .long_document import count_tokens, split_into_chunks
+from .streaming import BatchTextStreamer, stop_criteria
+
+PARAPHRASE_PREFIX = "paraphrase: "
+MAX_INPUT_TOKENS = 512
+# Leaves room for the prefix and the special tokens added around each segment
+SEGMENT_TOKEN_MARGIN = 8
+# Segments are batched with others of up to this many times their word count
+LENGTH_BUCKET_RATIO = 1.5
+
+
+def length_bounds(word_count: int, length: str):
+    """Maps a word count and the requested length option to (min_length, max_length) for generate."""
+    if length == "short":
+        min_len, max_len = int(word_count * 0.4), int(word_count * 0.7)
+    elif length == "long":
+        min_len, max_len = int(word_count * 1.1), int(word_count * 1.5)
+    else:
+        min_len, max_len = int(word_count * 0.8), int(word_count * 1.2)
+
+    if min_len < 10: min_len = 10
+    if max_len <= min_len: max_len = min_len + 20
+    return min_len, max_len
+
+
+def split_into_segments(text: str, tokenizer, max_tokens: int):
+    """
+    Splits text into paragraphs, and paragraphs that are too long for one model
+    input into sentence groups. Returns (paragraph_index, segment_text) pairs.
+    """
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    segments = []
+    for index, paragraph in enumerate(paragraphs):
+        for chunk in split_into_chunks(paragraph, tokenizer, max_tokens):
+            segments.append((index, chunk))
+    return segments
+
+
+def reassemble(segments, outputs):
+    """Joins per-segment outputs back together, keeping the original paragraph breaks."""
+    document, last_paragraph = "", None
+    for (paragraph, _), output in zip(segments, outputs):
+        output = output.strip()
+        if last_paragraph is None:
+            document = output
+        elif paragraph != last_paragraph:
+            document += "\n\n" + output
+        else:
+            document += " " + output
+        last_paragraph = paragraph
+    return document
+
+
+def length_buckets(word_counts, max_batch_segments, ratio=LENGTH_BUCKET_RATIO):
+    """
+    Groups segment indices, shortest first, into batches of at most
+    `max_batch_segments` whose longest segment has at most `ratio` times the
+    words of the shortest, so one set of length limits suits the whole batch.
+    """
+    batches = []
+    for index in sorted(range(len(word_counts)), key=lambda index: word_counts[index]):
+        if (batches and len(batches[-1]) < max_batch_segments
+                and word_counts[index] <= ratio * max(1, word_counts[batches[-1][0]])):
+            batches[-1].append(index)
+        else:
+            batches.append([index])
+    return batches
+
+
+def generate_paraphrase_candidates(model, tokenizer, text, length, temperature, top_p, num_candidates=3,
+                                   max_batch_segments=16, on_text=None, stop_event=None):
+    """
+    Paraphrases every segment of the text and returns `num_candidates` full-document
+    paraphrases. Segments of similar length are encoded as one padded batch, with
+    length limits fitted to them, and their candidates come out of a single
+    generate call; a document of evenly sized paragraphs needs just one call.
+
+    If given, `on_text(candidate, segment, text)` receives new text as it is generated.
+    """
+    prefix_tokens = count_tokens(tokenizer, [PARAPHRASE_PREFIX])[0]
+    segment_budget = MAX_INPUT_TOKENS - prefix_tokens - SEGMENT_TOKEN_MARGIN
+    segments = split_into_segments(text, tokenizer, segment_budget) or [(0, text)]
+    word_counts = [len(segment.split()) for _, segment in segments]
+
+    # segment -> its candidates, in order
+    candidates = [None] * len(segments)
+    for batch in length_buckets(word_counts, max_batch_segments):
+        # The lower bound comes from the batch's shortest segment and the upper from its longest
+        min_len, _ = length_bounds(word_counts[batch[0]], length)
+        _, max_len = length_bounds(word_counts[batch[-1]], length)
+        if max_len <= min_len: max_len = min_len + 20
+
+        inputs = tokenizer(
+            [PARAPHRASE_PREFIX + segments[index][1] for index in batch],
+            return_tensors="pt", padding=True, max_length=MAX_INPUT_TOKENS, truncation=True,
+        )
+        streamer = None
+        if on_text is not None:
+            streamer = BatchTextStreamer(
+                tokenizer,
+                lambda row, delta, batch=batch: on_text(row % num_candidates, batch[row // num_candidates], delta),
+            )
+        generated_ids = model.generate(
+            input_ids=inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            min_length=min_len,
+            max_length=max_len,
+            num_return_sequences=num_candidates,
+            do_sample=True,
+            temperature=temperature,
+            top_p=top_p,
+            streamer=streamer,
+            stopping_criteria=stop_criteria(stop_event),
+        )
+        outputs = tokenizer.batch_decode(generated_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        # generate returns the candidates of each segment next to each other
+        for position, index in enumerate(batch):
+            candidates[index] = outputs[position * num_candidates:(position + 1) * num_candidates]
+
+    return [
+        reassemble(segments, [segment_candidates[candidate] for segment_candidates in candidates])
+        for candidate in range(num_candidates)
+    ]
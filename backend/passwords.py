@@ -0,0 +1,155 @@
+import asyncio
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+try:
+    import argon2
+except ImportError:  # argon2id is optional; bcrypt is always available
+    argon2 = None
+
+# bcrypt only uses the first 72 bytes of a password. Existing hashes were made by
+# passlib, which truncated silently, so passwords are truncated the same way here.
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# How new password hashes are made: scheme is bcrypt or argon2id, plus the cost parameters
+PasswordPolicy = namedtuple(
+    "PasswordPolicy",
+    ["scheme", "bcrypt_rounds", "argon2_time_cost", "argon2_memory_kib", "argon2_parallelism"],
+    defaults=["bcrypt", 12, 3, 65536, 1],
+)
+
+
+def hash_scheme(hashed: str):
+    """The scheme a stored hash was made with, or None if it is not recognised."""
+    if hashed.startswith("$argon2id$"):
+        return "argon2id"
+    if hashed.startswith(("$2a$", "$2b$", "$2y$")):
+        return "bcrypt"
+    return None
+
+
+def _argon2_hasher(policy: PasswordPolicy):
+    return argon2.PasswordHasher(
+        time_cost=policy.argon2_time_cost,
+        memory_cost=policy.argon2_memory_kib,
+        parallelism=policy.argon2_parallelism,
+        type=argon2.Type.ID,
+    )
+
+
+def _bcrypt_password(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def hash_password(password: str, policy: PasswordPolicy) -> str:
+    if policy.scheme == "argon2id":
+        return _argon2_hasher(policy).hash(password)
+    return bcrypt.hashpw(_bcrypt_password(password), bcrypt.gensalt(policy.bcrypt_rounds)).decode("ascii")
+
+
+def needs_rehash(hashed: str, policy: PasswordPolicy) -> bool:
+    """True if `hashed` was made with another scheme or cost than `policy` asks for."""
+    scheme = hash_scheme(hashed)
+    if scheme != policy.scheme:
+        return True
+    if scheme == "bcrypt":
+        # $2b$<rounds>$<salt and hash>
+        return int(hashed.split("$")[2]) != policy.bcrypt_rounds
+    return _argon2_hasher(policy).check_needs_rehash(hashed)
+
+
+def verify_password(password: str, hashed: str, policy: PasswordPolicy):
+    """
+    Returns (valid, new_hash). new_hash is set when the password is valid but its
+    hash no longer matches the policy, and should replace the stored one.
+    """
+    scheme = hash_scheme(hashed or "")
+    if scheme == "bcrypt":
+        try:
+            valid = bcrypt.checkpw(_bcrypt_password(password), hashed.encode("ascii"))
+        except ValueError:
+            valid = False
+    elif scheme == "argon2id":
+        if argon2 is None:
+            raise RuntimeError("This password is hashed with argon2id; install argon2-cffi to verify it")
+        try:
+            valid = _argon2_hasher(policy).verify(hashed, password)
+        except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+            valid = False
+    else:
+        valid = False
+    if valid and needs_rehash(hashed, policy):
+        return True, hash_password(password, policy)
+    return valid, None
+
+
+def _noop():
+    return None
+
+
+class PasswordHashPool:
+    """
+    Hashes and verifies passwords in worker processes, so logins and sign-ups do
+    not hold the GIL or a threadpool thread that other endpoints need.
+
+    At most `max_concurrency` hashes run (or are queued in the processes) at once;
+    further requests wait on the event loop. With `max_workers=0` hashing runs on
+    the default threadpool instead, as it did before.
+    """
+
+    def __init__(self, policy: PasswordPolicy, max_workers=2, max_concurrency=4):
+        if policy.scheme == "argon2id" and argon2 is None:
+            print("PASSWORD_SCHEME=argon2id needs pip install argon2-cffi; new passwords are hashed with bcrypt.")
+            policy = policy._replace(scheme="bcrypt")
+        self.policy = policy
+        self.max_workers = max(0, max_workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = None
+        self._semaphore = None
+
+    def _get_executor(self):
+        if self.max_workers == 0:
+            return None
+        if self._executor is None:
+            # Forking a process that has loaded torch and started threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            executor = self._get_executor()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for the next request
+                if self._executor is executor:
+                    self._executor = None
+                raise
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.policy)
+
+    async def verify(self, password: str, hashed: str):
+        """Returns (valid, new_hash), see verify_password."""
+        return await self._run(verify_password, password, hashed, self.policy)
+
+    def start(self):
+        """Starts the worker processes now rather than on the first login."""
+        executor = self._get_executor()
+        if executor is not None:
+            for future in [executor.submit(_noop) for _ in range(self.max_workers)]:
+                future.result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
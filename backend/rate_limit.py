@@ -0,0 +1,172 @@
+import math
+import sqlite3
+import threading
+import time
+
+
+class RateLimited(Exception):
+    """Raised when a caller has used up its token budget; `retry_after` is in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Rate limit exceeded, please retry later.")
+        self.retry_after = retry_after
+
+
+def parse_rate_limit_tiers(spec: str):
+    """
+    Parses 'free=20000:10000,pro=100000:50000' into {'free': (20000, 10000), ...}:
+    each tier's burst capacity in tokens and its refill rate in tokens per minute.
+    """
+    tiers = {}
+    for part in (spec or "").split(","):
+        name, _, limits = part.partition("=")
+        capacity, _, per_minute = limits.partition(":")
+        try:
+            capacity, per_minute = float(capacity), float(per_minute or capacity)
+        except ValueError:
+            continue
+        if capacity > 0 and per_minute > 0:
+            tiers[name.strip()] = (capacity, per_minute)
+    return tiers
+
+
+def parse_model_weights(spec: str):
+    """Parses 'model_a=2,model_b=0.5' into {'model_a': 2.0, 'model_b': 0.5}."""
+    weights = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.rpartition("=")
+        try:
+            weights[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return weights
+
+
+def estimate_tokens(text: str) -> int:
+    """A tokenizer-free estimate of a text's length in model tokens (about four characters each)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+class MemoryBuckets:
+    """Token buckets kept in this process."""
+
+    blocking = False
+
+    def __init__(self, max_buckets=100_000):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, capacity, refill_per_second, now=None, debit=None):
+        """
+        Takes `cost` tokens from the bucket; returns 0 on success, else the seconds
+        until they are available. `debit`, if given, is taken instead once `cost`
+        is available, and may leave the bucket below zero.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            if tokens < cost:
+                self._buckets[key] = (tokens, now)
+                return (cost - tokens) / refill_per_second
+            self._buckets[key] = (tokens - (cost if debit is None else debit), now)
+            if len(self._buckets) > self.max_buckets:
+                self._drop_idle(now)
+            return 0
+
+    def _drop_idle(self, now):
+        # Idle buckets have long since refilled; forgetting them is the same as keeping them full
+        for key, (_, updated_at) in list(self._buckets.items()):
+            if now - updated_at > 3600:
+                del self._buckets[key]
+
+
+class SQLiteBuckets:
+    """
+    Token buckets in a SQLite file, so every API process on a machine shares the
+    same limits. Each take is one short write transaction.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._takes = 0
+
+    def take(self, key, cost, capacity, refill_per_second, now=None, debit=None):
+        # Wall-clock time, since it is compared across processes
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens = min(capacity, tokens + max(0.0, now - updated_at) * refill_per_second)
+                wait = 0 if tokens >= cost else (cost - tokens) / refill_per_second
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens if wait else tokens - (cost if debit is None else debit), now),
+                )
+                self._takes += 1
+                if self._takes % 1000 == 0:
+                    self._conn.execute("DELETE FROM rate_limit_buckets WHERE updated_at < ?", (now - 3600,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+class RateLimiter:
+    """
+    Per-caller token buckets for the model endpoints. A request costs its
+    estimated input tokens times the model's weight (default 1) times a
+    per-operation multiplier, such as the number of paraphrase candidates.
+
+    Each tier has a burst capacity and a refill rate. A request that costs more
+    than a whole bucket is charged the full bucket, so it can still run once the
+    bucket is full. With `full_cost`, as for batch jobs, it still waits for a
+    full bucket but is then charged its whole cost, leaving the bucket in debt
+    until the refill has paid for it.
+    """
+
+    def __init__(self, tiers, model_weights=None, default_tier="free", store=None):
+        self.tiers = tiers
+        self.model_weights = model_weights or {}
+        self.default_tier = default_tier
+        self.store = store or MemoryBuckets()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def blocking(self) -> bool:
+        """True when `check` touches the disk and should run off the event loop."""
+        return self.store.blocking
+
+    def cost(self, model_name, text, multiplier=1.0) -> float:
+        return estimate_tokens(text) * self.model_weights.get(model_name, 1.0) * multiplier
+
+    def check(self, key, tier, model_name, text, multiplier=1.0, full_cost=False):
+        """Charges the request to `key`'s bucket, or raises RateLimited."""
+        limits = self.tiers.get(tier or self.default_tier) or self.tiers.get(self.default_tier)
+        if limits is None:
+            return
+        capacity, per_minute = limits
+        refill_per_second = per_minute / 60
+        full = self.cost(model_name, text, multiplier)
+        cost = min(full, capacity)
+        wait = self.store.take(key, cost, capacity, refill_per_second, debit=full if full_cost else None)
+        if wait:
+            with self._lock:
+                self.rejected += 1
+            raise RateLimited(max(1, math.ceil(wait)))
@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache
+
+import textstat
+
+from .complexity import LEVELS, grade_to_level, syllables_in_word
+
+# Sentences and words are found the way textstat finds them, so the scores match
+# what the Dashboard showed before (to within rounding). Sentences of two words or
+# fewer (headings, list markers) are not counted as sentences, but their words are.
+_SENTENCE = re.compile(r"\b[^.!?]+[.!?]*", re.UNICODE)
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+MIN_SENTENCE_WORDS = 3
+# Gunning Fog counts words of this many syllables that are not on the Dale-Chall easy word list
+FOG_SYLLABLE_THRESHOLD = 3
+# Paragraph previews returned with the breakdown
+PREVIEW_CHARS = 80
+
+
+@lru_cache(maxsize=200_000)
+def word_profile(word: str):
+    """(syllables, polysyllabic, difficult) for a lower-cased word, memoized across all requests."""
+    syllables = syllables_in_word(word)
+    difficult = textstat.is_difficult_word(word, FOG_SYLLABLE_THRESHOLD)
+    return syllables, syllables >= 3, difficult
+
+
+class Counts:
+    """Running totals for one paragraph, page or document; the scores are computed from them."""
+
+    __slots__ = ("sentences", "words", "syllables", "polysyllables", "difficult_words")
+
+    def __init__(self):
+        self.sentences = self.words = self.syllables = self.polysyllables = self.difficult_words = 0
+
+    def add(self, other):
+        self.sentences += other.sentences
+        self.words += other.words
+        self.syllables += other.syllables
+        self.polysyllables += other.polysyllables
+        self.difficult_words += other.difficult_words
+
+    def scores(self):
+        if not self.words:
+            return {"flesch_kincaid_grade": 0.0, "gunning_fog": 0.0, "smog_index": 0.0, "flesch_reading_ease": 0.0}
+        # Text with words but no full sentence still counts as one sentence, as in textstat
+        sentences = max(1, self.sentences)
+        words_per_sentence = self.words / sentences
+        syllables_per_word = self.syllables / self.words
+        return {
+            "flesch_kincaid_grade": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 2),
+            "gunning_fog": round(0.4 * (words_per_sentence + 100 * self.difficult_words / self.words), 2),
+            "smog_index": round(1.043 * (30 * self.polysyllables / sentences) ** 0.5 + 3.1291, 2),
+            "flesch_reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 2),
+        }
+
+    def as_dict(self):
+        return {
+            **self.scores(),
+            "sentence_count": self.sentences,
+            "word_count": self.words,
+            "syllable_count": self.syllables,
+            "polysyllable_count": self.polysyllables,
+            "difficult_word_count": self.difficult_words,
+        }
+
+
+def count_paragraph(paragraph: str) -> Counts:
+    """Tokenizes a paragraph once and counts everything the scores need."""
+    counts = Counts()
+    for sentence in _SENTENCE.findall(paragraph):
+        words = _PUNCTUATION.sub("", sentence).split()
+        if len(words) >= MIN_SENTENCE_WORDS:
+            counts.sentences += 1
+        counts.words += len(words)
+        for word in words:
+            syllables, polysyllabic, difficult = word_profile(word.lower())
+            counts.syllables += syllables
+            counts.polysyllables += polysyllabic
+            counts.difficult_words += difficult
+    return counts
+
+
+def split_paragraphs(text: str):
+    return [paragraph.strip() for paragraph in _PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+
+
+def analyze_readability(pages, include_paragraphs: bool = True):
+    """
+    Scores a document given as a list of page texts (one page for plain text) in
+    a single pass: Flesch-Kincaid grade, Gunning Fog, SMOG and Flesch reading
+    ease for the whole document, each page and each paragraph. "levels" is the
+    share of the document's words in paragraphs at each reading level.
+    """
+    document = Counts()
+    level_words = {level: 0 for level in LEVELS}
+    page_results, paragraph_results = [], []
+
+    for page_index, page in enumerate(pages):
+        page_counts = Counts()
+        for paragraph in split_paragraphs(page):
+            counts = count_paragraph(paragraph)
+            page_counts.add(counts)
+            scores = counts.as_dict()
+            if counts.words:
+                level_words[grade_to_level(scores["flesch_kincaid_grade"])] += counts.words
+            if include_paragraphs:
+                paragraph_results.append({
+                    "page": page_index,
+                    "index": len(paragraph_results),
+                    "preview": paragraph[:PREVIEW_CHARS],
+                    **scores,
+                })
+        document.add(page_counts)
+        page_results.append({"page": page_index, **page_counts.as_dict()})
+
+    total_words = sum(level_words.values())
+    result = {
+        "document": document.as_dict(),
+        "levels": {
+            level: round(100 * count / total_words, 1) if total_words else 0
+            for level, count in level_words.items()
+        },
+        "page_count": len(page_results),
+        "pages": page_results,
+    }
+    if include_paragraphs:
+        result["paragraphs"] = paragraph_results
+    return result
+
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so trivially different copies of a text share a cache entry."""
+    return " ".join(text.split())
+
+
+def make_cache_key(operation: str, model_name: str, length=None, text: str = "", creativity=None, normalize: bool = True) -> str:
+    """
+    Content-addresses a request by hashing its operation, settings and normalized
+    text. Pass normalize=False when the result depends on the text's layout, such
+    as its paragraph breaks.
+    """
+    parts = [
+        operation, model_name, str(length or ""), "" if creativity is None else f"{creativity:.3f}",
+        normalize_text(text) if normalize else text,
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class DiskCacheTier:
+    """A small SQLite key/value store so cached results survive restarts."""
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS result_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM result_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE result_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, last_access) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+            self._writes += 1
+            # Trimming is a table scan, so only do it every so often
+            if self._writes % 1000 == 0:
+                self._conn.execute(
+                    "DELETE FROM result_cache WHERE key IN ("
+                    "SELECT key FROM result_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM result_cache")
+            self._conn.commit()
+
+
+class ResultCache:
+    """
+    Two-tier cache for model outputs: an in-memory LRU bounded by the total
+    size of the stored results, backed by an optional on-disk SQLite tier.
+    Values must be JSON-serializable.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, disk_path: str = None, disk_max_entries: int = 100_000):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (serialized value, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.disk = DiskCacheTier(disk_path, disk_max_entries) if disk_path else None
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0}
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return json.loads(entry[0])
+
+        serialized = self.disk.get(key) if self.disk else None
+        with self._lock:
+            if serialized is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self.stats["disk_hits"] += 1
+            self._store(key, serialized)
+        return json.loads(serialized)
+
+    def set(self, key: str, value):
+        serialized = json.dumps(value)
+        with self._lock:
+            self._store(key, serialized)
+        if self.disk:
+            self.disk.set(key, serialized)
+
+    def _store(self, key, serialized):
+        # Called with the lock held
+        size = len(serialized.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (serialized, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk:
+            self.disk.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "memory_max_bytes": self.max_bytes,
+                "disk_enabled": self.disk is not None,
+            }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Literal, Optional, List, Union
 import datetime
 
 # --- Schemas for User & Auth ---
@@ -36,12 +36,20 @@ class PasswordReset(BaseModel):
     token: str
     new_password: str
 
+class Token(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    expires_in: int
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
 # --- Schemas for Text Tools ---
 class SummaryRequest(BaseModel):
     text: str
     model_name: str
     length: str
-    user_email: Optional[str] = None
 
 class ParaphraseRequest(BaseModel):
     text: str
@@ -49,10 +57,65 @@ class ParaphraseRequest(BaseModel):
     creativity: float
     length: str
     style: Optional[str] = None  # MODIFIED: Made the style field optional
-    user_email: Optional[str] = None
 
 class SentimentRequest(BaseModel):
     text: str
+    # "text" scores the whole text at once, cut off at the model's input limit; "sentences" scores
+    # each sentence and adds per-paragraph and per-sentence timelines; "auto" uses "sentences"
+    # only for texts over the limit
+    mode: Literal["auto", "text", "sentences"] = "auto"
+    include_sentences: bool = True
+
+class ComplexityRequest(BaseModel):
+    text: str
+
+class ReadabilityRequest(BaseModel):
+    # Either the whole text (pages may be separated by form feeds) or its pages, e.g. from /extract
+    text: Optional[str] = None
+    pages: Optional[List[str]] = None
+    include_paragraphs: bool = True
+
+class AnalyzeRequest(BaseModel):
+    # Either one text, or several to analyze together (the response then has one result per text)
+    text: Optional[str] = None
+    texts: Optional[List[str]] = None
+    include_sentences: bool = False
+
+# --- Schemas for Batch Jobs ---
+class BatchSummaryRequest(BaseModel):
+    texts: List[str]
+    model_name: str
+    length: str
+
+class BatchParaphraseRequest(BaseModel):
+    texts: List[str]
+    model_name: str
+    creativity: float
+    length: str
+
+class BatchJob(BaseModel):
+    id: int
+    operation: str
+    model_name: str
+    status: str
+    total_items: int
+    completed_items: int
+    failed_items: int
+    progress: float
+    created_at: Optional[datetime.datetime] = None
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+class BatchItemResult(BaseModel):
+    position: int
+    status: str
+    result: Optional[dict] = None
+    error: Optional[str] = None
+
+class BatchResultsPage(BaseModel):
+    job_id: int
+    items: List[BatchItemResult]
+    next_cursor: Optional[int] = None
 
 # --- Schemas for History ---
 class HistoryCreate(BaseModel):
@@ -72,3 +135,29 @@ class History(BaseModel):
     class Config:
         from_attributes = True
 
+
+class HistoryPreview(BaseModel):
+    id: int
+    user_email: str
+    operation_type: str
+    original_preview: str
+    result_preview: str
+    original_length: int
+    result_length: int
+    timestamp: datetime.datetime
+
+    class Config:
+        from_attributes = True
+
+class HistoryPage(BaseModel):
+    items: List[Union[HistoryPreview, History]]
+    next_cursor: Optional[str] = None
+
+class HistorySearchResult(BaseModel):
+    id: int
+    operation_type: str
+    timestamp: datetime.datetime
+    # None for an entry that has no such text
+    original_snippet: Optional[str] = None
+    result_snippet: Optional[str] = None
+    score: float
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import torch
+from transformers.generation.stopping_criteria import StoppingCriteria, StoppingCriteriaList
+from transformers.generation.streamers import BaseStreamer
+
+
+def format_sse(event: str, data) -> str:
+    """Formats one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class BatchTextStreamer(BaseStreamer):
+    """
+    Streams newly decoded text for every row of a generate call, including
+    batched and multi-candidate calls that the built-in streamers reject.
+    `on_text(row, text)` is called from the generating thread.
+    """
+
+    def __init__(self, tokenizer, on_text):
+        self.tokenizer = tokenizer
+        self.on_text = on_text
+        self._prompt_pending = True
+        self._tokens = {}
+        self._emitted = {}
+
+    def put(self, value):
+        # The first call carries the decoder start tokens, not generated text
+        if self._prompt_pending:
+            self._prompt_pending = False
+            return
+        if value.dim() == 1:
+            value = value.unsqueeze(-1)
+
+        for row, ids in enumerate(value.tolist()):
+            tokens = self._tokens.setdefault(row, [])
+            tokens.extend(ids)
+            text = self.tokenizer.decode(tokens, skip_special_tokens=True, clean_up_tokenization_spaces=False)
+            emitted = self._emitted.get(row, "")
+            # Wait for multi-byte characters that are still incomplete
+            if text.endswith("\ufffd") or len(text) <= len(emitted) or not text.startswith(emitted):
+                continue
+            self._emitted[row] = text
+            self.on_text(row, text[len(emitted):])
+
+    def end(self):
+        pass
+
+
+class StopOnEvent(StoppingCriteria):
+    """Ends generation early once `event` is set, e.g. when the client disconnects."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return torch.full((input_ids.shape[0],), self.event.is_set(), dtype=torch.bool, device=input_ids.device)
+
+
+def stop_criteria(stop_event):
+    return StoppingCriteriaList([StopOnEvent(stop_event)]) if stop_event is not None else None
+
+
+def generate_streaming_summary(model, tokenizer, text, max_length, min_length, max_input_tokens, on_text, stop_event=None):
+    """
+    Summarizes one text with greedy decoding, passing each new piece of text to
+    `on_text` as it is generated. Beam search cannot stream, so this uses a
+    single beam even for models whose default generation config sets more.
+    """
+    prefix = getattr(model.config, "prefix", None) or ""
+    inputs = tokenizer([prefix + text], return_tensors="pt", truncation=True, max_length=max_input_tokens)
+    generated_ids = model.generate(
+        input_ids=inputs["input_ids"],
+        attention_mask=inputs["attention_mask"],
+        max_length=max_length,
+        min_length=min_length,
+        do_sample=False,
+        num_beams=1,
+        streamer=BatchTextStreamer(tokenizer, lambda row, delta: on_text(delta)),
+        stopping_criteria=stop_criteria(stop_event),
+    )
+    return tokenizer.decode(generated_ids[0], skip_special_tokens=True, clean_up_tokenization_spaces=True)
+
+
+async def relay_events(task, events: asyncio.Queue):
+    """
+    Yields (event, data) pairs put on `events` by the worker thread until `task`
+    finishes, then whatever is left in the queue.
+    """
+    while True:
+        getter = asyncio.ensure_future(events.get())
+        done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter in done:
+            yield getter.result()
+            continue
+        getter.cancel()
+        break
+    while not events.empty():
+        yield events.get_nowait()
@@ -0,0 +1,129 @@
+import re
+from functools import lru_cache
+
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from nltk.tokenize import sent_tokenize
+
+from .complexity import complexity_analyzer
+from .readability import PREVIEW_CHARS, split_paragraphs
+
+# Words are counted the way the Summarize page counted them before
+_WORD = re.compile(r"\b\w+\b")
+
+
+@lru_cache(maxsize=1)
+def get_vader() -> SentimentIntensityAnalyzer:
+    """One VADER analyzer per process, as loading its lexicon takes a moment."""
+    return SentimentIntensityAnalyzer()
+
+
+def word_count(text: str) -> int:
+    return len(_WORD.findall(text))
+
+
+def split_sentences(texts):
+    """Sentence-tokenizes each text once; every later step works from these lists."""
+    return [sent_tokenize(text) for text in texts]
+
+
+def classify_sentences(classifier, sentences, batch_size: int = 32, max_length: int = None):
+    """
+    Runs a sentiment pipeline over sentences `batch_size` at a time. Sentences
+    are sorted by length first, so each batch is padded only to a length close
+    to that of all its sentences; sentences longer than `max_length` tokens are
+    truncated. Returns one {label, score} per sentence, in the original order.
+    """
+    if not sentences:
+        return []
+    order = sorted(range(len(sentences)), key=lambda index: len(sentences[index]))
+    kwargs = {"truncation": True} if max_length is None else {"truncation": True, "max_length": max_length}
+    predictions = classifier([sentences[index] for index in order], batch_size=batch_size, **kwargs)
+    results = [None] * len(sentences)
+    for index, prediction in zip(order, predictions):
+        results[index] = prediction
+    return results
+
+
+def aggregate_sentiment(sentences, predictions):
+    """
+    Combines sentence predictions into one label for the text: each sentence
+    adds its score, weighted by its word count, to its label's total, and the
+    label with the largest share wins.
+    """
+    totals, counts = {}, {}
+    for sentence, prediction in zip(sentences, predictions):
+        label = prediction["label"]
+        totals[label] = totals.get(label, 0.0) + prediction["score"] * max(1, word_count(sentence))
+        counts[label] = counts.get(label, 0) + 1
+    total = sum(totals.values())
+    if not total:
+        return {"label": None, "score": None, "label_shares": {}, "label_counts": counts}
+    shares = {label: round(value / total, 4) for label, value in totals.items()}
+    label = max(shares, key=shares.get)
+    return {"label": label, "score": shares[label], "label_shares": shares, "label_counts": counts}
+
+
+def build_analysis(text: str, sentences, predictions, include_sentences: bool = False):
+    """Everything /analyze/ returns for one text, from its sentences and their predictions."""
+    complexity = complexity_analyzer.analyze_sentences(sentences, include_sentences)
+    graded = complexity.pop("sentences", None)
+    complexity.pop("sentence_count")
+    analysis = {
+        "word_count": word_count(text),
+        "character_count": len(text),
+        "sentence_count": len(sentences),
+        "vader": get_vader().polarity_scores(text),
+        "sentiment": aggregate_sentiment(sentences, predictions),
+        "complexity": complexity,
+    }
+    if include_sentences:
+        analysis["sentences"] = [
+            {**sentence, "label": prediction["label"], "score": round(prediction["score"], 4)}
+            for sentence, prediction in zip(graded, predictions)
+        ]
+    return analysis
+
+
+def split_paragraph_sentences(text: str):
+    """The paragraphs of a text and the sentences of each, for the sentiment timeline."""
+    paragraphs = split_paragraphs(text)
+    return paragraphs, split_sentences(paragraphs)
+
+
+def build_sentiment_timeline(paragraphs, sentence_lists, predictions, include_sentences: bool = True):
+    """
+    The long-text result of /sentiment/: the aggregate label of the whole text,
+    then the label of each paragraph and (optionally) of each sentence, in order.
+    """
+    sentences = [sentence for paragraph_sentences in sentence_lists for sentence in paragraph_sentences]
+    paragraph_results, sentence_results, offset = [], [], 0
+    for index, (paragraph, paragraph_sentences) in enumerate(zip(paragraphs, sentence_lists)):
+        paragraph_predictions = predictions[offset:offset + len(paragraph_sentences)]
+        aggregate = aggregate_sentiment(paragraph_sentences, paragraph_predictions)
+        paragraph_results.append({
+            "index": index,
+            "preview": paragraph[:PREVIEW_CHARS],
+            "sentence_count": len(paragraph_sentences),
+            **aggregate,
+        })
+        if include_sentences:
+            for sentence, prediction in zip(paragraph_sentences, paragraph_predictions):
+                sentence_results.append({
+                    "index": len(sentence_results),
+                    "paragraph": index,
+                    "text": sentence,
+                    "label": prediction["label"],
+                    "score": round(prediction["score"], 4),
+                })
+        offset += len(paragraph_sentences)
+
+    result = {
+        "mode": "sentences",
+        **aggregate_sentiment(sentences, predictions),
+        "sentence_count": len(sentences),
+        "paragraph_count": len(paragraphs),
+        "paragraphs": paragraph_results,
+    }
+    if include_sentences:
+        result["sentences"] = sentence_results
+    return result
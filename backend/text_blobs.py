@@ -0,0 +1,60 @@
+import hashlib
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; zlib is always available
+    zstandard = None
+
+# How new history texts are compressed: zlib, zstd (needs pip install zstandard) or none.
+# Stored blobs record their own compression, so changing this never affects existing ones.
+HISTORY_COMPRESSION = os.getenv("HISTORY_COMPRESSION", "zlib").lower()
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+# Each blob also keeps the start of its text uncompressed, so history listings can show
+# previews without reading or decompressing the full text; HISTORY_PREVIEW_CHARS is capped to this
+PREVIEW_CHARS = 500
+
+
+def text_hash(text: str) -> str:
+    """Content address of a text: the SHA-256 of its UTF-8 bytes."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_text(text: str, compression: str = HISTORY_COMPRESSION):
+    """
+    Returns (compression, data) for a text. Texts that do not get smaller, such
+    as very short ones, are stored uncompressed.
+    """
+    raw = text.encode("utf-8")
+    if compression == "zstd" and zstandard is None:
+        compression = "zlib"
+    if compression == "zstd":
+        data = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    elif compression == "zlib":
+        data = zlib.compress(raw, ZLIB_LEVEL)
+    else:
+        return "none", raw
+    if len(data) >= len(raw):
+        return "none", raw
+    return compression, data
+
+
+def decompress_text(compression: str, data: bytes) -> str:
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This history text is zstd-compressed; install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    elif compression == "zlib":
+        raw = zlib.decompress(data)
+    else:
+        raw = data
+    return raw.decode("utf-8")
+
+
+def sqlite_blob_text(compression, data):
+    """SQL function blob_text(compression, data) for SQLite, used by the history search index."""
+    if data is None:
+        return None
+    return decompress_text(compression, data)
@@ -0,0 +1,97 @@
+"""
+Microbenchmark for the sentence-level complexity analysis on large documents.
+
+Compares the previous per-sentence textstat loop with the memoized engine,
+both cold (empty sentence cache) and warm (the same document analyzed again,
+as happens when a text is summarized and then paraphrased).
+
+Usage (from the project root):
+    python -m benchmarks.complexity_analysis --sentences 10000
+"""
+import argparse
+import json
+import random
+import time
+
+import textstat
+from nltk.tokenize import sent_tokenize
+
+from backend.complexity import ComplexityAnalyzer
+
+SUBJECTS = ["The committee", "Our research team", "A small group of volunteers", "The new government agency", "Most students"]
+VERBS = ["carefully reviewed", "quickly rejected", "enthusiastically supported", "thoroughly investigated", "ignored"]
+OBJECTS = [
+    "the proposal for a new library",
+    "an unprecedented interdisciplinary collaboration between universities",
+    "the budget",
+    "several complicated administrative procedures regarding international accreditation",
+    "the findings of the annual report",
+]
+ENDINGS = ["yesterday.", "after a long and contentious debate.", "without comment.", "in considerable detail.", "again."]
+
+
+def make_document(sentences: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(ENDINGS)}"
+        for _ in range(sentences)
+    )
+
+
+def legacy_analyze(text: str):
+    """The per-sentence textstat loop the engine replaced."""
+    sentences = sent_tokenize(text)
+    counts = {"beginner": 0, "intermediate": 0, "advanced": 0}
+    for sentence in sentences:
+        if len(sentence.split()) < 5:
+            continue
+        grade = textstat.flesch_kincaid_grade(sentence)
+        if grade < 8:
+            counts["beginner"] += 1
+        elif grade <= 12:
+            counts["intermediate"] += 1
+        else:
+            counts["advanced"] += 1
+    total = sum(counts.values()) or 1
+    return {level: round(count / total * 100) for level, count in counts.items()}
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=10_000)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    document = make_document(args.sentences)
+    analyzer = ComplexityAnalyzer()
+
+    legacy_levels, legacy_ms = timed(legacy_analyze, document)
+    cold, cold_ms = timed(analyzer.analyze, document)
+    warm, warm_ms = timed(analyzer.analyze, document)
+
+    results = {
+        "sentences": args.sentences,
+        "legacy_ms": round(legacy_ms, 1),
+        "engine_cold_ms": round(cold_ms, 1),
+        "engine_warm_ms": round(warm_ms, 1),
+        "legacy_levels": legacy_levels,
+        "engine_levels": cold["levels"],
+    }
+    print(f"sentences:           {args.sentences}")
+    print(f"legacy textstat:     {legacy_ms:>9.1f} ms  {legacy_levels}")
+    print(f"engine (cold cache): {cold_ms:>9.1f} ms  {cold['levels']}")
+    print(f"engine (warm cache): {warm_ms:>9.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+End-to-end benchmark and load test for the API.
+
+Runs the FastAPI app in-process (lifespan included) against a fresh SQLite
+database and drives /token, /summarize/, /paraphrase/, /sentiment/ and
+/history/{email} one scenario at a time at the given concurrency. Unless
+--model is given, the models are tiny randomly initialized ones built on the
+spot, so no network access is needed and runs are reproducible.
+
+Each scenario reports throughput, p50/p95/p99 latency and errors, plus the
+process's peak RSS; --output writes everything as JSON. The run exits with
+status 1 if any request failed, so it can gate CI. --compare diffs two
+such files and exits with status 1 if any metric got worse by more than
+--threshold percent.
+
+Usage (from the project root):
+    python -m benchmarks.end_to_end --concurrency 8 --requests 100 --output after.json
+    python -m benchmarks.end_to_end --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.summarize_batching import SAMPLE_TEXTS
+
+SCENARIOS = ["token", "summarize", "paraphrase", "sentiment", "history"]
+EMAIL = "benchmark@example.com"
+PASSWORD = "benchmark password"
+
+# Metrics compared by --compare, and whether a higher value is better
+COMPARED_METRICS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_environment(args, workdir, model_path, sentiment_path):
+    """The app reads its settings at import time, so they are set before backend.main is imported."""
+    os.environ.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "benchmark.db"),
+        "HISTORY_SPOOL_PATH": os.path.join(workdir, "history_spool.jsonl"),
+        "SENTIMENT_MODEL_NAME": sentiment_path,
+        "JWT_SECRET_KEY": "benchmark",
+        "RESULT_CACHE_ENABLED": "1" if args.cache else "0",
+        "RATE_LIMIT_ENABLED": "0",
+        "BATCH_WORKER_ENABLED": "0",
+    })
+    if args.bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+
+def request_builders(model_path, headers):
+    """For each scenario, a function that sends its i-th request."""
+    def text(i):
+        # Every request gets a different text, so the result cache (if on) never answers
+        return f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} Request {i}."
+
+    return {
+        "token": lambda client, i: client.post("/token", data={"username": EMAIL, "password": PASSWORD}),
+        "summarize": lambda client, i: client.post("/summarize/", json={
+            "text": text(i), "model_name": model_path, "length": "short",
+        }, headers=headers),
+        "paraphrase": lambda client, i: client.post("/paraphrase/", json={
+            "text": text(i), "model_name": model_path, "creativity": 0.5, "length": "short",
+        }),
+        "sentiment": lambda client, i: client.post("/sentiment/", json={"text": text(i)}),
+        "history": lambda client, i: client.get(f"/history/{EMAIL}", params={"limit": 20}, headers=headers),
+    }
+
+
+async def run_scenario(client, send, concurrency, requests, duration):
+    """Sends `requests` requests (or keeps sending for `duration` seconds) from `concurrency` clients."""
+    latencies, errors, next_index = [], {}, [0]
+    stop_at = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        while True:
+            if stop_at is not None:
+                if time.perf_counter() >= stop_at:
+                    return
+            elif next_index[0] >= requests:
+                return
+            index = next_index[0]
+            next_index[0] += 1
+            started = time.perf_counter()
+            try:
+                response = await send(client, index)
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": len(latencies) + sum(errors.values()),
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run_suite(args, model_path):
+    import backend.main as main
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=300) as client:
+            await client.post("/users/", json={
+                "email": EMAIL, "username": "benchmark", "full_name": "Benchmark", "password": PASSWORD,
+            })
+            login = await client.post("/token", data={"username": EMAIL, "password": PASSWORD})
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            builders = request_builders(model_path, headers)
+
+            for name in args.scenarios:
+                # Loads the models and fills lazy caches before measuring
+                await builders[name](client, -1)
+                results[name] = await run_scenario(client, builders[name], args.concurrency, args.requests, args.duration)
+                print(f"{name:>10}: {json.dumps(results[name])}")
+    return results
+
+
+def run(args):
+    from benchmarks.tiny_models import build_tiny_models
+
+    workdir = tempfile.mkdtemp(prefix="textmorph-e2e-")
+    # Building the tiny models takes about a second; they stand in for whichever model is not given
+    tiny_seq2seq, tiny_sentiment = build_tiny_models(workdir, SAMPLE_TEXTS, seed=args.seed)
+    model_path = args.model or tiny_seq2seq
+    sentiment_path = args.sentiment_model or tiny_sentiment
+    configure_environment(args, workdir, model_path, sentiment_path)
+
+    results = asyncio.run(run_suite(args, model_path))
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "settings": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "duration": args.duration,
+            "model": args.model or "tiny-random",
+            "sentiment_model": args.sentiment_model or "tiny-random",
+            "cache": args.cache,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    failed = [name for name, result in results.items() if result["errors"]]
+    if failed:
+        print(f"Requests failed in: {', '.join(failed)}")
+    return len(failed)
+
+
+def compare(before_path, after_path, threshold):
+    """Prints each scenario's metrics side by side; returns the number of regressions."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    regressions = 0
+    print(f"{'scenario':<12}{'metric':<16}{'before':>12}{'after':>12}{'change':>10}")
+    for name in before["scenarios"]:
+        if name not in after["scenarios"]:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before["scenarios"][name].get(metric), after["scenarios"][name].get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = "  REGRESSION" if worse > threshold else ""
+            regressions += bool(flag)
+            print(f"{name:<12}{metric:<16}{old:>12}{new:>12}{change:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of " + ",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="requests per scenario")
+    parser.add_argument("--duration", type=float, help="run each scenario for this many seconds instead")
+    parser.add_argument("--model", help="local seq2seq model for summarize and paraphrase (default: a tiny random one)")
+    parser.add_argument("--sentiment-model", help="local sentiment model (default: a tiny random one)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random models")
+    parser.add_argument("--cache", action="store_true", help="leave the result cache on")
+    parser.add_argument("--bcrypt-rounds", type=int, help="override BCRYPT_ROUNDS for the /token scenario")
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="diff two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=10, help="percent change that counts as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    sys.exit(1 if run(args) else 0)
+
+
+if __name__ == "__main__":
+    main()
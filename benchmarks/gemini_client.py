@@ -0,0 +1,87 @@
+"""
+Benchmark for the Dashboard's Gemini analysis client against the local stub
+(benchmarks/gemini_stub.py), so it runs offline.
+
+Two scenarios, each with the previous direct requests.post call and with
+GeminiClient:
+- reruns: the same text analyzed --reruns times, as when Streamlit reruns the
+  page, while the stub answers --overload-rate of requests with 503.
+- long text: one --long-chars character document; the stub's latency grows with
+  the prompt, as a model's does, and the client analyzes it in parallel chunks.
+
+Usage (from the project root):
+    python -m benchmarks.gemini_client --reruns 20 --overload-rate 0.3
+"""
+import argparse
+import json
+import time
+
+import requests
+
+from benchmarks.complexity_analysis import make_document
+from benchmarks.gemini_stub import start_stub_server
+from frontend.libs.gemini import ANALYSIS_PROMPT, GeminiClient, GeminiError
+
+
+def legacy_analysis(base_url, text):
+    """The Dashboard's previous call: no timeout, no retries, no cache."""
+    url = f"{base_url}/v1beta/models/gemini-1.5-flash-latest:generateContent?key=stub"
+    response = requests.post(url, json={"contents": [{"parts": [{"text": ANALYSIS_PROMPT.format(text=text)}]}]})
+    return response.status_code == 200
+
+
+def client_analysis(client, text):
+    try:
+        client.analyze(text)
+        return True
+    except GeminiError:
+        return False
+
+
+def run(fn, times):
+    started = time.perf_counter()
+    succeeded = sum(fn() for _ in range(times))
+    return {"succeeded": succeeded, "failed": times - succeeded, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def stub_requests(base_url):
+    return requests.get(f"{base_url}/stats").json()["requests"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--overload-rate", type=float, default=0.3)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--ms-per-1k-chars", type=float, default=20)
+    parser.add_argument("--long-chars", type=int, default=100_000)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    text = make_document(40)
+    long_text = "\n\n".join(make_document(20, seed=i) for i in range(args.long_chars // 2000 + 1))[:args.long_chars]
+    results = {}
+
+    server, base_url, _ = start_stub_server(0, args.latency_ms, args.ms_per_1k_chars, args.overload_rate)
+    client = GeminiClient("stub", base_url=base_url, backoff_base=0.1)
+    for name, fn in [("legacy", lambda: legacy_analysis(base_url, text)), ("client", lambda: client_analysis(client, text))]:
+        before = stub_requests(base_url)
+        results[f"reruns_{name}"] = {**run(fn, args.reruns), "api_requests": stub_requests(base_url) - before}
+    server.shutdown()
+
+    # No overload here, to time the long text on its own
+    server, base_url, _ = start_stub_server(0, args.latency_ms, args.ms_per_1k_chars, 0.0)
+    client = GeminiClient("stub", base_url=base_url)
+    results["long_legacy"] = run(lambda: legacy_analysis(base_url, long_text), 1)
+    results["long_client"] = {**run(lambda: client_analysis(client, long_text), 1), "api_requests": stub_requests(base_url) - 1}
+    server.shutdown()
+
+    for name, result in results.items():
+        print(f"{name:<16} {json.dumps(result)}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+A local stand-in for the Gemini generateContent API, for running the Dashboard's
+AI analysis and its benchmarks offline.
+
+It answers POST /v1beta/models/<model>:generateContent with a canned analysis
+of the prompt after --latency-ms (plus --ms-per-1k-chars per 1000 characters of
+request, as a model takes longer on longer prompts), and answers a share of
+requests (--overload-rate) with 503, like an overloaded model. GET /stats
+reports how many requests it has seen and the most that were in flight at once.
+
+To point the Dashboard at it, add to frontend/.streamlit/secrets.toml:
+    GEMINI_API_KEY = "stub"
+    GEMINI_BASE_URL = "http://127.0.0.1:8765"
+
+Usage (from the project root):
+    python -m benchmarks.gemini_stub --port 8765 --latency-ms 500 --overload-rate 0.2
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GENERATE_PATH = re.compile(r"^/v1beta/models/[^/:]+:generateContent$")
+
+
+def canned_response(prompt: str) -> str:
+    words = len(prompt.split())
+    return (
+        f"**Analysis:** The text (about {words} words) reads at a moderate level, with a neutral, "
+        "informative tone and a mix of short and long sentences.\n\n"
+        "**Suggestions:**\n"
+        "* Split the longest sentences in two.\n"
+        "* Replace technical terms with everyday words where possible.\n"
+        "* Start each paragraph with its main point.\n"
+    )
+
+
+class StubState:
+    def __init__(self, latency, per_1k_chars, overload_rate, seed):
+        self.latency = latency
+        self.per_1k_chars = per_1k_chars
+        self.overload_rate = overload_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "overloaded": 0, "in_flight": 0, "max_in_flight": 0}
+
+
+def make_handler(state: StubState):
+    class GeminiStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    self._send_json(200, dict(state.stats))
+            else:
+                self._send_json(404, {"error": {"message": "Not found"}})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if not GENERATE_PATH.match(self.path.split("?")[0]):
+                self._send_json(404, {"error": {"message": "Not found"}})
+                return
+            with state.lock:
+                state.stats["requests"] += 1
+                state.stats["in_flight"] += 1
+                state.stats["max_in_flight"] = max(state.stats["max_in_flight"], state.stats["in_flight"])
+                overloaded = state.random.random() < state.overload_rate
+            try:
+                time.sleep(state.latency + state.per_1k_chars * len(body) / 1000)
+                if overloaded:
+                    with state.lock:
+                        state.stats["overloaded"] += 1
+                    self._send_json(503, {"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}})
+                    return
+                prompt = json.loads(body)["contents"][0]["parts"][0]["text"]
+                self._send_json(200, {"candidates": [{"content": {"parts": [{"text": canned_response(prompt)}], "role": "model"}}]})
+            finally:
+                with state.lock:
+                    state.stats["in_flight"] -= 1
+
+    return GeminiStubHandler
+
+
+def start_stub_server(port=0, latency_ms=200, ms_per_1k_chars=0.0, overload_rate=0.0, seed=0):
+    """Starts the stub on a background thread; returns (server, base URL, state)."""
+    state = StubState(latency_ms / 1000, ms_per_1k_chars / 1000, overload_rate, seed)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--ms-per-1k-chars", type=float, default=0, help="extra latency per 1000 characters of request")
+    parser.add_argument("--overload-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, url, _ = start_stub_server(args.port, args.latency_ms, args.ms_per_1k_chars, args.overload_rate, args.seed)
+    print(f"Gemini stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
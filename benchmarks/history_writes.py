@@ -0,0 +1,142 @@
+"""
+Load test for history writes under concurrent summarize traffic.
+
+Each client thread stands in for a /summarize/ request: it spends some time in
+"inference" (a sleep, which like torch releases the GIL) and then saves a
+history entry through crud.create_history_entry in its own session. Reader
+threads page through history at the same time, like users on the History page.
+
+The test runs against a fresh SQLite file twice: with the previous settings
+(rollback journal, synchronous=FULL, default cache) and with the engine's
+current settings (WAL, synchronous=NORMAL, larger cache and mmap). Pass
+--database-url to run only the current settings against another database,
+e.g. Postgres.
+
+Usage (from the project root):
+    python -m benchmarks.history_writes --clients 16 --readers 4 --seconds 10
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud, models, schemas
+from backend.database import create_db_engine
+from backend.history_search import ensure_search_index
+
+CONFIGS = {
+    "before": {"journal_mode": "DELETE", "synchronous": "FULL", "cache_size_mb": 2, "mmap_size_mb": 0, "busy_timeout": 15},
+    "after": {},
+}
+
+ORIGINAL_TEXT = "The committee reviewed the proposal for a new library in considerable detail. " * 20
+RESULT_TEXT = "The committee reviewed the library proposal."
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_load(engine, clients, readers, seconds, inference_ms):
+    models.Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        for i in range(clients):
+            email = f"loadtest{i}@example.com"
+            if crud.get_user_by_email(db, email) is None:
+                db.add(models.User(email=email, username=f"loadtest{i}", full_name="Load Test", hashed_password="x"))
+        db.commit()
+
+    stop_at = time.perf_counter() + seconds
+    lock = threading.Lock()
+    write_latencies, errors, reads = [], [], [0]
+
+    def client(index):
+        history = schemas.HistoryCreate(
+            user_email=f"loadtest{index}@example.com",
+            operation_type="Summarize",
+            original_text=ORIGINAL_TEXT,
+            result_text=RESULT_TEXT,
+        )
+        while time.perf_counter() < stop_at:
+            time.sleep(inference_ms / 1000)
+            started = time.perf_counter()
+            try:
+                with Session() as db:
+                    crud.create_history_entry(db, history)
+                with lock:
+                    write_latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+
+    def reader(index):
+        email = f"loadtest{index % clients}@example.com"
+        while time.perf_counter() < stop_at:
+            try:
+                with Session() as db:
+                    crud.get_user_history(db, email, limit=20)
+                with lock:
+                    reads[0] += 1
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {
+        "inserts_per_second": round(len(write_latencies) / seconds, 1),
+        "reads_per_second": round(reads[0] / seconds, 1),
+        "insert_p50_ms": round(percentile(write_latencies, 50) * 1000, 2) if write_latencies else None,
+        "insert_p95_ms": round(percentile(write_latencies, 95) * 1000, 2) if write_latencies else None,
+        "insert_p99_ms": round(percentile(write_latencies, 99) * 1000, 2) if write_latencies else None,
+        "insert_mean_ms": round(statistics.mean(write_latencies) * 1000, 2) if write_latencies else None,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=16, help="concurrent summarize requests")
+    parser.add_argument("--readers", type=int, default=4, help="concurrent history page readers")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--inference-ms", type=float, default=20, help="simulated model time per request")
+    parser.add_argument("--database-url", help="run against this database instead of temporary SQLite files")
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    if args.database_url:
+        runs = [("after", args.database_url)]
+    else:
+        workdir = tempfile.mkdtemp(prefix="textmorph-history-")
+        runs = [(name, "sqlite:///" + os.path.join(workdir, f"{name}.db")) for name in CONFIGS]
+
+    for name, url in runs:
+        engine = create_db_engine(url, **CONFIGS[name])
+        results[name] = run_load(engine, args.clients, args.readers, args.seconds, args.inference_ms)
+        print(f"{name:>6}: {json.dumps(results[name])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the inference backends (fp32 PyTorch, dynamic int8, ONNX Runtime)
+on a fixed corpus: load time, model memory, summarization latency and how
+closely each backend's output agrees with the fp32 reference.
+
+Usage (from the project root):
+    python -m benchmarks.inference_backends --model sshleifer/distilbart-cnn-6-6
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+
+from transformers import pipeline
+
+from backend.inference_backends import BACKENDS, load_model
+from backend.model_registry import current_rss_bytes, estimate_model_bytes
+from benchmarks.summarize_batching import LENGTH_MAP, SAMPLE_TEXTS
+
+
+def unigram_f1(reference: str, candidate: str) -> float:
+    ref, cand = Counter(reference.lower().split()), Counter(candidate.lower().split())
+    overlap = sum((ref & cand).values())
+    if not overlap:
+        return 1.0 if not ref and not cand else 0.0
+    precision, recall = overlap / sum(cand.values()), overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_backend(model_name, backend, texts, max_len, min_len, repeats):
+    rss_before = current_rss_bytes()
+    started = time.perf_counter()
+    model, tokenizer = load_model("seq2seq", model_name, backend)
+    summarizer = pipeline("summarization", model=model, tokenizer=tokenizer)
+    load_seconds = time.perf_counter() - started
+    memory_bytes = estimate_model_bytes(model) or max(current_rss_bytes() - rss_before, 0)
+
+    # Warm up so one-off initialisation is not counted
+    summarizer(texts[0], max_length=max_len, min_length=min_len, do_sample=False, truncation=True)
+
+    latencies, outputs = [], []
+    for _ in range(repeats):
+        outputs = []
+        for text in texts:
+            started = time.perf_counter()
+            result = summarizer(text, max_length=max_len, min_length=min_len, do_sample=False, truncation=True)
+            latencies.append((time.perf_counter() - started) * 1000)
+            outputs.append(result[0]["summary_text"])
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 2),
+        "memory_mb": round(memory_bytes / (1024 * 1024), 1),
+        "latency_ms_mean": round(statistics.mean(latencies), 1),
+        "latency_ms_p50": round(percentile(latencies, 50), 1),
+        "latency_ms_p95": round(percentile(latencies, 95), 1),
+        "outputs": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-6-6", help="Model name or local path")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--length", default="short", choices=list(LENGTH_MAP))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    max_len = LENGTH_MAP[args.length]
+    min_len = int(max_len * 0.3)
+
+    results = []
+    for backend in args.backends:
+        try:
+            results.append(run_backend(args.model, backend, SAMPLE_TEXTS, max_len, min_len, args.repeats))
+        except Exception as e:
+            print(f"Skipping {backend}: {e}")
+
+    reference = next((r for r in results if r["backend"] == "pytorch"), results[0] if results else None)
+    for result in results:
+        pairs = list(zip(reference["outputs"], result["outputs"]))
+        result["exact_match"] = round(sum(a == b for a, b in pairs) / len(pairs), 3)
+        result["unigram_f1"] = round(statistics.mean(unigram_f1(a, b) for a, b in pairs), 3)
+
+    print(f"{'backend':>8} {'load s':>7} {'mem MB':>8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'exact':>6} {'F1':>6}")
+    for r in results:
+        print(
+            f"{r['backend']:>8} {r['load_seconds']:>7.2f} {r['memory_mb']:>8.1f} {r['latency_ms_mean']:>8.1f} "
+            f"{r['latency_ms_p50']:>8.1f} {r['latency_ms_p95']:>8.1f} {r['exact_match']:>6.2f} {r['unigram_f1']:>6.2f}"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "length": args.length, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Login throughput under concurrent summarize traffic.
+
+Starts the API with uvicorn twice, each time against a fresh SQLite file: once
+hashing passwords on the request threadpool as before (PASSWORD_HASH_WORKERS=0)
+and once with the password hashing processes. In each run, login clients call
+/token in a loop while summarize clients keep /summarize/ busy, and the script
+reports logins per second, login latency and summaries per second.
+
+Usage (from the project root):
+    python -m benchmarks.login_throughput --model sshleifer/distilbart-cnn-6-6 --logins 16 --summarizers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+CONFIGS = {
+    "before": {"PASSWORD_HASH_WORKERS": "0", "PASSWORD_HASH_CONCURRENCY": "40"},
+    "after": {},
+}
+
+EMAIL = "logintest@example.com"
+PASSWORD = "correct horse battery staple"
+SUMMARY_TEXT = (
+    "The city council met on Tuesday to discuss the new budget proposal. Members debated funding for "
+    "public transport, road repairs and the expansion of the central library. After several hours the "
+    "council agreed to postpone the final vote until more detailed cost estimates are available."
+)
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def start_server(port, database_url, env_overrides):
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        # Every summary must run the model, not come from the result cache
+        "RESULT_CACHE_ENABLED": "0",
+        "BATCH_WORKER_ENABLED": "0",
+        **env_overrides,
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+async def wait_until_ready(client, process, timeout=300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The server exited during startup")
+        try:
+            await client.get("/models")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.5)
+    raise RuntimeError("The server did not start in time")
+
+
+async def run_load(base_url, process, model, logins, summarizers, seconds):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        await wait_until_ready(client, process)
+        await client.post("/users/", json={"email": EMAIL, "username": "logintest", "full_name": "Login Test", "password": PASSWORD})
+        # Loads the summarization model before measuring
+        if summarizers:
+            (await client.post("/summarize/", json={"text": SUMMARY_TEXT, "model_name": model, "length": "short"})).raise_for_status()
+
+        stop_at = time.perf_counter() + seconds
+        login_latencies, summary_count, errors = [], [0], []
+
+        async def login_client():
+            while time.perf_counter() < stop_at:
+                started = time.perf_counter()
+                response = await client.post("/token", data={"username": EMAIL, "password": PASSWORD})
+                if response.status_code == 200:
+                    login_latencies.append(time.perf_counter() - started)
+                else:
+                    errors.append(response.status_code)
+
+        async def summarize_client(index):
+            while time.perf_counter() < stop_at:
+                # A different text each time, in case the result cache is on
+                text = f"{SUMMARY_TEXT} Request {index}-{summary_count[0]}."
+                response = await client.post("/summarize/", json={"text": text, "model_name": model, "length": "short"})
+                if response.status_code == 200:
+                    summary_count[0] += 1
+                else:
+                    errors.append(response.status_code)
+
+        await asyncio.gather(
+            *[login_client() for _ in range(logins)],
+            *[summarize_client(i) for i in range(summarizers)],
+        )
+
+    return {
+        "logins_per_second": round(len(login_latencies) / seconds, 1),
+        "login_p50_ms": round(percentile(login_latencies, 50) * 1000, 1) if login_latencies else None,
+        "login_p95_ms": round(percentile(login_latencies, 95) * 1000, 1) if login_latencies else None,
+        "login_p99_ms": round(percentile(login_latencies, 99) * 1000, 1) if login_latencies else None,
+        "summaries_per_second": round(summary_count[0] / seconds, 2),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-6-6", help="summarization model for the background load")
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--summarizers", type=int, default=4, help="concurrent summarize clients")
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="textmorph-logins-")
+    results = {}
+    for name, env_overrides in CONFIGS.items():
+        database_url = "sqlite:///" + os.path.join(workdir, f"{name}.db")
+        process = start_server(args.port, database_url, env_overrides)
+        try:
+            results[name] = asyncio.run(
+                run_load(f"http://127.0.0.1:{args.port}", process, args.model, args.logins, args.summarizers, args.seconds)
+            )
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{name:>6}: {json.dumps(results[name])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Microbenchmark for the readability scores on a long document.
+
+Compares the Dashboard's previous three textstat calls (Flesch-Kincaid, Gunning
+Fog and SMOG on the whole text) with the single-pass engine behind
+/readability/, which also breaks the scores down per page and paragraph. Each
+textstat call is timed on fresh text, since textstat caches results per text.
+
+Usage (from the project root):
+    python -m benchmarks.readability --pages 100
+"""
+import argparse
+import json
+import time
+
+import textstat
+
+from backend.readability import analyze_readability
+from benchmarks.complexity_analysis import make_document
+
+
+def make_pages(pages: int, paragraphs_per_page: int = 5, sentences_per_paragraph: int = 8):
+    return [
+        "\n\n".join(
+            make_document(sentences_per_paragraph, seed=page * paragraphs_per_page + paragraph)
+            for paragraph in range(paragraphs_per_page)
+        )
+        for page in range(pages)
+    ]
+
+
+def legacy_scores(text: str):
+    """What the Dashboard computed before, in the Streamlit process."""
+    return {
+        "flesch_kincaid_grade": textstat.flesch_kincaid_grade(text),
+        "gunning_fog": textstat.gunning_fog(text),
+        "smog_index": textstat.smog_index(text),
+    }
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages)
+    text = "\n\n".join(pages)
+
+    legacy, legacy_ms = timed(legacy_scores, text)
+    cold, cold_ms = timed(analyze_readability, pages)
+    # A different document, so only the per-word memo is warm
+    warm, warm_ms = timed(analyze_readability, [page + " Again." for page in pages])
+    engine = {metric: cold["document"][metric] for metric in legacy}
+
+    results = {
+        "pages": args.pages,
+        "words": cold["document"]["word_count"],
+        "legacy_ms": round(legacy_ms, 1),
+        "engine_cold_ms": round(cold_ms, 1),
+        "engine_warm_ms": round(warm_ms, 1),
+        "legacy_scores": legacy,
+        "engine_scores": engine,
+    }
+    print(f"pages:                 {args.pages} ({len(cold['paragraphs'])} paragraphs, {results['words']} words)")
+    print(f"legacy textstat:       {legacy_ms:>9.1f} ms  {legacy}")
+    print(f"engine (cold words):   {cold_ms:>9.1f} ms  {engine}")
+    print(f"engine (warm words):   {warm_ms:>9.1f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Throughput of sentiment analysis on a long document, sentence by sentence.
+
+Scores every sentence of a generated document (50 pages by default) four ways:
+the whole text in one call (what /sentiment/ did before, which only sees the
+opening), one pipeline call per sentence, batches in document order, and the
+length-sorted batches behind the long-text mode of /sentiment/. By default a
+tiny random classifier is built so it runs offline; pass --model to use a real one.
+
+Usage (from the project root):
+    python -m benchmarks.sentiment_long_document --pages 50 --batch-size 32
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from transformers import pipeline
+
+from backend.text_analysis import build_sentiment_timeline, classify_sentences, split_paragraph_sentences
+from benchmarks.readability import make_pages
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--model", help="sentiment model name or path (default: a tiny random model)")
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    text = "\n\n".join(make_pages(args.pages))
+    model = args.model
+    if model is None:
+        from benchmarks.tiny_models import build_tiny_models
+        _, model = build_tiny_models(tempfile.mkdtemp(prefix="textmorph-sentiment-"), [text])
+    classifier = pipeline("sentiment-analysis", model=model, tokenizer=model)
+
+    paragraphs, sentence_lists = split_paragraph_sentences(text)
+    sentences = [sentence for paragraph_sentences in sentence_lists for sentence in paragraph_sentences]
+    truncation = {"truncation": True, "max_length": args.max_length}
+
+    _, whole_seconds = timed(lambda: classifier(text, **truncation))
+    loop, loop_seconds = timed(lambda: [classifier(sentence, **truncation)[0] for sentence in sentences])
+    unsorted, unsorted_seconds = timed(lambda: classifier(sentences, batch_size=args.batch_size, **truncation))
+    batched, batched_seconds = timed(classify_sentences, classifier, sentences, args.batch_size, args.max_length)
+    timeline = build_sentiment_timeline(paragraphs, sentence_lists, batched)
+
+    agree = sum(a["label"] == b["label"] for a, b in zip(loop, batched))
+    results = {
+        "pages": args.pages,
+        "paragraphs": len(paragraphs),
+        "sentences": len(sentences),
+        "batch_size": args.batch_size,
+        "whole_text_ms": round(whole_seconds * 1000, 1),
+        "sentence_loop_ms": round(loop_seconds * 1000, 1),
+        "batched_unsorted_ms": round(unsorted_seconds * 1000, 1),
+        "batched_sorted_ms": round(batched_seconds * 1000, 1),
+        "label_agreement": round(agree / len(sentences), 4) if sentences else None,
+        "document_label": timeline["label"],
+    }
+    rate = lambda seconds: len(sentences) / seconds if seconds else 0
+    print(f"document:              {args.pages} pages, {len(paragraphs)} paragraphs, {len(sentences)} sentences")
+    print(f"whole text (truncated): {whole_seconds * 1000:>9.1f} ms")
+    print(f"sentence loop:          {loop_seconds * 1000:>9.1f} ms  {rate(loop_seconds):>8.0f} sentences/s")
+    print(f"batched, unsorted:      {unsorted_seconds * 1000:>9.1f} ms  {rate(unsorted_seconds):>8.0f} sentences/s")
+    print(f"batched, length-sorted: {batched_seconds * 1000:>9.1f} ms  {rate(batched_seconds):>8.0f} sentences/s")
+    print(f"labels matching the loop: {results['label_agreement']:.2%}; document label {timeline['label']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Throughput benchmark for the /summarize/ micro-batching scheduler.
+
+Runs the summarization pipeline directly (no HTTP) with N concurrent clients,
+once with batching disabled (max batch size 1) and once with the configured
+window and batch size, and reports requests per second for each.
+
+Usage (from the project root):
+    python -m benchmarks.summarize_batching --model sshleifer/distilbart-cnn-6-6
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from transformers import pipeline
+
+from backend.batching import MicroBatcher
+
+SAMPLE_TEXTS = [
+    "The city council met on Tuesday to discuss the new budget proposal. Members debated funding for "
+    "public transport, road repairs and the expansion of the central library. After several hours the "
+    "council agreed to postpone the final vote until more detailed cost estimates are available.",
+    "Researchers have developed a new battery chemistry that could double the range of electric cars. "
+    "The design replaces the graphite anode with silicon and uses a solid electrolyte that is less prone "
+    "to overheating. Commercial production is not expected for at least five years.",
+    "The museum's new exhibition brings together paintings from three centuries of European landscape art. "
+    "Curators spent two years negotiating loans from collections in Paris, Madrid and Vienna, and the show "
+    "is expected to attract more than a hundred thousand visitors before it closes in the spring.",
+    "A long dry summer has left reservoirs in the region at their lowest level in a decade. Water companies "
+    "have introduced a hosepipe ban and are asking households to cut their consumption, while farmers warn "
+    "that crop yields will suffer unless there is significant rainfall in the coming weeks.",
+]
+
+LENGTH_MAP = {"short": 50, "medium": 150, "long": 300}
+
+
+def run_clients(batcher, key, clients, requests_per_client):
+    def client(index):
+        for i in range(requests_per_client):
+            text = SAMPLE_TEXTS[(index + i) % len(SAMPLE_TEXTS)]
+            batcher.submit(key, text).result()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+    total = clients * requests_per_client
+    return {"clients": clients, "requests": total, "seconds": round(elapsed, 3), "rps": round(total / elapsed, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="sshleifer/distilbart-cnn-6-6", help="Model name or local path")
+    parser.add_argument("--length", default="short", choices=list(LENGTH_MAP))
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests-per-client", type=int, default=4)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--output", help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    summarizer = pipeline("summarization", model=args.model)
+    max_len = LENGTH_MAP[args.length]
+    min_len = int(max_len * 0.3)
+    key = (args.model, max_len, min_len)
+
+    def run_batch(batch_key, texts):
+        _, max_length, min_length = batch_key
+        results = summarizer(texts, max_length=max_length, min_length=min_length, do_sample=False, batch_size=len(texts))
+        return [result["summary_text"] for result in results]
+
+    # Warm up once so model initialisation is not counted.
+    run_batch(key, SAMPLE_TEXTS[:1])
+
+    modes = {
+        "unbatched": MicroBatcher(run_batch, window_seconds=0, max_batch_size=1, name="unbatched"),
+        "batched": MicroBatcher(run_batch, window_seconds=args.window_ms / 1000, max_batch_size=args.max_batch_size, name="batched"),
+    }
+
+    results = {}
+    for mode, batcher in modes.items():
+        results[mode] = [run_clients(batcher, key, clients, args.requests_per_client) for clients in args.clients]
+        batcher.shutdown()
+
+    print(f"{'clients':>8} {'unbatched rps':>14} {'batched rps':>12} {'speedup':>8}")
+    for plain, batched in zip(results["unbatched"], results["batched"]):
+        speedup = batched["rps"] / plain["rps"] if plain["rps"] else 0
+        print(f"{plain['clients']:>8} {plain['rps']:>14.2f} {batched['rps']:>12.2f} {speedup:>7.2f}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"model": args.model, "length": args.length, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Tiny, randomly initialized models for benchmarks that must run without network
+access. They produce nonsense, but they go through the same tokenizer, pipeline
+and generate code paths as the real models, so they measure the app's overhead.
+"""
+import os
+
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+from transformers import (
+    BartConfig,
+    BartForConditionalGeneration,
+    BertConfig,
+    BertForSequenceClassification,
+    PreTrainedTokenizerFast,
+)
+
+SPECIAL_TOKENS = ["<pad>", "<s>", "</s>", "<unk>"]
+
+
+def build_tokenizer(corpus, max_length=1024):
+    """A word-level tokenizer trained on `corpus` (a list of texts)."""
+    tokenizer = Tokenizer(models.WordLevel(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(corpus, trainers.WordLevelTrainer(special_tokens=SPECIAL_TOKENS))
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="$A </s>", special_tokens=[("</s>", tokenizer.token_to_id("</s>"))]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        pad_token="<pad>",
+        bos_token="<s>",
+        eos_token="</s>",
+        unk_token="<unk>",
+        model_max_length=max_length,
+    )
+
+
+def build_tiny_models(directory, corpus, seed=0, d_model=64, layers=2):
+    """
+    Saves a tiny BART (for summarization and paraphrasing) and a tiny BERT
+    sentiment classifier under `directory`; returns their paths.
+    """
+    torch.manual_seed(seed)
+    tokenizer = build_tokenizer(corpus)
+    ids = {token: tokenizer.convert_tokens_to_ids(token) for token in SPECIAL_TOKENS}
+
+    seq2seq_path = os.path.join(directory, "tiny-bart")
+    seq2seq = BartForConditionalGeneration(BartConfig(
+        vocab_size=len(tokenizer),
+        d_model=d_model,
+        encoder_layers=layers,
+        decoder_layers=layers,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=d_model * 2,
+        decoder_ffn_dim=d_model * 2,
+        max_position_embeddings=1024,
+        pad_token_id=ids["<pad>"],
+        bos_token_id=ids["<s>"],
+        eos_token_id=ids["</s>"],
+        decoder_start_token_id=ids["</s>"],
+        forced_eos_token_id=ids["</s>"],
+    ))
+    seq2seq.save_pretrained(seq2seq_path)
+    tokenizer.save_pretrained(seq2seq_path)
+
+    classifier_path = os.path.join(directory, "tiny-sentiment")
+    classifier = BertForSequenceClassification(BertConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=d_model,
+        num_hidden_layers=layers,
+        num_attention_heads=2,
+        intermediate_size=d_model * 2,
+        max_position_embeddings=1024,
+        pad_token_id=ids["<pad>"],
+        num_labels=3,
+        id2label={0: "LABEL_0", 1: "LABEL_1", 2: "LABEL_2"},
+        label2id={"LABEL_0": 0, "LABEL_1": 1, "LABEL_2": 2},
+    ))
+    classifier.save_pretrained(classifier_path)
+    tokenizer.save_pretrained(classifier_path)
+
+    return seq2seq_path, classifier_path
@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from libs.auth import store_tokens
 
 # Set the page configuration
 st.set_page_config(
@@ -38,6 +39,7 @@ with st.container(border=True):
                         st.success("Login Successful!", icon="🎉")
                         st.session_state.logged_in = True
                         st.session_state.user_email = email
+                        store_tokens(response.json())
                         try:
                             # Navigate to the main profile page
                             st.switch_page("pages/1_Profile.py") 
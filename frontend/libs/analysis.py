@@ -0,0 +1,32 @@
+import requests
+import streamlit as st
+
+from libs.auth import BACKEND_URL, authorized_request
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_analysis(texts):
+    """
+    Analyzes texts on the backend in one call: word and sentence counts, VADER
+    scores, the sentiment model's label and the complexity distribution of
+    each. Cached, since Streamlit reruns the page on every interaction;
+    failures raise, so they are not cached.
+    """
+    response = authorized_request("POST", f"{BACKEND_URL}/analyze/", json={"texts": list(texts)})
+    response.raise_for_status()
+    return response.json()["results"]
+
+
+def get_analysis(*texts):
+    """One analysis per text, or None (after showing the error) if the backend could not analyze them."""
+    try:
+        return fetch_analysis(texts)
+    except requests.exceptions.ConnectionError:
+        st.error("Could not connect to the backend. Is it running?")
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code in (429, 503):
+            retry_after = e.response.headers.get("Retry-After", "a few")
+            st.error(f"Text analysis is unavailable right now. Please try again in {retry_after} seconds.", icon="⏳")
+        else:
+            st.error(f"Error from backend: {e.response.status_code} - {e.response.text}")
+    return None
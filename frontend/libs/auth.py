@@ -0,0 +1,45 @@
+import requests
+import streamlit as st
+
+BACKEND_URL = "http://127.0.0.1:8000"
+
+
+def store_tokens(tokens):
+    """Keeps the tokens from /token or /token/refresh in the session."""
+    st.session_state.access_token = tokens["access_token"]
+    st.session_state.refresh_token = tokens["refresh_token"]
+
+
+def clear_tokens():
+    st.session_state.pop("access_token", None)
+    st.session_state.pop("refresh_token", None)
+
+
+def auth_headers():
+    token = st.session_state.get("access_token")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def refresh_tokens():
+    """Exchanges the refresh token for new tokens; returns False if the user must log in again."""
+    refresh_token = st.session_state.get("refresh_token")
+    if not refresh_token:
+        return False
+    response = requests.post(f"{BACKEND_URL}/token/refresh", json={"refresh_token": refresh_token})
+    if response.status_code != 200:
+        clear_tokens()
+        st.session_state.logged_in = False
+        return False
+    store_tokens(response.json())
+    return True
+
+
+def authorized_request(method, url, **kwargs):
+    """
+    Sends a request with the user's access token. An expired access token is
+    refreshed once and the request retried.
+    """
+    response = requests.request(method, url, headers=auth_headers(), **kwargs)
+    if response.status_code == 401 and refresh_tokens():
+        response = requests.request(method, url, headers=auth_headers(), **kwargs)
+    return response
@@ -0,0 +1,49 @@
+import requests
+import streamlit as st
+
+from libs.auth import BACKEND_URL
+from libs.sse import iter_sse_events
+
+
+def extract_uploaded_pages(uploaded_file):
+    """
+    Extracts the text of an uploaded .txt, .pdf, .docx or .pptx file on the
+    backend, showing progress as pages arrive; returns the list of pages, or []
+    on error. Streamlit reruns the page on every interaction, so the pages of
+    each upload are kept in the session and the file is only sent once.
+    """
+    extracted = st.session_state.setdefault("extracted_uploads", {})
+    if uploaded_file.file_id in extracted:
+        return extracted[uploaded_file.file_id]
+
+    pages = []
+    progress = st.empty()
+    try:
+        response = requests.post(
+            f"{BACKEND_URL}/extract/stream",
+            files={"file": (uploaded_file.name, uploaded_file, uploaded_file.type)},
+            stream=True,
+        )
+        if response.status_code != 200:
+            st.error(f"Could not extract text: {response.json().get('detail', response.text)}")
+            return []
+        for event, data in iter_sse_events(response):
+            if event == "page":
+                pages.append(data["text"])
+                progress.caption(f"Extracted {len(pages)} page(s)...")
+            elif event == "error":
+                st.error(data.get("detail"))
+                return []
+    except requests.exceptions.ConnectionError:
+        st.error("Could not connect to the backend. Is it running?")
+        return []
+    finally:
+        progress.empty()
+
+    extracted[uploaded_file.file_id] = pages
+    return pages
+
+
+def extract_uploaded_file(uploaded_file):
+    """The text of an uploaded file, its pages separated by blank lines ("" on error)."""
+    return "\n\n".join(extract_uploaded_pages(uploaded_file))
@@ -0,0 +1,208 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com"
+GEMINI_MODEL = "gemini-1.5-flash-latest"
+# Statuses worth retrying: rate limited, overloaded, or a transient server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+ANALYSIS_PROMPT = """
+Analyze the following text for readability and tone. Provide two sections in your response:
+1.  **Analysis:** A brief, one-paragraph analysis of the text's complexity, style, and overall tone.
+2.  **Suggestions:** A bulleted list of 3-4 specific, actionable suggestions to improve the text's clarity and readability.
+
+Here is the text:
+---
+{text}
+"""
+
+CHUNK_PROMPT = """
+The following is part {part} of {parts} of a longer text. In a few bullet points, note its
+complexity, style and tone, and anything that makes it hard to read. Quote examples briefly.
+
+---
+{text}
+"""
+
+COMBINE_PROMPT = """
+Below are notes on the readability and tone of each part of a long text. Based on them, provide
+two sections in your response:
+1.  **Analysis:** A brief, one-paragraph analysis of the whole text's complexity, style, and overall tone.
+2.  **Suggestions:** A bulleted list of 3-4 specific, actionable suggestions to improve the text's clarity and readability.
+
+{notes}
+"""
+
+
+class GeminiError(Exception):
+    """The Gemini API could not answer; `status` is the last HTTP status, if any."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def split_analysis(full_text: str):
+    """Splits a response into its Analysis and Suggestions sections, without their (bold) headings."""
+    parts = re.split(r"[#*\s]*(?:\d+\.\s*)?\**Suggestions:\**", full_text, maxsplit=1)
+    analysis = re.sub(r"^[#*\s]*(?:\d+\.\s*)?\**Analysis:\**", "", parts[0]).strip()
+    return analysis, parts[1].strip() if len(parts) > 1 else ""
+
+
+def chunk_text(text: str, max_chars: int):
+    """Splits text into chunks of at most about `max_chars`, on paragraph (or else sentence) boundaries."""
+    chunks, current = [], ""
+    for piece in re.split(r"(?<=\n\n)|(?<=[.!?] )", text):
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current.strip())
+            current = ""
+        current += piece
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+class GeminiClient:
+    """
+    A Gemini generateContent client for the Dashboard's AI analysis.
+
+    - Responses are cached by a hash of the model and prompt for `cache_ttl`
+      seconds, so rerunning the page with the same text does not call the API.
+    - One pooled HTTP session is reused for every request.
+    - At most `max_concurrency` requests are in flight at once; 429 and 5xx
+      answers are retried up to `max_retries` times with full-jitter exponential
+      backoff (or the server's Retry-After).
+    - Texts longer than `chunk_chars` are analyzed in chunks in parallel, and the
+      chunk notes are then combined into one analysis.
+    """
+
+    def __init__(
+            self,
+            api_key: str,
+            model: str = GEMINI_MODEL,
+            base_url: str = GEMINI_BASE_URL,
+            timeout: float = 60,
+            max_concurrency: int = 4,
+            max_retries: int = 4,
+            backoff_base: float = 1.0,
+            backoff_max: float = 20.0,
+            cache_ttl: float = 3600,
+            cache_size: int = 256,
+            chunk_chars: int = 20_000,
+        ):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.chunk_chars = chunk_chars
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._cache = OrderedDict()  # key -> (expires at, response text)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "cache_hits": 0, "cache_misses": 0}
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    # --- Cache ---
+    def _cache_key(self, prompt: str) -> str:
+        return hashlib.sha256(f"{self.model}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[0] < now:
+                self._cache.pop(key, None)
+                self.stats["cache_misses"] += 1
+                return None
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return entry[1]
+
+    def _cache_set(self, key, value):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # --- Requests ---
+    def _backoff(self, attempt: int, retry_after=None) -> float:
+        try:
+            if retry_after is not None:
+                return min(self.backoff_max, float(retry_after))
+        except ValueError:
+            pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _post(self, prompt: str) -> str:
+        url = f"{self.base_url}/v1beta/models/{self.model}:generateContent"
+        payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        status = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            try:
+                with self._slots:
+                    self._count("requests")
+                    response = self.session.post(url, params={"key": self.api_key}, json=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                status, retry_after, message = None, None, f"Could not connect to Gemini API: {e}"
+            else:
+                status = response.status_code
+                if status == 200:
+                    result = response.json()
+                    # Safely parse the nested JSON response to extract the generated text
+                    return result.get("candidates", [{}])[0].get("content", {}).get("parts", [{}])[0].get("text", "")
+                if status not in RETRY_STATUSES:
+                    raise GeminiError(f"Error calling Gemini API: {response.text}", status)
+                retry_after, message = response.headers.get("Retry-After"), f"Gemini API returned {status}"
+            if attempt < self.max_retries:
+                # Sleep outside the concurrency slot, so other requests can go ahead
+                time.sleep(self._backoff(attempt, retry_after))
+        raise GeminiError(message, status)
+
+    def generate(self, prompt: str) -> str:
+        """The model's response to `prompt`, from the cache if it was asked recently."""
+        key = self._cache_key(prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        text = self._post(prompt)
+        self._cache_set(key, text)
+        return text
+
+    def analyze(self, text: str):
+        """Returns (analysis, suggestions) for `text`; raises GeminiError."""
+        chunks = chunk_text(text, self.chunk_chars) if len(text) > self.chunk_chars else [text]
+        if len(chunks) == 1:
+            return split_analysis(self.generate(ANALYSIS_PROMPT.format(text=text)))
+
+        prompts = [CHUNK_PROMPT.format(part=i + 1, parts=len(chunks), text=chunk) for i, chunk in enumerate(chunks)]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            notes = list(executor.map(self.generate, prompts))
+        combined = "\n\n".join(f"Part {i + 1}:\n{note}" for i, note in enumerate(notes))
+        return split_analysis(self.generate(COMBINE_PROMPT.format(notes=combined)))
+
+    def close(self):
+        self.session.close()
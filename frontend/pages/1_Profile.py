@@ -1,5 +1,6 @@
 import streamlit as st
 import requests
+from libs.auth import authorized_request, clear_tokens
 
 # --- Check Login Status ---
 if not st.session_state.get('logged_in', False):
@@ -11,7 +12,7 @@ def fetch_profile_data():
     email = st.session_state.user_email
     backend_url = f"http://127.0.0.1:8000/profile/{email}"
     try:
-        response = requests.get(backend_url)
+        response = authorized_request("GET", backend_url)
         if response.status_code == 200:
             return response.json()
         else:
@@ -72,7 +73,7 @@ else:
             }
             update_url = f"http://127.0.0.1:8000/profile/{st.session_state.user_email}"
             try:
-                response = requests.put(update_url, json=update_payload)
+                response = authorized_request("PUT", update_url, json=update_payload)
                 if response.status_code == 200:
                     st.success("Profile updated successfully!")
                 else:
@@ -85,6 +86,7 @@ else:
     if st.button("Logout", use_container_width=True):
         st.session_state.logged_in = False
         st.session_state.user_email = ""
+        clear_tokens()
         st.success("You have been logged out.")
         st.switch_page("app.py")
 
@@ -1,12 +1,10 @@
 import streamlit as st
-import textstat
 import plotly.express as px
 import pandas as pd
 import requests
-# Imports for file parsing
-import fitz  # PyMuPDF
-import docx
-from pptx import Presentation
+from libs.auth import authorized_request
+from libs.documents import extract_uploaded_pages
+from libs.gemini import GEMINI_BASE_URL, GeminiClient, GeminiError
 
 # --- Check Login Status ---
 # Ensures that only logged-in users can access this page
@@ -14,94 +12,84 @@ if not st.session_state.get('logged_in', False):
     st.error("You need to log in to view this page.")
     st.stop() # Halts the execution of the script
 
-# --- Gemini API Call Function ---
+# --- Gemini API Client ---
+@st.cache_resource
+def get_gemini_client(api_key, base_url):
+    """
+    One client per server process, so its response cache and connection pool
+    outlive Streamlit's reruns. GEMINI_BASE_URL in secrets.toml can point it at
+    the local stub (python -m benchmarks.gemini_stub) to run offline.
+    """
+    return GeminiClient(api_key, base_url=base_url)
+
 def get_ai_analysis(text):
     """
-    Calls the Gemini API to get a qualitative analysis of the provided text.
-    Handles potential errors like missing API keys or network issues.
+    Gets a qualitative analysis of the provided text from the Gemini API.
+    Identical text is answered from the client's cache; overloaded-model errors
+    are retried with backoff before an error is shown.
     """
     try:
         # Securely fetch the API key from Streamlit's secrets management
         api_key = st.secrets["GEMINI_API_KEY"]
-    except FileNotFoundError:
+        base_url = st.secrets.get("GEMINI_BASE_URL", GEMINI_BASE_URL)
+    except (FileNotFoundError, KeyError):
         st.error("Please add your Gemini API key to .streamlit/secrets.toml")
         return None, None
 
-    # Define the specific API endpoint URL
-    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent?key={api_key}"
-    
-    # Construct the prompt with clear instructions for the AI model
-    prompt = f"""
-    Analyze the following text for readability and tone. Provide two sections in your response:
-    1.  **Analysis:** A brief, one-paragraph analysis of the text's complexity, style, and overall tone.
-    2.  **Suggestions:** A bulleted list of 3-4 specific, actionable suggestions to improve the text's clarity and readability.
-
-    Here is the text:
-    ---
-    {text}
-    """
-
-    # Structure the payload according to the Gemini API's requirements
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
-    headers = {'Content-Type': 'application/json'}
-    
     try:
-        # Make the POST request to the API
-        response = requests.post(api_url, json=payload, headers=headers)
-        
-        # Check the HTTP status code from the response
-        if response.status_code == 200:
-            result = response.json()
-            # Safely parse the nested JSON response to extract the generated text
-            full_text = result.get('candidates', [{}])[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-            # Split the text into the two predefined sections for clean presentation
-            if "Suggestions:" in full_text:
-                analysis_part = full_text.split("Suggestions:")[0].replace("Analysis:", "").strip()
-                suggestions_part = "Suggestions:" + full_text.split("Suggestions:")[1]
-                return analysis_part, suggestions_part
-            else:
-                return full_text, "" # Return the full text if splitting fails
-        # UPDATED: Specific handling for the "model overloaded" error
-        elif response.status_code == 503:
+        return get_gemini_client(api_key, base_url).analyze(text)
+    except GeminiError as e:
+        if e.status == 503:
             st.error("The AI model is currently overloaded. Please wait a moment and try again.", icon="⏳")
-            return None, None
         else:
-            # Handle other potential API errors
-            st.error(f"Error calling Gemini API: {response.text}")
-            return None, None
-    except requests.exceptions.RequestException as e:
-        # Handle network-level errors
-        st.error(f"Could not connect to Gemini API: {e}")
+            st.error(str(e))
         return None, None
 
-# --- Helper function for soft classification ---
-def calculate_level_percentages(grade):
+# --- Readability Scores ---
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_readability(pages):
     """
-    Calculates a 'soft' classification percentage for each level based on the
-    Flesch-Kincaid grade. This provides a more nuanced view than a hard classification.
+    Scores the text on the backend, which computes all the metrics in one pass
+    and breaks them down per page and paragraph. Cached, since Streamlit reruns
+    the page on every interaction; failures raise, so they are not cached.
     """
-    # Define the ideal "peak" grade for each category
-    b_peak, i_peak, a_peak = 5.0, 10.0, 15.0
-    
-    # Calculate the distance from the text's grade to each peak
-    dist_b = abs(grade - b_peak)
-    dist_i = abs(grade - i_peak)
-    dist_a = abs(grade - a_peak)
-    
-    # Invert the distances so that closer scores get higher values
-    # Add a small constant to prevent division by zero
-    inv_dist_b = 1 / (dist_b + 0.1)
-    inv_dist_i = 1 / (dist_i + 0.1)
-    inv_dist_a = 1 / (dist_a + 0.1)
-    
-    # Normalize the values to get a percentage distribution
-    total_inv_dist = inv_dist_b + inv_dist_i + inv_dist_a
-    percentages = {
-        "Beginner": (inv_dist_b / total_inv_dist) * 100,
-        "Intermediate": (inv_dist_i / total_inv_dist) * 100,
-        "Advanced": (inv_dist_a / total_inv_dist) * 100,
-    }
-    return percentages
+    response = requests.post("http://127.0.0.1:8000/readability/", json={"pages": pages})
+    response.raise_for_status()
+    return response.json()
+
+def get_readability(pages):
+    try:
+        return fetch_readability(pages)
+    except requests.exceptions.ConnectionError:
+        st.error("Could not connect to the backend. Is it running?")
+    except requests.exceptions.HTTPError as e:
+        st.error(f"Error from backend: {e.response.status_code} - {e.response.text}")
+    return None
+
+# --- Sentiment Timeline ---
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_sentiment_timeline(text):
+    """
+    Scores every sentence on the backend in batches and combines the labels per
+    paragraph and for the whole text, so long documents are not cut off at the
+    model's input limit. Failures raise, so they are not cached.
+    """
+    response = authorized_request(
+        "POST",
+        "http://127.0.0.1:8000/sentiment/",
+        json={"text": text, "mode": "sentences", "include_sentences": False},
+    )
+    response.raise_for_status()
+    return response.json()
+
+def get_sentiment_timeline(text):
+    try:
+        return fetch_sentiment_timeline(text)
+    except requests.exceptions.ConnectionError:
+        st.error("Could not connect to the backend. Is it running?")
+    except requests.exceptions.HTTPError as e:
+        st.error(f"Error from backend: {e.response.status_code} - {e.response.text}")
+    return None
 
 # --- Main Dashboard UI ---
 st.title("📝 Readability Analysis Dashboard")
@@ -113,12 +101,14 @@ st.subheader("Provide Your Text")
 input_method = st.tabs(["Paste Text", "Upload File"])
 
 text_input = "" # Initialize an empty string to hold the user's text
+pages_input = [] # The same text split into pages, for the per-page breakdown
 
 # Tab 1: Pasting text directly
 with input_method[0]:
     pasted_text = st.text_area("Paste your text here", height=250, key="pasted_text_area")
     if pasted_text:
         text_input = pasted_text
+        pages_input = [pasted_text]
 
 # Tab 2: Uploading a file
 with input_method[1]:
@@ -127,28 +117,12 @@ with input_method[1]:
         type=['txt', 'pdf', 'docx', 'pptx']
     )
     if uploaded_file is not None:
-        try:
-            # Check the MIME type to determine how to parse the file
-            if uploaded_file.type == "text/plain":
-                text_input = uploaded_file.getvalue().decode("utf-8")
-            elif uploaded_file.type == "application/pdf":
-                with fitz.open(stream=uploaded_file.read(), filetype="pdf") as doc:
-                    text_input = "".join(page.get_text() for page in doc)
-            elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                doc = docx.Document(uploaded_file)
-                text_input = "\n".join([para.text for para in doc.paragraphs])
-            elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
-                prs = Presentation(uploaded_file)
-                text_input = ""
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text"):
-                            text_input += shape.text + "\n"
-            
+        # Parsed by the backend, which caches each file's text by its content
+        pages_input = extract_uploaded_pages(uploaded_file)
+        text_input = "\n\n".join(pages_input)
+        if text_input:
             # Display the extracted text in a disabled text area for confirmation
             st.text_area("Extracted Content", text_input, height=250, disabled=True)
-        except Exception as e:
-            st.error(f"Error reading or processing file: {e}")
 
 # --- Analysis Section ---
 # This entire block only runs if text has been provided
@@ -156,41 +130,92 @@ if text_input:
     st.divider()
     st.subheader("Readability Scores")
     
-    # Calculate the three main readability metrics using the textstat library
-    fk_grade = textstat.flesch_kincaid_grade(text_input)
-    gunning_fog = textstat.gunning_fog(text_input)
-    smog_index = textstat.smog_index(text_input)
-
-    # Use a three-column layout to display the scores neatly
-    col1, col2, col3 = st.columns(3)
-    col1.metric("Flesch-Kincaid Grade", f"{fk_grade:.2f}")
-    col2.metric("Gunning Fog Index", f"{gunning_fog:.2f}")
-    col3.metric("SMOG Index", f"{smog_index:.2f}")
-
-    st.subheader("Text Composition Analysis")
-    
-    # Get the percentage breakdown from our helper function
-    percentages = calculate_level_percentages(fk_grade)
-    # Determine the primary level for a quick summary message
-    primary_level = max(percentages, key=percentages.get)
-    st.info(f"This text most closely resembles an **{primary_level}** level.")
-
-    # Create a Pandas DataFrame, which is the required input format for Plotly
-    chart_data = pd.DataFrame(list(percentages.items()), columns=["Level", "Percentage"])
-    
-    # Create the interactive bar chart using Plotly Express
-    fig = px.bar(chart_data, 
-                 x="Level", 
-                 y="Percentage", 
-                 text=chart_data['Percentage'].apply(lambda x: f'{x:.1f}%'), # Format text labels
-                 color="Level",
-                 color_discrete_map={  # Define custom colors for each category
-                     "Beginner": "#5cb85c",
-                     "Intermediate": "#f0ad4e",
-                     "Advanced": "#d9534f"
-                 })
-    # Render the Plotly chart in the Streamlit app
-    st.plotly_chart(fig, use_container_width=True)
+    readability = get_readability(pages_input)
+    if readability:
+        scores = readability["document"]
+
+        # Use a three-column layout to display the scores neatly
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Flesch-Kincaid Grade", f"{scores['flesch_kincaid_grade']:.2f}")
+        col2.metric("Gunning Fog Index", f"{scores['gunning_fog']:.2f}")
+        col3.metric("SMOG Index", f"{scores['smog_index']:.2f}")
+
+        st.subheader("Text Composition Analysis")
+
+        # The share of the text's words in paragraphs at each level
+        percentages = {level.capitalize(): share for level, share in readability["levels"].items()}
+        # Determine the primary level for a quick summary message
+        primary_level = max(percentages, key=percentages.get)
+        st.info(f"This text most closely resembles an **{primary_level}** level.")
+
+        # Create a Pandas DataFrame, which is the required input format for Plotly
+        chart_data = pd.DataFrame(list(percentages.items()), columns=["Level", "Percentage"])
+
+        # Create the interactive bar chart using Plotly Express
+        fig = px.bar(chart_data,
+                     x="Level",
+                     y="Percentage",
+                     text=chart_data['Percentage'].apply(lambda x: f'{x:.1f}%'), # Format text labels
+                     color="Level",
+                     color_discrete_map={  # Define custom colors for each category
+                         "Beginner": "#5cb85c",
+                         "Intermediate": "#f0ad4e",
+                         "Advanced": "#d9534f"
+                     })
+        # Render the Plotly chart in the Streamlit app
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Where the text gets harder: grade per page for documents, per paragraph otherwise
+        breakdown = readability["pages"] if readability["page_count"] > 1 else readability["paragraphs"]
+        if len(breakdown) > 1:
+            unit = "Page" if readability["page_count"] > 1 else "Paragraph"
+            breakdown_data = pd.DataFrame({
+                unit: [item.get("page" if unit == "Page" else "index") + 1 for item in breakdown],
+                "Flesch-Kincaid Grade": [item["flesch_kincaid_grade"] for item in breakdown],
+                "Gunning Fog Index": [item["gunning_fog"] for item in breakdown],
+                "SMOG Index": [item["smog_index"] for item in breakdown],
+            })
+            fig_breakdown = px.line(
+                breakdown_data.melt(id_vars=unit, var_name="Metric", value_name="Score"),
+                x=unit,
+                y="Score",
+                color="Metric",
+                title=f"<b>Readability by {unit}</b>",
+                markers=len(breakdown) <= 50,
+                template='plotly_white'
+            )
+            fig_breakdown.update_layout(title_x=0.5)
+            st.plotly_chart(fig_breakdown, use_container_width=True)
+
+    st.divider()
+    st.subheader("💬 Sentiment Timeline")
+
+    if st.button("Analyze Sentiment", use_container_width=True):
+        with st.spinner("Scoring the sentiment of every sentence..."):
+            timeline = get_sentiment_timeline(text_input)
+        if timeline and timeline["label"]:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Overall Sentiment", timeline["label"], help="The label with the largest share of the sentence scores, weighted by sentence length")
+            col2.metric("Sentences", timeline["sentence_count"])
+            col3.metric("Paragraphs", timeline["paragraph_count"])
+
+            # The share of each label in every paragraph, in document order
+            timeline_data = pd.DataFrame([
+                {"Paragraph": paragraph["index"] + 1, "Label": label, "Share": paragraph["label_shares"].get(label, 0)}
+                for paragraph in timeline["paragraphs"]
+                for label in timeline["label_shares"]
+            ])
+            if timeline["paragraph_count"] > 1 and not timeline_data.empty:
+                fig_timeline = px.area(
+                    timeline_data,
+                    x="Paragraph",
+                    y="Share",
+                    color="Label",
+                    title="<b>Sentiment by Paragraph</b>",
+                    template='plotly_white'
+                )
+                fig_timeline.update_layout(title_x=0.5)
+                st.plotly_chart(fig_timeline, use_container_width=True)
 
     st.divider()
     st.subheader("🤖 AI-Powered Analysis & Suggestions")
@@ -1,6 +1,8 @@
+import html
 import streamlit as st
 import requests
 import pandas as pd
+from libs.auth import authorized_request
 
 # --- Check Login Status ---
 if not st.session_state.get('logged_in', False):
@@ -11,50 +13,143 @@ st.title("📖 Your Transformation History")
 st.markdown("Here is a record of your recent paraphrasing activities.")
 
 # --- Fetch History Data ---
+BACKEND_URL = "http://127.0.0.1:8000"
+PAGE_SIZE = 20
+
 # Cache data for 60 seconds to avoid re-fetching on every interaction
 @st.cache_data(ttl=60)
-def fetch_history(email):
-    """Fetches user history from the backend API."""
-    backend_url = f"http://127.0.0.1:8000/history/{email}"
+def fetch_history_page(email, operation_type=None, since=None, until=None, cursor=None):
+    """Fetches one page of history previews (newest first) from the backend API."""
+    params = {"limit": PAGE_SIZE}
+    if operation_type:
+        params["operation_type"] = operation_type
+    if since:
+        params["since"] = since
+    if until:
+        params["until"] = until
+    if cursor:
+        params["cursor"] = cursor
     try:
-        response = requests.get(backend_url)
+        response = authorized_request("GET", f"{BACKEND_URL}/history/{email}", params=params)
         if response.status_code == 200:
             return response.json()
         else:
             st.error(f"Could not fetch your history (Error: {response.status_code}).")
-            return []
+            return {"items": [], "next_cursor": None}
+    except requests.exceptions.ConnectionError:
+        st.error("Could not connect to the backend. Is it running?")
+        return {"items": [], "next_cursor": None}
+
+@st.cache_data(ttl=600)
+def fetch_history_entry(email, entry_id):
+    """Fetches the full texts of a single history entry."""
+    try:
+        response = authorized_request("GET", f"{BACKEND_URL}/history/{email}/{entry_id}")
+        if response.status_code == 200:
+            return response.json()
+        st.error(f"Could not load this entry (Error: {response.status_code}).")
+    except requests.exceptions.ConnectionError:
+        st.error("Could not connect to the backend. Is it running?")
+    return None
+
+@st.cache_data(ttl=60)
+def search_history(email, query):
+    """Runs a full-text search over the user's history."""
+    try:
+        response = authorized_request("GET", f"{BACKEND_URL}/history/{email}/search", params={"q": query, "limit": 50})
+        if response.status_code == 200:
+            return response.json()
+        st.error(f"Search failed (Error: {response.status_code}).")
     except requests.exceptions.ConnectionError:
         st.error("Could not connect to the backend. Is it running?")
-        return []
+    return []
+
+def highlight(snippet):
+    """Escapes a search snippet while keeping the highlighting of matched words."""
+    return html.escape(snippet or "").replace("&lt;b&gt;", "<b>").replace("&lt;/b&gt;", "</b>")
+
+# --- Search ---
+search_query = st.text_input("🔍 Search your history", placeholder="e.g. quantum comput*")
+if search_query.strip():
+    matches = search_history(st.session_state.user_email, search_query)
+    if not matches:
+        st.info("No history entries match your search.")
+    for match in matches:
+        timestamp = pd.to_datetime(match['timestamp']).strftime('%B %d, %Y at %I:%M %p')
+        with st.expander(f"**{match['operation_type']}** on {timestamp}"):
+            st.markdown(f"**Original:** {highlight(match['original_snippet'])}", unsafe_allow_html=True)
+            st.markdown(f"**Result:** {highlight(match['result_snippet'])}", unsafe_allow_html=True)
+            if st.toggle("Show full text", key=f"search_full_{match['id']}"):
+                full_entry = fetch_history_entry(st.session_state.user_email, match['id'])
+                if full_entry:
+                    st.text_area("Original", value=full_entry['original_text'], height=200, disabled=True, key=f"search_orig_{match['id']}")
+                    st.text_area("Result", value=full_entry['result_text'], height=200, disabled=True, key=f"search_trans_{match['id']}")
+    st.stop()
+
+# --- Filters ---
+filter_col1, filter_col2 = st.columns(2)
+with filter_col1:
+    operation_filter = st.selectbox("Operation", ["All", "Summarize", "Paraphrase"])
+with filter_col2:
+    date_range = st.date_input("Date range", value=())
+
+operation_type = None if operation_filter == "All" else operation_filter
+since = until = None
+if len(date_range) == 2:
+    since = date_range[0].isoformat()
+    # The end date is inclusive
+    until = (date_range[1] + pd.Timedelta(days=1)).isoformat()
+
+# The number of pages shown grows with "Load more"; changing a filter starts over
+filters = (operation_type, since, until)
+if st.session_state.get("history_filters") != filters:
+    st.session_state.history_filters = filters
+    st.session_state.history_pages = 1
 
 # Fetch data using the logged-in user's email from the session state
-history_data = fetch_history(st.session_state.user_email)
+history_data, cursor = [], None
+for _ in range(st.session_state.history_pages):
+    page = fetch_history_page(st.session_state.user_email, operation_type, since, until, cursor)
+    history_data.extend(page["items"])
+    cursor = page["next_cursor"]
+    if not cursor:
+        break
 
-if not history_data:
+def show_text(label, preview, full_length, full_text, key):
+    st.subheader(label)
+    value = full_text if full_text is not None else preview + ("…" if full_length > len(preview) else "")
+    st.text_area(label, value=value, height=200, disabled=True, key=key)
+
+if not history_data and any(filters):
+    st.info("No history entries match these filters.")
+elif not history_data:
     st.info("You don't have any saved history yet. Use the paraphraser to get started!")
 else:
-    # Display each history entry in an expander, showing the most recent items first
-    for entry in reversed(history_data):
+    # Entries arrive most recent first; each shows a preview until its full text is requested
+    for entry in history_data:
         timestamp = pd.to_datetime(entry['timestamp']).strftime('%B %d, %Y at %I:%M %p')
 
         with st.expander(f"**{entry['operation_type']}** on {timestamp}"):
+            full_entry = None
+            is_truncated = (
+                entry['original_length'] > len(entry['original_preview'])
+                or entry['result_length'] > len(entry['result_preview'])
+            )
+            if is_truncated and st.toggle("Show full text", key=f"full_{entry['id']}"):
+                full_entry = fetch_history_entry(st.session_state.user_email, entry['id'])
+
             col1, col2 = st.columns(2)
             with col1:
-                st.subheader("Original Text")
-                st.text_area(
-                    "Original",
-                    value=entry['original_text'],
-                    height=200,
-                    disabled=True,
-                    key=f"orig_{entry['id']}"
+                show_text(
+                    "Original Text", entry['original_preview'], entry['original_length'],
+                    full_entry['original_text'] if full_entry else None, f"orig_{entry['id']}",
                 )
             with col2:
-                st.subheader("Result")
-                st.text_area(
-                    "Result",
-                    value=entry['result_text'],
-                    height=200,
-                    disabled=True,
-                    key=f"trans_{entry['id']}"
+                show_text(
+                    "Result", entry['result_preview'], entry['result_length'],
+                    full_entry['result_text'] if full_entry else None, f"trans_{entry['id']}",
                 )
 
+    if cursor and st.button("Load more"):
+        st.session_state.history_pages += 1
+        st.rerun()
@@ -1,12 +1,12 @@
 import streamlit as st
 import requests
-import nltk
 from rouge_score import rouge_scorer
 import plotly.express as px
 import pandas as pd
-import docx
-import PyPDF2
-from io import BytesIO, StringIO
+from libs.analysis import get_analysis
+from libs.auth import authorized_request
+from libs.documents import extract_uploaded_file
+from libs.sse import iter_sse_events
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -20,42 +20,6 @@ if not st.session_state.get('logged_in', False):
     st.error("You need to log in to view this page.")
     st.warning("Please log in or create an account from the main page.")
     st.stop()
-# --- Text Extraction Functions ---
-def extract_text_from_pdf(file_bytes):
-    """Extracts text from a PDF file."""
-    try:
-        pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
-        text = "".join(page.extract_text() or "" for page in pdf_reader.pages)
-        return text
-    except Exception as e:
-        st.error(f"Error reading PDF file: {e}")
-        return ""
-
-def extract_text_from_docx(file_bytes):
-    """Extracts text from a DOCX file."""
-    try:
-        doc = docx.Document(BytesIO(file_bytes))
-        text = "\n".join(para.text for para in doc.paragraphs)
-        return text
-    except Exception as e:
-        st.error(f"Error reading DOCX file: {e}")
-        return ""
-
-def extract_text_from_txt(file_bytes):
-    """Extracts text from a TXT file."""
-    try:
-        return StringIO(file_bytes.decode('utf-8')).read()
-    except Exception as e:
-        st.error(f"Error reading TXT file: {e}")
-        return ""
-
-# --- Download NLTK data for VADER (first run) ---
-try:
-    nltk.data.find('sentiment/vader_lexicon.zip')
-except LookupError:
-    st.info("Downloading resources for sentiment analysis (one-time setup)...")
-    nltk.download('vader_lexicon')
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 
 # --- Main UI ---
 st.title("✍️ Advanced Paraphrasing & Analysis Tool")
@@ -79,17 +43,11 @@ if input_method == "Text Input":
     original_text = st.text_area("Enter the text you want to process:", value=st.session_state.original_text, height=200, key="text_area_input")
 else:
     uploaded_file = st.file_uploader(
-        "Upload a .txt, .pdf, or .docx file",
-        type=["txt", "pdf", "docx"]
+        "Upload a .txt, .pdf, .docx, or .pptx file",
+        type=["txt", "pdf", "docx", "pptx"]
     )
     if uploaded_file:
-        file_bytes = uploaded_file.getvalue()
-        if uploaded_file.type == "application/pdf":
-            st.session_state.original_text = extract_text_from_pdf(file_bytes)
-        elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-            st.session_state.original_text = extract_text_from_docx(file_bytes)
-        else:
-            st.session_state.original_text = extract_text_from_txt(file_bytes)
+        st.session_state.original_text = extract_uploaded_file(uploaded_file)
 
     original_text = st.text_area("Extracted Text (Editable)", value=st.session_state.original_text, height=150, key="file_text_input")
 
@@ -124,22 +82,49 @@ st.subheader("3. Generate & Analyze")
 if st.button("Run", use_container_width=True, type="primary"):
     if original_text:
         with st.spinner("The AI is working its magic... This might take a moment."):
-            paraphrase_url = "http://127.0.0.1:8000/paraphrase/"
+            # The streaming endpoint sends all three options as they are written, then the full result
+            paraphrase_url = "http://127.0.0.1:8000/paraphrase/stream"
 
             paraphrase_payload = {
                 "text": original_text,
                 "model_name": model_options[selected_model_name],
                 "creativity": creativity_level,
                 "length": length_option.lower(),
-                "user_email": st.session_state.get('user_email')
             }
 
             try:
-                response = requests.post(paraphrase_url, json=paraphrase_payload)
+                response = authorized_request("POST", paraphrase_url, json=paraphrase_payload, stream=True)
 
                 if response.status_code == 200:
-                    st.success("Analysis Complete!")
-                    st.session_state.response_data = response.json()
+                    live_options = [st.empty() for _ in range(3)]
+                    # candidate -> segment -> text streamed so far
+                    streamed = [{} for _ in range(3)]
+                    st.session_state.response_data = None
+                    for event, data in iter_sse_events(response):
+                        if event == "token":
+                            segments = streamed[data["candidate"]]
+                            segments[data["segment"]] = segments.get(data["segment"], "") + data["text"]
+                            preview = " ".join(segments[i] for i in sorted(segments))
+                            live_options[data["candidate"]].markdown(f"**Option {data['candidate'] + 1}:** {preview}▌")
+                        elif event == "result":
+                            st.session_state.response_data = data
+                        elif event == "error":
+                            st.error(f"Error from backend paraphraser: {data.get('detail')}")
+                    for placeholder in live_options:
+                        placeholder.empty()
+                    if st.session_state.response_data:
+                        st.success("Analysis Complete!")
+                        timings = st.session_state.response_data.get("timings")
+                        if timings:
+                            st.caption("⏱️ " + " · ".join(f"{stage} {ms:.0f} ms" for stage, ms in timings.items()))
+                elif response.status_code == 503:
+                    retry_after = response.headers.get("Retry-After", "a few")
+                    st.error(f"The AI models are busy right now. Please try again in {retry_after} seconds.", icon="⏳")
+                    st.session_state.response_data = None
+                elif response.status_code == 429:
+                    retry_after = response.headers.get("Retry-After", "a few")
+                    st.error(f"You have reached your usage limit. Please try again in {retry_after} seconds.", icon="⏳")
+                    st.session_state.response_data = None
                 else:
                     st.error(f"Error from backend paraphraser: {response.status_code} - {response.text}")
                     st.session_state.response_data = None
@@ -229,12 +214,16 @@ if 'response_data' in st.session_state and st.session_state.response_data:
             st.plotly_chart(fig_rouge, use_container_width=True)
 
 # --- Sentiment Analysis ---
+analyses = None
 if original_text:
     st.divider()
     st.subheader("Sentiment Analysis of Original Text")
-    sid = SentimentIntensityAnalyzer()
-    vader_scores = sid.polarity_scores(original_text)
-    
+    # VADER scores and the sentiment model's label, computed on the backend
+    analyses = get_analysis(original_text)
+if analyses:
+    vader_scores = analyses[0]["vader"]
+    sentiment = analyses[0]["sentiment"]
+
     df_sentiment = pd.DataFrame({
         'Sentiment': ['Positive', 'Neutral', 'Negative'],
         'Score': [vader_scores['pos'], vader_scores['neu'], vader_scores['neg']]
@@ -260,6 +249,8 @@ if original_text:
     with col_sent_metric:
         st.metric(label="Overall Sentiment (Compound Score)", value=f"{vader_scores['compound']:.3f}")
         st.caption("-1 (Very Negative) to +1 (Very Positive)")
+        if sentiment["label"]:
+            st.metric(label="Sentiment Model Label", value=sentiment["label"], help=f"{sentiment['score']:.0%} of the text, weighted by sentence length")
 
 # --- Download Button ---
 if 'paraphrased_text' in st.session_state and st.session_state.paraphrased_text:
@@ -1,12 +1,11 @@
 import streamlit as st
 import requests
-import docx
-import PyPDF2
-import re
-from io import BytesIO, StringIO
 import pandas as pd
 import plotly.express as px
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from libs.analysis import get_analysis
+from libs.auth import authorized_request
+from libs.documents import extract_uploaded_file
+from libs.sse import iter_sse_events
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -23,37 +22,12 @@ if not st.session_state.get('logged_in', False):
     st.stop()
 
 # --- Helper Functions ---
-def extract_text_from_pdf(file_bytes):
-    """Extracts text from a PDF file."""
-    try:
-        pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
-        text = "".join(page.extract_text() or "" for page in pdf_reader.pages)
-        return text
-    except Exception as e:
-        st.error(f"Error reading PDF file: {e}")
+def analysis_caption(analysis) -> str:
+    """Word count, sentence count and overall sentiment from a text's /analyze/ result."""
+    if not analysis:
         return ""
-
-def extract_text_from_docx(file_bytes):
-    """Extracts text from a DOCX file."""
-    try:
-        doc = docx.Document(BytesIO(file_bytes))
-        text = "\n".join(para.text for para in doc.paragraphs)
-        return text
-    except Exception as e:
-        st.error(f"Error reading DOCX file: {e}")
-        return ""
-
-def extract_text_from_txt(file_bytes):
-    """Extracts text from a TXT file."""
-    try:
-        return StringIO(file_bytes.decode('utf-8')).read()
-    except Exception as e:
-        st.error(f"Error reading TXT file: {e}")
-        return ""
-
-def word_count(text: str) -> int:
-    """Counts the number of words in a string."""
-    return len(re.findall(r'\b\w+\b', text))
+    sentiment = analysis["sentiment"]["label"] or "n/a"
+    return f"Word Count: {analysis['word_count']} · Sentences: {analysis['sentence_count']} · Sentiment: {sentiment}"
 
 # --- Main UI ---
 st.title("📚 Advanced Summarization Tool")
@@ -66,7 +40,8 @@ with st.expander("✨ Key Features & Instructions"):
         2.  Select an AI model and the desired summary length.
         3.  Click "Generate Summary" to process the text.
     - **🤖 Multiple AI Models:** Choose from a selection of modern, efficient AI models to get the best summary for your text.
-    - **📄 File Upload:** Directly upload your `.txt`, `.pdf`, and `.docx` files.
+    - **📄 File Upload:** Directly upload your `.txt`, `.pdf`, `.docx`, and `.pptx` files.
+    - **📑 Long Documents:** Multi-page files that exceed the model's input limit are summarized section by section, then combined into one summary.
     - **📏 Adjustable Length:** Control the output by selecting a short, medium, or long summary.
     - **📊 Side-by-Side Comparison:** View the original text and the generated summary together, with word counts and a compression ratio metric.
     - **📈 Complexity Analysis:** Visualize the linguistic complexity of the original text versus the summary.
@@ -99,19 +74,13 @@ with col_input:
         original_text = st.text_area("Enter the text to summarize:", height=250, key="summary_text_area")
     else:
         uploaded_file = st.file_uploader(
-            "Upload a .txt, .pdf, or .docx file",
-            type=["txt", "pdf", "docx"],
+            "Upload a .txt, .pdf, .docx, or .pptx file",
+            type=["txt", "pdf", "docx", "pptx"],
             key="summary_file_uploader"
         )
         if uploaded_file:
             with st.spinner("Extracting text from file..."):
-                file_bytes = uploaded_file.getvalue()
-                if uploaded_file.type == "application/pdf":
-                    original_text = extract_text_from_pdf(file_bytes)
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                    original_text = extract_text_from_docx(file_bytes)
-                else:
-                    original_text = extract_text_from_txt(file_bytes)
+                original_text = extract_uploaded_file(uploaded_file)
             st.text_area("Extracted Text (Editable)", value=original_text, height=170, key="summary_text_area_from_file")
             original_text = st.session_state.summary_text_area_from_file
 
@@ -131,24 +100,57 @@ with col_settings:
         help="Choose the target length for the summary."
     )
     
+    stream_summary = st.toggle(
+        "Show the summary as it is written",
+        value=False,
+        help="Streaming decodes with a single beam, so the wording can differ slightly from the standard summary.",
+    )
+
     st.subheader("3. Generate Summary")
     if st.button("Generate Summary", use_container_width=True, type="primary"):
         if original_text and original_text.strip():
             with st.spinner("The AI is condensing the text... Please wait."):
-                summarize_url = "http://127.0.0.1:8000/summarize/"
+                # /summarize/ uses the model's beam search and is cached; the streaming endpoint
+                # sends a single-beam summary as it is written, then the full result
+                summarize_url = "http://127.0.0.1:8000/summarize/stream" if stream_summary else "http://127.0.0.1:8000/summarize/"
                 summarize_payload = {
                     "text": original_text,
                     "model_name": model_options[selected_model_name],
                     "length": length_option.lower(),
-                    "user_email": st.session_state.get('user_email')
                 }
 
                 try:
-                    response = requests.post(summarize_url, json=summarize_payload)
+                    response = authorized_request("POST", summarize_url, json=summarize_payload, stream=stream_summary)
                     if response.status_code == 200:
-                        st.success("Summary Generated!")
-                        st.session_state.summary_result_data = response.json()
-                        st.session_state.summary_original_for_display = original_text
+                        st.session_state.summary_result_data = None
+                        if stream_summary:
+                            live_summary = st.empty()
+                            streamed_text = ""
+                            for event, data in iter_sse_events(response):
+                                if event == "token":
+                                    streamed_text += data["text"]
+                                    live_summary.markdown(streamed_text + "▌")
+                                elif event == "result":
+                                    st.session_state.summary_result_data = data
+                                elif event == "error":
+                                    st.error(f"Error from backend: {data.get('detail')}")
+                            live_summary.empty()
+                        else:
+                            st.session_state.summary_result_data = response.json()
+                        if st.session_state.summary_result_data:
+                            st.session_state.summary_original_for_display = original_text
+                            st.success("Summary Generated!")
+                            timings = st.session_state.summary_result_data.get("timings")
+                            if timings:
+                                st.caption("⏱️ " + " · ".join(f"{stage} {ms:.0f} ms" for stage, ms in timings.items()))
+                    elif response.status_code == 503:
+                        retry_after = response.headers.get("Retry-After", "a few")
+                        st.error(f"The AI models are busy right now. Please try again in {retry_after} seconds.", icon="⏳")
+                        st.session_state.summary_result_data = None
+                    elif response.status_code == 429:
+                        retry_after = response.headers.get("Retry-After", "a few")
+                        st.error(f"You have reached your usage limit. Please try again in {retry_after} seconds.", icon="⏳")
+                        st.session_state.summary_result_data = None
                     else:
                         st.error(f"Error from backend: {response.status_code} - {response.text}")
                         st.session_state.summary_result_data = None
@@ -170,22 +172,24 @@ if st.session_state.summary_result_data:
     original_analysis = summary_data.get("original_text_analysis")
     summary_analysis = summary_data.get("summary_text_analysis")
 
-    wc_orig = word_count(original_to_display)
-    wc_sum = word_count(summary_to_display)
-    compression = (1 - (wc_sum / wc_orig)) * 100 if wc_orig > 0 else 0
+    # Word counts and sentiment of both texts, from one backend call
+    analyses = get_analysis(original_to_display, summary_to_display) or [None, None]
 
     res_col1, res_col2 = st.columns(2)
     with res_col1:
         st.markdown("#### Original Text")
-        st.caption(f"Word Count: {wc_orig}")
+        st.caption(analysis_caption(analyses[0]))
         st.text_area("Original Text View", value=original_to_display, height=300, disabled=True, key="orig_summary_view")
 
     with res_col2:
         st.markdown("#### Generated Summary")
-        st.caption(f"Word Count: {wc_sum}")
+        st.caption(analysis_caption(analyses[1]))
         st.text_area("Summary View", value=summary_to_display, height=300, key="summary_view")
 
-    st.metric(label="Compression Rate", value=f"{compression:.1f} %", help="The percentage reduction in word count from the original text to the summary.")
+    if analyses[0] and analyses[1]:
+        wc_orig, wc_sum = analyses[0]["word_count"], analyses[1]["word_count"]
+        compression = (1 - (wc_sum / wc_orig)) * 100 if wc_orig > 0 else 0
+        st.metric(label="Compression Rate", value=f"{compression:.1f} %", help="The percentage reduction in word count from the original text to the summary.")
     
     # --- NEW: Text Complexity Analysis Graph ---
     if original_analysis and summary_analysis:
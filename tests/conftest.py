@@ -0,0 +1,118 @@
+"""
+Shared fixtures. The app reads its settings when backend is imported, so they
+are set here first (a fresh database, tiny offline models), and the `api`
+fixture runs the app in-process for the whole session.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+
+import httpx
+import pytest
+
+from benchmarks.summarize_batching import SAMPLE_TEXTS
+from benchmarks.tiny_models import build_tiny_models
+
+LONG_TEXT = "\n\n".join(SAMPLE_TEXTS * 6)
+
+
+@pytest.fixture(scope="session")
+def tiny_models(tmp_path_factory):
+    """Paths of a tiny seq2seq model and a tiny sentiment classifier."""
+    return build_tiny_models(str(tmp_path_factory.mktemp("models")), SAMPLE_TEXTS)
+
+
+class AppClient:
+    """
+    Runs the app's lifespan and every request on one event loop in a background
+    thread, so state bound to the loop (e.g. the inference pool's semaphores)
+    is shared by all tests, like in a server process.
+    """
+
+    def __init__(self, app):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self._lifespan = app.router.lifespan_context(app)
+        self.run(self._lifespan.__aenter__())
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver", timeout=120)
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout=300)
+
+    def request(self, method, url, **kwargs):
+        return self.run(self.client.request(method, url, **kwargs))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def concurrently(self, requests):
+        """Sends (method, url, kwargs) requests all at once; returns the responses in order."""
+        async def send_all():
+            return await asyncio.gather(*(self.client.request(method, url, **kwargs) for method, url, kwargs in requests))
+        return self.run(send_all())
+
+    def close(self):
+        self.run(self.client.aclose())
+        self.run(self._lifespan.__aexit__(None, None, None))
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+# Set before any test module is collected: importing backend.models creates the
+# database engine, so the test database must already be configured by then
+TEST_WORKDIR = tempfile.mkdtemp(prefix="textmorph-tests-")
+os.environ.update({
+    "DATABASE_URL": "sqlite:///" + os.path.join(TEST_WORKDIR, "test.db"),
+    "HISTORY_SPOOL_PATH": os.path.join(TEST_WORKDIR, "history_spool.jsonl"),
+    "HISTORY_WRITE_BEHIND": "0",
+    "JWT_SECRET_KEY": "test-secret",
+    "BCRYPT_ROUNDS": "4",
+    "PASSWORD_HASH_WORKERS": "0",
+    "EXTRACT_WORKERS": "0",
+    "BATCH_WORKER_ENABLED": "0",
+    "INFERENCE_MAX_QUEUE_DEPTH": "128",
+    "RATE_LIMIT_TIERS": "anonymous=100000000:100000000,free=100000000:100000000,pro=100000000:100000000",
+})
+
+
+@pytest.fixture(scope="session")
+def main(tiny_models):
+    """The backend.main module, imported with test settings."""
+    os.environ["SENTIMENT_MODEL_NAME"] = tiny_models[1]
+    from backend import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def api(main):
+    client = AppClient(main.app)
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def bearer(main):
+    """Makes the Authorization header of an access token for a given user."""
+    def make(email, tier="free"):
+        tokens = main.token_signer.issue(email, email.split("@")[0], tier)
+        return {"Authorization": f"Bearer {tokens['access_token']}"}
+    return make
+
+
+@pytest.fixture
+def session_factory(main, tmp_path):
+    """Sessions on a fresh, empty database of the app's schema."""
+    from sqlalchemy.orm import sessionmaker
+
+    from backend import models
+    from backend.database import create_db_engine
+
+    engine = create_db_engine("sqlite:///" + str(tmp_path / "fresh.db"))
+    models.Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
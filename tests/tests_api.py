@@ -0,0 +1,90 @@
+import pytest
+
+from backend import schemas
+
+PASSWORD = "a long password"
+
+
+@pytest.fixture(scope="module")
+def user(api):
+    body = {"email": "api@example.com", "username": "api", "full_name": "Api User", "password": PASSWORD}
+    assert api.post("/users/", json=body).status_code == 200
+    return body
+
+
+def login(api, email, password=PASSWORD):
+    return api.post("/token", data={"username": email, "password": password})
+
+
+def test_duplicate_registration_is_rejected(api, user):
+    assert api.post("/users/", json=user).status_code == 400
+
+
+def test_login_issues_tokens_that_open_the_profile(api, user):
+    response = login(api, user["email"])
+    assert response.status_code == 200
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    profile = api.get(f"/profile/{user['email']}", headers=headers)
+    assert profile.status_code == 200 and profile.json()["username"] == "api"
+
+    updated = api.request("PUT", f"/profile/{user['email']}", json={"bio": "Writes tests."}, headers=headers)
+    assert updated.json()["bio"] == "Writes tests."
+
+
+def test_wrong_password_and_missing_token_are_rejected(api, user):
+    assert login(api, user["email"], "wrong password").status_code == 401
+    assert api.get(f"/profile/{user['email']}").status_code == 401
+
+
+def test_profile_of_another_user_is_forbidden(api, user, bearer):
+    assert api.get(f"/profile/{user['email']}", headers=bearer("someone@example.com")).status_code == 403
+
+
+def test_refresh_token_is_exchanged_for_new_tokens(api, user):
+    tokens = login(api, user["email"]).json()
+    refreshed = api.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+    assert api.post("/token/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+
+
+def test_history_pages_newest_first(api, bearer, main):
+    email = "pages@example.com"
+    for index in range(5):
+        main.save_history_in_new_session(schemas.HistoryCreate(
+            user_email=email, operation_type="Summarize", original_text=f"Text {index}", result_text=f"Result {index}",
+        ))
+    headers = bearer(email)
+    first = api.get(f"/history/{email}", params={"limit": 3}, headers=headers).json()
+    assert [item["original_preview"] for item in first["items"]] == ["Text 4", "Text 3", "Text 2"]
+    second = api.get(f"/history/{email}", params={"limit": 3, "cursor": first["next_cursor"]}, headers=headers).json()
+    assert [item["original_preview"] for item in second["items"]] == ["Text 1", "Text 0"]
+    assert second["next_cursor"] is None
+
+    entry_id = first["items"][0]["id"]
+    entry = api.get(f"/history/{email}/{entry_id}", headers=headers)
+    assert entry.json()["result_text"] == "Result 4"
+    assert api.get(f"/history/{email}/{entry_id}", headers=bearer("pages2@example.com")).status_code == 403
+
+
+def test_history_listing_reads_previews_without_the_full_texts(api, bearer, main):
+    from sqlalchemy import event
+
+    email = "previews@example.com"
+    long_text = "A long document. " * 200
+    main.save_history_in_new_session(schemas.HistoryCreate(
+        user_email=email, operation_type="Summarize", original_text=long_text, result_text="A summary.",
+    ))
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(main.engine, "before_cursor_execute", listener)
+    try:
+        page = api.get(f"/history/{email}", headers=bearer(email)).json()
+    finally:
+        event.remove(main.engine, "before_cursor_execute", listener)
+
+    item = page["items"][0]
+    assert item["original_preview"] == long_text[:main.HISTORY_PREVIEW_CHARS]
+    assert item["original_length"] == len(long_text)
+    assert item["result_preview"] == "A summary." and item["result_length"] == len("A summary.")
+    history_queries = [statement for statement in statements if "FROM history" in statement]
+    assert history_queries and not any(".data" in statement for statement in history_queries)
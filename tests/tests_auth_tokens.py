@@ -0,0 +1,44 @@
+import pytest
+
+from backend.auth_tokens import InvalidToken, TokenSigner
+
+
+def test_access_token_round_trip():
+    signer = TokenSigner("secret")
+    tokens = signer.issue("user@example.com", "user", "pro")
+    claims = signer.verify_access(tokens["access_token"])
+    assert (claims.email, claims.username, claims.tier) == ("user@example.com", "user", "pro")
+    assert signer.verify_refresh(tokens["refresh_token"])["sub"] == "user@example.com"
+
+
+def test_repeated_verification_is_served_from_the_cache():
+    signer = TokenSigner("secret")
+    token = signer.issue("user@example.com", "user")["access_token"]
+    signer.verify_access(token)
+    signer.verify_access(token)
+    assert (signer.cache_misses, signer.cache_hits) == (1, 1)
+
+
+def test_token_signed_with_another_secret_is_rejected():
+    token = TokenSigner("other").issue("user@example.com", "user")["access_token"]
+    with pytest.raises(InvalidToken, match="signature"):
+        TokenSigner("secret").verify_access(token)
+
+
+def test_tampered_payload_is_rejected():
+    signer = TokenSigner("secret")
+    header, _, signature = signer.issue("user@example.com", "user")["access_token"].split(".")
+    forged_payload = signer.issue("admin@example.com", "admin")["access_token"].split(".")[1]
+    with pytest.raises(InvalidToken):
+        signer.verify_access(f"{header}.{forged_payload}.{signature}")
+
+
+def test_expired_and_wrong_type_tokens_are_rejected():
+    signer = TokenSigner("secret", access_ttl=-1)
+    tokens = signer.issue("user@example.com", "user")
+    with pytest.raises(InvalidToken, match="expired"):
+        signer.verify_access(tokens["access_token"])
+    with pytest.raises(InvalidToken, match="access"):
+        signer.verify_access(tokens["refresh_token"])
+    with pytest.raises(InvalidToken, match="Malformed"):
+        signer.verify_access("not-a-token")
@@ -0,0 +1,94 @@
+import datetime
+import threading
+
+from backend import crud, models
+from backend.batch_jobs import parse_jsonl_texts
+
+
+def queue_jobs(db, count):
+    return [crud.create_batch_job(db, "summarize", ["a text"], "t5-small", "short", user_email="a@example.com").id
+            for _ in range(count)]
+
+
+def test_parse_jsonl_texts():
+    assert parse_jsonl_texts(b'"one"\n\n{"text": "two"}\n') == ["one", "two"]
+
+
+def test_jobs_are_claimed_oldest_first_and_only_once(session_factory):
+    db = session_factory()
+    first, second = queue_jobs(db, 2)
+
+    job = crud.claim_next_batch_job(db, "worker-a", lease_seconds=60)
+    assert (job.id, job.status, job.claimed_by) == (first, "running", "worker-a")
+    assert job.started_at is not None and job.lease_expires_at is not None
+    assert crud.claim_next_batch_job(db, "worker-b", lease_seconds=60).id == second
+    assert crud.claim_next_batch_job(db, "worker-c", lease_seconds=60) is None
+    db.close()
+
+
+def test_running_job_is_reclaimed_only_after_its_lease_expires(session_factory):
+    db = session_factory()
+    job_id, = queue_jobs(db, 1)
+    job = crud.claim_next_batch_job(db, "worker-a", lease_seconds=60)
+    assert crud.claim_next_batch_job(db, "worker-b", lease_seconds=60) is None
+    assert crud.renew_batch_lease(db, job, "worker-a", lease_seconds=60)
+
+    job.lease_expires_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+    db.commit()
+    taken = crud.claim_next_batch_job(db, "worker-b", lease_seconds=60)
+    assert (taken.id, taken.claimed_by) == (job_id, "worker-b")
+    # The original worker finds out before its next chunk and stops
+    assert not crud.renew_batch_lease(db, job, "worker-a", lease_seconds=60)
+
+    crud.finish_batch_job(db, taken)
+    assert crud.claim_next_batch_job(db, "worker-c", lease_seconds=0) is None
+    db.close()
+
+
+def test_concurrent_workers_never_claim_the_same_job(session_factory):
+    db = session_factory()
+    job_ids = queue_jobs(db, 30)
+    db.close()
+    claims, lock = [], threading.Lock()
+
+    def work(worker_id):
+        session = session_factory()
+        try:
+            while True:
+                job = crud.claim_next_batch_job(session, worker_id, lease_seconds=60, attempts=50)
+                if job is None:
+                    return
+                with lock:
+                    claims.append(job.id)
+        finally:
+            session.close()
+
+    threads = [threading.Thread(target=work, args=(f"worker-{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claims) == job_ids
+
+
+def test_batch_endpoints_require_a_token(api):
+    body = {"texts": ["a text"], "model_name": "t5-small", "length": "short"}
+    assert api.post("/batch/summarize", json=body).status_code == 401
+    assert api.get("/batch/1").status_code == 401
+    assert api.get("/batch/1/results").status_code == 401
+
+
+def test_batch_jobs_belong_to_the_token_user(api, bearer, main):
+    owner, other = bearer("owner@example.com"), bearer("other@example.com")
+    body = {"texts": ["a text"], "model_name": "t5-small", "length": "short", "user_email": "other@example.com"}
+    response = api.post("/batch/summarize", json=body, headers=owner)
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    db = main.SessionLocal()
+    assert db.get(models.BatchJob, job_id).user_email == "owner@example.com"
+    db.close()
+    assert api.get(f"/batch/{job_id}", headers=owner).status_code == 200
+    assert api.get(f"/batch/{job_id}/results", headers=owner).status_code == 200
+    assert api.get(f"/batch/{job_id}", headers=other).status_code == 404
+    assert api.get(f"/batch/{job_id}/results", headers=other).status_code == 404
@@ -0,0 +1,35 @@
+from backend import complexity
+from backend.complexity import ComplexityAnalyzer, grade_to_level
+
+SENTENCES = [
+    "The cat sat on the warm mat by the door.",
+    "Notwithstanding considerable methodological heterogeneity, the investigators characterized the phenomenon comprehensively.",
+    "Too short.",
+    "The cat sat on the warm mat by the door.",
+]
+
+
+def test_batch_grades_match_sentence_by_sentence_grades():
+    batched = ComplexityAnalyzer()._score(SENTENCES)
+    single = [ComplexityAnalyzer()._score([sentence])[0] for sentence in SENTENCES]
+    assert batched == single
+    assert batched[2] is None
+    assert grade_to_level(batched[0]) == "beginner" and grade_to_level(batched[1]) == "advanced"
+
+
+def test_sentence_with_an_unscorable_word_is_skipped(monkeypatch):
+    def syllables(word):
+        if word == "unscorable":
+            raise ValueError(word)
+        return 1
+    monkeypatch.setattr(complexity, "syllables_in_word", syllables)
+    grades = ComplexityAnalyzer()._score(["one two three four five unscorable", "one two three four five six"])
+    assert grades[0] is None and grades[1] is not None
+
+
+def test_grades_are_memoized_per_sentence(monkeypatch):
+    analyzer = ComplexityAnalyzer()
+    analyzer.sentence_grades(SENTENCES)
+    assert analyzer.cache_size() == 3
+    monkeypatch.setattr(analyzer, "_score", lambda sentences: [0.0] * len(sentences))
+    assert analyzer.sentence_grades(SENTENCES[:1]) == ComplexityAnalyzer().sentence_grades(SENTENCES[:1])
@@ -0,0 +1,42 @@
+from backend import schemas
+from backend.history_search import build_match_query
+
+
+def test_match_query_quotes_words_and_keeps_prefixes():
+    owner = "a@b".encode("utf-8").hex().upper()
+    assert build_match_query('quantum comput* "OR', "a@b") == f'owner : "{owner}" AND ("quantum" "comput"* "OR")'
+    assert build_match_query("  * ", "a@b") == ""
+
+
+def test_search_finds_only_the_users_matching_entries(api, bearer, main):
+    texts = {
+        "search@example.com": ["Quantum computing explained.", "A recipe for bread."],
+        "other@example.com": ["Quantum computing for someone else."],
+    }
+    for email, originals in texts.items():
+        for original in originals:
+            main.save_history_in_new_session(schemas.HistoryCreate(
+                user_email=email, operation_type="Summarize", original_text=original, result_text="A summary.",
+            ))
+
+    email = "search@example.com"
+    results = api.get(f"/history/{email}/search", params={"q": "quantum comput*"}, headers=bearer(email)).json()
+    assert len(results) == 1
+    assert "<b>Quantum</b>" in results[0]["original_snippet"]
+    assert api.get(f"/history/{email}/search", params={"q": "nothing"}, headers=bearer(email)).json() == []
+
+
+def test_entry_without_a_result_text_still_matches(api, bearer, main):
+    from sqlalchemy import text
+
+    email = "partial@example.com"
+    with main.engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO history (user_email, operation_type, original_text) VALUES (:email, 'Summarize', :original)"),
+            {"email": email, "original": "Photosynthesis turns light into sugar."},
+        )
+    response = api.get(f"/history/{email}/search", params={"q": "photosynthesis"}, headers=bearer(email))
+    assert response.status_code == 200
+    result, = response.json()
+    assert "<b>Photosynthesis</b>" in result["original_snippet"]
+    assert result["result_snippet"] is None
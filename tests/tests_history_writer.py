@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from backend import crud, models, schemas
+from backend.history_writer import HistoryWriteBuffer
+
+
+def entry(text):
+    return schemas.HistoryCreate(user_email="writer@example.com", operation_type="Summarize", original_text=text, result_text="r")
+
+
+@pytest.fixture
+def poison(monkeypatch):
+    """Makes any insert that includes an entry with the text "poison" fail."""
+    create = crud.create_history_entries
+
+    def create_history_entries(db, histories):
+        if any(history["original_text"] == "poison" for history in histories):
+            raise ValueError("bad row")
+        return create(db, histories)
+    monkeypatch.setattr(crud, "create_history_entries", create_history_entries)
+
+
+def stored_texts(session_factory):
+    db = session_factory()
+    texts = sorted(history.original_text for history in db.query(models.History).all())
+    db.close()
+    return texts
+
+
+def test_flush_writes_queued_entries_in_one_batch(session_factory, tmp_path):
+    writer = HistoryWriteBuffer(session_factory, spool_path=str(tmp_path / "spool.jsonl"))
+    for text in ("a", "b", "c"):
+        writer.add(entry(text))
+    assert writer.flush()
+    assert writer.pending_count() == 0
+    assert stored_texts(session_factory) == ["a", "b", "c"]
+
+
+def test_bad_entry_is_dead_lettered_and_the_rest_written(session_factory, tmp_path, poison):
+    spool, dead = tmp_path / "spool.jsonl", tmp_path / "dead.jsonl"
+    writer = HistoryWriteBuffer(session_factory, spool_path=str(spool), dead_letter_path=str(dead))
+    for text in ("a", "poison", "b"):
+        writer.add(entry(text))
+    assert writer.flush()
+    assert stored_texts(session_factory) == ["a", "b"]
+    assert not spool.exists()
+    dead_entries = [json.loads(line) for line in dead.read_text().splitlines()]
+    assert [(e["original_text"], e["error"]) for e in dead_entries] == [("poison", "bad row")]
+
+
+def test_unavailable_database_spools_then_replays(session_factory, tmp_path, monkeypatch):
+    spool, dead = tmp_path / "spool.jsonl", tmp_path / "dead.jsonl"
+    create = crud.create_history_entries
+    available = [False]
+
+    def create_history_entries(db, histories):
+        if not available[0]:
+            raise ConnectionError("database is down")
+        return create(db, histories)
+    monkeypatch.setattr(crud, "create_history_entries", create_history_entries)
+
+    writer = HistoryWriteBuffer(session_factory, spool_path=str(spool), dead_letter_path=str(dead))
+    writer.add(entry("a"))
+    writer.add(entry("b"))
+    assert not writer.flush()
+    assert len(spool.read_text().splitlines()) == 2 and not dead.exists()
+
+    available[0] = True
+    writer.recover()
+    assert writer.flush()
+    assert stored_texts(session_factory) == ["a", "b"]
+
+
+def test_entry_failing_on_its_own_is_dead_lettered_after_max_attempts(session_factory, tmp_path, poison):
+    spool, dead = tmp_path / "spool.jsonl", tmp_path / "dead.jsonl"
+    writer = HistoryWriteBuffer(session_factory, spool_path=str(spool), dead_letter_path=str(dead), max_attempts=3)
+    writer.add(entry("poison"))
+    for _ in range(2):
+        assert not writer.flush()
+        writer.recover()
+    assert not writer.flush()
+    writer.recover()
+    assert writer.pending_count() == 0
+    assert json.loads(dead.read_text())["attempts"] == 3
+
+
+def test_replayed_spool_is_kept_until_its_entries_are_written(session_factory, tmp_path, monkeypatch):
+    spool, dead = tmp_path / "spool.jsonl", tmp_path / "dead.jsonl"
+    replay = tmp_path / "spool.jsonl.replay"
+    create = crud.create_history_entries
+    available = [False]
+
+    def create_history_entries(db, histories):
+        if not available[0]:
+            raise ConnectionError("database is down")
+        return create(db, histories)
+    monkeypatch.setattr(crud, "create_history_entries", create_history_entries)
+
+    writer = HistoryWriteBuffer(session_factory, spool_path=str(spool), dead_letter_path=str(dead))
+    writer.add(entry("a"))
+    assert not writer.flush()
+
+    # The process dies after replaying the spool but before the next flush
+    writer.recover()
+    writer.recover()
+    assert writer.pending_count() == 1
+    assert replay.exists()
+
+    available[0] = True
+    restarted = HistoryWriteBuffer(session_factory, spool_path=str(spool), dead_letter_path=str(dead))
+    restarted.recover()
+    assert restarted.flush()
+    assert stored_texts(session_factory) == ["a"]
+    assert not replay.exists() and not spool.exists()
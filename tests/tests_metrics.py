@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.metrics import Counter, Histogram
+from backend.model_registry import ModelRegistry
+
+THREADS, ROUNDS = 8, 2000
+
+
+def run_concurrently(fn):
+    with ThreadPoolExecutor(THREADS) as pool:
+        for future in [pool.submit(fn) for _ in range(THREADS)]:
+            future.result()
+
+
+def test_counter_and_histogram_count_every_update_from_threads():
+    counter = Counter("test_total", "Test counter", ("route",))
+    histogram = Histogram("test_seconds", "Test histogram", ("route",), buckets=(0.5, 1.0))
+
+    def update():
+        for _ in range(ROUNDS):
+            counter.inc(route="/a")
+            histogram.observe(0.25, route="/a")
+
+    run_concurrently(update)
+    assert [value for _, _, value in counter.samples()] == [THREADS * ROUNDS]
+    counts = [value for name, _, value in histogram.samples() if name == "test_seconds_count"]
+    assert counts == [THREADS * ROUNDS]
+
+
+def test_model_registry_counts_every_hit_from_threads():
+    registry = ModelRegistry({"test": lambda name: object()})
+    registry.get("test", "model")
+
+    def use():
+        for _ in range(ROUNDS):
+            registry.get("test", "model")
+
+    run_concurrently(use)
+    assert registry.misses == 1
+    assert registry.hits == THREADS * ROUNDS
@@ -0,0 +1,51 @@
+from backend.paraphrasing import generate_paraphrase_candidates, length_bounds, length_buckets
+from benchmarks.summarize_batching import SAMPLE_TEXTS
+
+
+def test_length_buckets_keep_similar_lengths_together():
+    word_counts = [10, 200, 12, 14, 190, 30]
+    assert length_buckets(word_counts, max_batch_segments=16) == [[0, 2, 3], [5], [4, 1]]
+    assert length_buckets([10] * 5, max_batch_segments=2) == [[0, 1], [2, 3], [4]]
+
+
+class FakeTokenizer:
+    """Enough of a tokenizer for generate_paraphrase_candidates, with one token per word."""
+
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": texts, "attention_mask": None}
+
+    def batch_decode(self, rows, **kwargs):
+        return rows
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, input_ids, min_length, max_length, num_return_sequences, **kwargs):
+        self.calls.append((len(input_ids), min_length, max_length))
+        return [f"{text.split(': ', 1)[1]} #{candidate}" for text in input_ids for candidate in range(num_return_sequences)]
+
+
+def test_each_length_bucket_gets_its_own_bounds(monkeypatch):
+    from backend import paraphrasing
+
+    monkeypatch.setattr(paraphrasing, "count_tokens", lambda tokenizer, texts: [len(text.split()) for text in texts])
+    monkeypatch.setattr(paraphrasing, "split_into_chunks", lambda paragraph, tokenizer, max_tokens: [paragraph])
+    short, long_ = "word " * 20, "word " * 300
+    text = "\n\n".join([short.strip() + " one", long_.strip(), short.strip() + " two"])
+    tokenizer, model = FakeTokenizer(), FakeModel()
+
+    candidates = generate_paraphrase_candidates(model, tokenizer, text, "medium", 1.0, 0.9, num_candidates=2)
+    assert model.calls == [(2, *length_bounds(21, "medium")), (1, *length_bounds(300, "medium"))]
+    # Outputs go back to their paragraphs in the original order
+    assert [paragraph.split()[-1] for paragraph in candidates[1].split("\n\n")] == ["#1", "#1", "#1"]
+    assert candidates[0].split("\n\n")[0].endswith("one #0") and candidates[0].split("\n\n")[2].endswith("two #0")
+
+
+def test_paraphrase_keeps_every_paragraph(api, tiny_models):
+    text = "\n\n".join(SAMPLE_TEXTS[:3])
+    body = {"text": text, "model_name": tiny_models[0], "creativity": 0.5, "length": "short"}
+    response = api.post("/paraphrase/", json=body)
+    assert response.status_code == 200
+    assert all(len(result["text"].split("\n\n")) == 3 for result in response.json()["paraphrased_results"])
@@ -0,0 +1,75 @@
+import pytest
+
+from backend.rate_limit import (
+    MemoryBuckets,
+    RateLimited,
+    RateLimiter,
+    SQLiteBuckets,
+    parse_model_weights,
+    parse_rate_limit_tiers,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryBuckets() if request.param == "memory" else SQLiteBuckets(str(tmp_path / "buckets.db"))
+
+
+def test_parse_rate_limit_tiers():
+    assert parse_rate_limit_tiers("free=20000:10000, pro=100000,broken=x:1,zero=0:5") == {
+        "free": (20000.0, 10000.0),
+        "pro": (100000.0, 100000.0),
+    }
+
+
+def test_parse_model_weights():
+    assert parse_model_weights("tuner007/pegasus_paraphrase=2,t5-small=0.5,bad") == {
+        "tuner007/pegasus_paraphrase": 2.0,
+        "t5-small": 0.5,
+    }
+
+
+def test_bucket_refills_over_time(store):
+    assert store.take("user", 100, 100, 10.0, now=0) == 0
+    assert store.take("user", 50, 100, 10.0, now=2) == pytest.approx(3)
+    assert store.take("user", 50, 100, 10.0, now=5) == 0
+    # Never refills beyond its capacity
+    assert store.take("user", 100, 100, 10.0, now=1000) == 0
+    assert store.take("user", 1, 100, 10.0, now=1000) > 0
+
+
+def test_tiers_and_model_weights_set_the_cost():
+    limiter = RateLimiter({"free": (100, 60), "pro": (1000, 600)}, model_weights={"big": 2})
+    text = "x" * 40 * 4
+    assert limiter.cost("big", text, multiplier=3) == 240
+    limiter.check("pro-user", "pro", "big", text, multiplier=3)
+    limiter.check("free-user", "free", "small", text)
+    with pytest.raises(RateLimited):
+        limiter.check("free-user", "free", "big", text)
+    # An unknown tier is limited like the default one
+    limiter.check("other", "gold", "small", text)
+    with pytest.raises(RateLimited):
+        limiter.check("other", "gold", "big", text)
+    assert limiter.rejected == 2
+
+
+def test_full_cost_waits_for_a_full_bucket_then_leaves_it_in_debt(store):
+    # 100 tokens of burst, refilled at 60 per minute (one per second)
+    assert store.take("user", 100, 100, 1.0, now=0, debit=400) == 0
+    assert store.take("user", 1, 100, 1.0, now=0) == pytest.approx(301)
+    assert store.take("user", 1, 100, 1.0, now=301) == 0
+
+
+def test_batch_submissions_are_charged_in_full():
+    limiter = RateLimiter({"free": (100, 60)})
+    text = "x" * 400 * 4
+    limiter.check("user", "free", "t5-small", text, full_cost=True)
+    with pytest.raises(RateLimited) as raised:
+        limiter.check("user", "free", "t5-small", "short")
+    assert raised.value.retry_after > 300
+
+
+def test_invalid_token_is_rejected_rather_than_treated_as_anonymous(api):
+    response = api.post("/sentiment/", json={"text": "A fine day."}, headers={"Authorization": "Bearer not-a-token"})
+    assert response.status_code == 401
+    assert api.post("/sentiment/", json={"text": "A fine day."}).status_code == 200
@@ -0,0 +1,38 @@
+from backend.result_cache import ResultCache, make_cache_key
+
+
+def test_cache_key_ignores_whitespace_differences_by_default():
+    assert make_cache_key("summarize", "t5-small", "short", "A  text.\n") == make_cache_key("summarize", "t5-small", "short", "A text.")
+
+
+def test_cache_key_keeps_layout_when_not_normalized():
+    one = make_cache_key("sentiment", "model", text="First.\n\nSecond.", normalize=False)
+    two = make_cache_key("sentiment", "model", text="First. Second.", normalize=False)
+    assert one != two
+
+
+def test_cache_key_covers_every_setting():
+    base = make_cache_key("paraphrase", "model", "short", "A text.", creativity=0.5)
+    assert base != make_cache_key("summarize", "model", "short", "A text.", creativity=0.5)
+    assert base != make_cache_key("paraphrase", "other", "short", "A text.", creativity=0.5)
+    assert base != make_cache_key("paraphrase", "model", "long", "A text.", creativity=0.5)
+    assert base != make_cache_key("paraphrase", "model", "short", "A text.", creativity=0.7)
+    assert base == make_cache_key("paraphrase", "model", "short", "A text.", creativity=0.5000001)
+
+
+def test_memory_tier_evicts_least_recently_used_by_size():
+    cache = ResultCache(max_bytes=30)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    assert cache.get("a") == "x" * 10
+    cache.set("c", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 10 and cache.get("c") == "z" * 10
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResultCache(disk_path=path).set("key", {"summary": "kept"})
+    cache = ResultCache(disk_path=path)
+    assert cache.get("key") == {"summary": "kept"}
+    assert cache.get_stats()["disk_hits"] == 1
@@ -0,0 +1,55 @@
+import threading
+
+from transformers import pipeline
+
+from backend.long_document import count_tokens, counting_tokenizer
+from benchmarks.summarize_batching import SAMPLE_TEXTS
+from tests.conftest import LONG_TEXT
+
+
+def test_count_tokens_matches_the_tokenizer(tiny_models):
+    classifier = pipeline("sentiment-analysis", model=tiny_models[1], tokenizer=tiny_models[1])
+    expected = [len(ids) for ids in classifier.tokenizer(SAMPLE_TEXTS + [LONG_TEXT], add_special_tokens=False)["input_ids"]]
+    assert count_tokens(classifier.tokenizer, SAMPLE_TEXTS + [LONG_TEXT]) == expected
+
+
+def test_counting_does_not_race_with_truncating_inference(tiny_models):
+    classifier = pipeline("sentiment-analysis", model=tiny_models[1], tokenizer=tiny_models[1])
+    counting_tokenizer(classifier.tokenizer)
+    classifier("", truncation=True, max_length=512)
+    errors = []
+
+    def work():
+        for _ in range(20):
+            try:
+                count_tokens(classifier.tokenizer, [LONG_TEXT])
+                classifier(LONG_TEXT, truncation=True, max_length=512)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_concurrent_sentiment_requests_all_succeed(api):
+    requests = []
+    for i in range(40):
+        text = f"{LONG_TEXT} Request {i}." if i % 2 else f"{SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]} Request {i}."
+        body = {"text": text, "mode": ("auto", "text", "sentences")[i % 3], "include_sentences": False}
+        requests.append(("POST", "/sentiment/", {"json": body}))
+    responses = api.concurrently(requests)
+    assert [response.status_code for response in responses] == [200] * 40, [r.text for r in responses if r.status_code != 200]
+
+
+def test_timeline_cache_keeps_paragraph_breaks_apart(api):
+    one_paragraph = "The results were good. The team was happy. Everyone agreed."
+    two_paragraphs = "The results were good.\n\nThe team was happy. Everyone agreed."
+    body = {"mode": "sentences", "include_sentences": False}
+    first = api.post("/sentiment/", json={"text": two_paragraphs, **body}).json()
+    second = api.post("/sentiment/", json={"text": one_paragraph, **body}).json()
+    assert first["paragraph_count"] == 2
+    assert second["paragraph_count"] == 1
@@ -0,0 +1,33 @@
+import json
+
+from backend.streaming import format_sse
+from benchmarks.summarize_batching import SAMPLE_TEXTS
+
+
+def sse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_format_sse():
+    assert format_sse("token", {"text": "hi"}) == 'event: token\ndata: {"text": "hi"}\n\n'
+
+
+def test_streamed_summary_is_cached(api, tiny_models):
+    body = {"text": SAMPLE_TEXTS[0] + " Streamed once.", "model_name": tiny_models[0], "length": "short"}
+    first = sse_events(api.post("/summarize/stream", json=body).text)
+    second = sse_events(api.post("/summarize/stream", json=body).text)
+    assert first[-1][0] == "result"
+    assert [event for event, _ in second] == ["result"]
+    assert second[-1][1]["summary"] == first[-1][1]["summary"]
+
+
+def test_stream_serves_a_cached_beam_search_summary(api, tiny_models):
+    body = {"text": SAMPLE_TEXTS[1] + " Summarized first.", "model_name": tiny_models[0], "length": "short"}
+    summary = api.post("/summarize/", json=body).json()["summary"]
+    events = sse_events(api.post("/summarize/stream", json=body).text)
+    assert [event for event, _ in events] == ["result"]
+    assert events[0][1]["summary"] == summary
@@ -0,0 +1,46 @@
+import threading
+
+from backend import models
+from backend.batching import MicroBatcher
+from benchmarks.summarize_batching import SAMPLE_TEXTS
+
+
+def test_history_is_recorded_for_the_token_user(api, bearer, main, tiny_models):
+    text = "History belongs to whoever holds the token. " + SAMPLE_TEXTS[0]
+    body = {"text": text, "model_name": tiny_models[0], "length": "short", "user_email": "victim@example.com"}
+    assert api.post("/summarize/", json=body, headers=bearer("holder@example.com")).status_code == 200
+    assert api.post("/summarize/", json=body).status_code == 200
+
+    db = main.SessionLocal()
+    owners = [entry.user_email for entry in db.query(models.History).all() if entry.original_text == text]
+    db.close()
+    assert owners == ["holder@example.com"]
+
+
+def test_micro_batcher_groups_by_key_and_isolates_failures():
+    calls, lock = [], threading.Lock()
+
+    def process(key, items):
+        with lock:
+            calls.append((key, list(items)))
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [f"{key}:{item}" for item in items]
+
+    batcher = MicroBatcher(process, window_seconds=0.05, max_batch_size=8)
+    futures = [batcher.submit("short", item) for item in ("a", "bad", "b")] + [batcher.submit("long", "c")]
+    assert [f.result(timeout=10) for f in futures[2:]] == ["short:b", "long:c"]
+    assert futures[0].result(timeout=10) == "short:a"
+    assert isinstance(futures[1].exception(timeout=10), ValueError)
+    assert ("short", ["a", "bad", "b"]) in calls and ("long", ["c"]) in calls
+    batcher.shutdown()
+
+
+def test_concurrent_summaries_are_batched_and_all_answered(api, tiny_models):
+    texts = [f"{SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]} Batched request {index}." for index in range(6)]
+    responses = api.concurrently([
+        ("POST", "/summarize/", {"json": {"text": text, "model_name": tiny_models[0], "length": "short"}})
+        for text in texts
+    ])
+    assert [response.status_code for response in responses] == [200] * len(texts)
+    assert all(isinstance(response.json()["summary"], str) for response in responses)
@@ -0,0 +1,55 @@
+from backend.text_analysis import aggregate_sentiment, build_sentiment_timeline, classify_sentences, split_paragraph_sentences
+
+
+def fake_classifier(sentences, batch_size, **kwargs):
+    """Labels sentences mentioning "bad" NEGATIVE and records the order it was called with."""
+    fake_classifier.calls.append(list(sentences))
+    return [{"label": "NEGATIVE" if "bad" in s else "POSITIVE", "score": 0.9} for s in sentences]
+
+
+def test_classify_sentences_sorts_by_length_and_restores_order():
+    fake_classifier.calls = []
+    sentences = ["A much longer sentence that is bad.", "Short.", "Medium length one."]
+    predictions = classify_sentences(fake_classifier, sentences, batch_size=2)
+    assert fake_classifier.calls == [sorted(sentences, key=len)]
+    assert [p["label"] for p in predictions] == ["NEGATIVE", "POSITIVE", "POSITIVE"]
+
+
+def test_aggregate_sentiment_weights_sentences_by_length():
+    sentences = ["Bad.", "This one is a long and happy sentence."]
+    predictions = [{"label": "NEGATIVE", "score": 1.0}, {"label": "POSITIVE", "score": 1.0}]
+    aggregate = aggregate_sentiment(sentences, predictions)
+    assert aggregate["label"] == "POSITIVE"
+    assert aggregate["label_counts"] == {"NEGATIVE": 1, "POSITIVE": 1}
+    assert aggregate["label_shares"]["POSITIVE"] == round(8 / 9, 4)
+
+
+def test_aggregate_sentiment_of_no_sentences():
+    assert aggregate_sentiment([], [])["label"] is None
+
+
+def test_timeline_splits_paragraphs_on_blank_lines():
+    text = "It was good. Really good.\n\nThen it went bad.\n  \nThe end is fine."
+    paragraphs, sentence_lists = split_paragraph_sentences(text)
+    assert len(paragraphs) == 3
+    sentences = [s for paragraph in sentence_lists for s in paragraph]
+    timeline = build_sentiment_timeline(paragraphs, sentence_lists, fake_classifier(sentences, 8))
+    assert [p["label"] for p in timeline["paragraphs"]] == ["POSITIVE", "NEGATIVE", "POSITIVE"]
+    assert [s["paragraph"] for s in timeline["sentences"]] == [0] * len(sentence_lists[0]) + [1] * len(sentence_lists[1]) + [2] * len(sentence_lists[2])
+    assert [s["index"] for s in timeline["sentences"]] == list(range(len(sentences)))
+    assert "sentences" not in build_sentiment_timeline(paragraphs, sentence_lists, fake_classifier(sentences, 8), include_sentences=False)
+
+
+def test_analyze_caches_per_exact_text(api):
+    first = api.post("/analyze/", json={"text": "One sentence here. Another one."}).json()
+    second = api.post("/analyze/", json={"text": "One sentence here.\n\nAnother one."}).json()
+    assert first["character_count"] == 31
+    assert second["character_count"] == 32
+
+
+def test_analyze_many_texts_returns_one_result_each(api):
+    response = api.post("/analyze/", json={"texts": ["Good work today.", "Good work today.", "A different text."]})
+    results = response.json()["results"]
+    assert len(results) == 3
+    assert results[0] == results[1]
+    assert results[2]["word_count"] == 3